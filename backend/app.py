@@ -1,12 +1,20 @@
-from flask import Flask, request, jsonify
+# Imported first so the startup report times every import below
+from models.startup import STARTUP, discover_model_files
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import joblib
 import os
+import time
 from pathlib import Path
 import logging
 
+from models.inference_engine import InferenceEngine
+from models.model_reloader import ModelReloader, RELOAD_INTERVAL
+
+STARTUP.imports_done()
+
 app = Flask(__name__)
 
 # Basic logging setup (configurable via LOG_LEVEL env var)
@@ -50,72 +58,59 @@ _app_file = Path(__file__).resolve()
 BASE_DIR = _app_file.parent.parent  # Project root (absolute)
 MODEL_DIR = BASE_DIR / "backend" / "models"  # backend/models directory (absolute)
 
-# Try to find the model file
+# Find the model, label encoder and metadata files
 # Prioritize the new 7-class model: ids_7class_histgb_safe.joblib
-model_path = None
-le_path = None
-
-logger.info(f"Looking for models in: {MODEL_DIR}")
-
-# First, try to find the new model explicitly
+# (results are cached until the directory listings change, see models/startup.py)
 new_model_name = "ids_7class_histgb_safe.joblib"
-new_model_path = MODEL_DIR / new_model_name
-if new_model_path.exists():
-    model_path = new_model_path
-    logger.info(f"Found new model: {new_model_name}")
-
-# Look for label encoder
-if MODEL_DIR.exists():
-    model_files = list(MODEL_DIR.glob("*.joblib"))
-    logger.info(f"Found {len(model_files)} .joblib files: {[f.name for f in model_files]}")
-    for f in model_files:
-        if "label_encoder" in f.name:
-            le_path = f
-        elif model_path is None and ("ids_" in f.name or "model" in f.name.lower()):
-            # Only set model_path if we haven't found the new model yet
-            model_path = f
-
-# Fallback to artifacts directory in project root
-if not model_path or not le_path:
-    artifacts_dir = BASE_DIR / "artifacts"
-    logger.warning(f"Models not in backend/models, checking: {artifacts_dir}")
-    if artifacts_dir.exists():
-        # Try new model first in artifacts
-        new_model_path_artifacts = artifacts_dir / new_model_name
-        if new_model_path_artifacts.exists() and model_path is None:
-            model_path = new_model_path_artifacts
-            logger.info(f"Found new model in artifacts: {new_model_name}")
-        
-        for f in artifacts_dir.glob("*.joblib"):
-            if "label_encoder" in f.name:
-                le_path = f
-            elif model_path is None and "ids_" in f.name:
-                model_path = f
-        if model_path or le_path:
-            logger.info("Found models in artifacts directory")
 
+logger.info(f"Looking for models in: {MODEL_DIR}")
+found = discover_model_files(MODEL_DIR, BASE_DIR / "artifacts", new_model_name)
+model_path, le_path = found["model"], found["encoder"]
+metadata_path = found["metadata"] or MODEL_DIR / "model_metadata.json"
+if model_path is not None:
+    logger.info(f"Found model: {model_path}{' (cached discovery)' if found['cached'] else ''}")
+if model_path is None or model_path.parent != MODEL_DIR:
+    logger.warning(f"Model not in backend/models, checked: {BASE_DIR / 'artifacts'}")
+
+engine = None
 model = None
 label_encoder = None
 
+# Hot reload (POST /api/admin/reload, or a file watcher when MODEL_WATCH_INTERVAL > 0)
+reloader = None
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0") or 0)
+# Required in the X-Admin-Token header when set; otherwise only local clients may reload
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def install_engine(new_engine):
+    """Swap in a loaded engine; requests already running keep the engine they started with"""
+    global engine, model, label_encoder
+    engine = new_engine
+    model, label_encoder = new_engine.model, new_engine.label_encoder
+
 def load_model():
-    global model, label_encoder
+    global reloader
     try:
         if model_path and le_path and model_path.exists() and le_path.exists():
-            model = joblib.load(model_path)
-            label_encoder = joblib.load(le_path)
-            logger.info(f"Model loaded from {model_path}")
+            with STARTUP.phase("model load"):
+                loaded = InferenceEngine.load(model_path, le_path, metadata_path)
+            with STARTUP.phase("warm-up"):
+                loaded.warm_up()
+            install_engine(loaded)
+            reloader = ModelReloader(model_path, le_path, metadata_path, on_swap=install_engine, current=loaded,
+                                     interval=MODEL_WATCH_INTERVAL or RELOAD_INTERVAL)
+            if MODEL_WATCH_INTERVAL:
+                reloader.start()
+                logger.info(f"Watching model files every {MODEL_WATCH_INTERVAL:g}s for hot reload")
+            logger.info(f"Model loaded from {engine.source} (version {engine.version})")
             logger.info(f"Label encoder loaded from {le_path}")
             logger.info(f"Model classes: {len(label_encoder.classes_)} classes: {list(label_encoder.classes_)[:5]}{'...' if len(label_encoder.classes_)>5 else ''}")
-            # Compare model classes_ vs label encoder if available
-            try:
-                model_classes = getattr(model, 'classes_', None)
-                if model_classes is not None:
-                    if list(model_classes) != list(label_encoder.classes_):
-                        logger.warning("Model classes_ and label_encoder.classes_ differ. This can cause mislabeling.")
-                        logger.debug(f"model.classes_[:10]: {list(model_classes)[:10]}")
-                        logger.debug(f"label_encoder.classes_[:10]: {list(label_encoder.classes_)[:10]}")
-            except Exception as e:
-                logger.debug(f"Could not compare model classes with label encoder: {e}")
+            # The engine maps model.classes_ onto the label encoder; note when they are ordered differently
+            if not engine.classes_match:
+                logger.warning("Model classes_ and label_encoder.classes_ are ordered differently; "
+                               "labels are mapped through model.classes_.")
+                logger.debug(f"model.classes_[:10]: {list(getattr(model, 'classes_', []))[:10]}")
+                logger.debug(f"label_encoder.classes_[:10]: {list(label_encoder.classes_)[:10]}")
         else:
             logger.error("Model files not found. Please train the model first.")
             logger.error(f"Expected model path: {model_path}")
@@ -130,6 +125,7 @@ def load_model():
         logger.exception(f"Error loading model: {e}")
 
 load_model()
+logger.info(STARTUP.summary())
 
 # Helper functions (from notebook)
 EXCLUDE_COLS = {
@@ -178,13 +174,41 @@ def select_features(df, label_col='Label'):
 def health():
     """Health check endpoint"""
     # Flask-CORS handles OPTIONS automatically
+    current = engine
     return jsonify({
         'status': 'ok',
-        'model_loaded': model is not None,
-        'label_encoder_loaded': label_encoder is not None
+        'model_loaded': current is not None,
+        'label_encoder_loaded': current is not None and current.label_encoder is not None,
+        'model_version': current.version if current is not None else None,
+        'model_loaded_at': current.loaded_at if current is not None else None,
+        'model_source': str(current.source) if current is not None else None,
+        'model_reload': reloader.status() if reloader is not None else None,
     })
 
 
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_model():
+    """
+    Load the model files again, validate the new model on a warm-up batch and
+    swap it in. Requests in flight finish on the old model; on failure the
+    old model keeps serving.
+    """
+    if ADMIN_TOKEN:
+        if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return jsonify({'error': 'Forbidden'}), 403
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'error': 'Forbidden'}), 403
+    if reloader is None:
+        return jsonify({'error': 'No model files to reload'}), 503
+
+    ok, message = reloader.reload()
+    if not ok:
+        logger.error(f"Model reload rejected: {message}")
+        return jsonify({'success': False, 'error': message, 'model_version': reloader.version}), 422
+    logger.info(f"Model reloaded, version {message}")
+    return jsonify({'success': True, 'model_version': message, 'model_reload': reloader.status()})
+
+
 @app.route('/api/predict', methods=['POST', 'OPTIONS'])
 def predict():
     """File upload prediction endpoint"""
@@ -192,7 +216,9 @@ def predict():
     if request.method == 'OPTIONS':
         return '', 200
     
-    if model is None or label_encoder is None:
+    # One engine for the whole request, even if a reload swaps the model meanwhile
+    current = engine
+    if current is None:
         logger.error("Prediction requested but model/label encoder not loaded")
         return jsonify({'error': 'Model not loaded. Please train the model first.'}), 500
     
@@ -236,75 +262,25 @@ def predict():
         if y_true is not None:
             logger.info(f"Ground truth labels provided: {len(y_true)} rows")
         
-        # Align features to training order using metadata, if available
-        metadata_path = MODEL_DIR / "model_metadata.json"
-        if not metadata_path.exists():
-            metadata_path = BASE_DIR / "artifacts" / "model_metadata.json"
-        if metadata_path.exists():
-            import json as json_lib
-            with open(metadata_path, 'r') as f:
-                metadata = json_lib.load(f)
-            training_features = metadata.get('feature_names', [])
-            if training_features:
-                missing = set(training_features) - set(X.columns)
-                for col in missing:
-                    X[col] = 0
-                X = X[training_features]
-                if missing:
-                    logger.warning(f"Added {len(missing)} missing features with zeros: {list(missing)[:10]}{'...' if len(missing)>10 else ''}")
-        # Get selected features if available (from feature selection step)
-        # For now, use all features that match training features
-        if hasattr(model, 'named_steps'):
-            # Pipeline model - extract feature names if available
-            try:
-                X_features = X.columns.tolist()
-                logger.debug(f"Pipeline detected. Features passed: {len(X_features)}")
-                # If model was trained with selected features, we need to match them
-                # This is a simplified version - in production, save feature names
-                predictions = model.predict(X)
-            except Exception as e:
-                logger.exception(f"Feature mismatch when predicting: {e}")
-                return jsonify({'error': f'Feature mismatch: {str(e)}'}), 400
-        else:
-            predictions = model.predict(X)
-
-        # Try probabilities if available
-        proba_info = None
+        # Align features to training order (cached column plan) and score with one probability pass
+        _, missing = current.column_plan(X.columns)
+        if missing:
+            logger.warning(f"Added {len(missing)} missing features with zeros: {missing[:10]}{'...' if len(missing)>10 else ''}")
         try:
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(X)
-                # capture first row and class order
-                class_order = getattr(model, 'classes_', None)
-                proba_info = {
-                    'class_order': class_order.tolist() if class_order is not None else label_encoder.classes_.tolist(),
-                    'first_row': proba[0].tolist() if len(proba) > 0 else []
-                }
+            label_idx, _, proba = current.score(X)
         except Exception as e:
-            logger.debug(f"predict_proba not available or failed: {e}")
-        
-        # Decode predictions
-        # Robust decoding:
-        # - If predictions are integer class indices, decode with label_encoder
-        # - If predictions are already strings, use them directly
-        try:
-            preds_np = np.asarray(predictions)
-            if np.issubdtype(preds_np.dtype, np.integer):
-                predicted_labels = label_encoder.inverse_transform(preds_np)
-            else:
-                predicted_labels = preds_np
-        except Exception as e:
-            logger.warning(f"Failed to decode predictions; attempting fallback via label_encoder: {e}")
-        predicted_labels = label_encoder.inverse_transform(predictions)
+            logger.exception(f"Feature mismatch when predicting: {e}")
+            return jsonify({'error': f'Feature mismatch: {str(e)}'}), 400
+        predicted_labels = current.classes[label_idx]
         
         # Count predictions
         prediction_counts = pd.Series(predicted_labels).value_counts().to_dict()
         logger.info(f"Predictions done: total={len(predicted_labels)}, counts={prediction_counts}")
-        if proba_info:
-            logger.debug(f"Class order: {proba_info['class_order']}")
-            logger.debug(f"First row probabilities: {proba_info['first_row']}")
+        logger.debug(f"Class order: {np.asarray(getattr(current.model, 'classes_', current.classes)).tolist()}")
+        logger.debug(f"First row probabilities: {proba[0].tolist() if len(proba) > 0 else []}")
         
         # Calculate statistics
-        total_samples = len(predictions)
+        total_samples = len(predicted_labels)
         benign_count = prediction_counts.get('Benign', 0)
         attack_count = total_samples - benign_count
         attack_percentage = (attack_count / total_samples * 100) if total_samples > 0 else 0
@@ -313,8 +289,8 @@ def predict():
         accuracy = None
         if y_true is not None:
             try:
-                y_true_encoded = label_encoder.transform(y_true)
-                accuracy = (predictions == y_true_encoded).mean()
+                y_true_encoded = current.label_encoder.transform(y_true)
+                accuracy = (label_idx == y_true_encoded).mean()
                 logger.info(f"Computed on-file accuracy: {accuracy:.4f}")
             except Exception as e:
                 logger.debug(f"Could not compute accuracy vs provided labels: {e}")
@@ -330,7 +306,7 @@ def predict():
                 'attack_percentage': round(attack_percentage, 2),
                 'accuracy': round(accuracy, 4) if accuracy is not None else None
             },
-            'classes': label_encoder.classes_.tolist()
+            'classes': current.label_encoder.classes_.tolist()
         })
     
     except Exception as e:
@@ -348,7 +324,9 @@ def predict_batch():
         return '', 200
     
     # Only check model after confirming it's not an OPTIONS request
-    if model is None or label_encoder is None:
+    # (one engine for the whole request, even if a reload swaps the model meanwhile)
+    current = engine
+    if current is None:
         logger.error("Batch prediction requested but model/label encoder not loaded")
         return jsonify({'error': 'Model not loaded'}), 500
     
@@ -383,53 +361,30 @@ def predict_batch():
         logger.debug(f"Batch numeric feature columns ({len(X.columns)}): {X.columns[:15].tolist()}{'...' if len(X.columns)>15 else ''}")
         
         # Ensure feature order matches training (important for manual input)
-        # Get feature names from metadata if available
-        metadata_path = MODEL_DIR / "model_metadata.json"
-        if not metadata_path.exists():
-            # Fallback to artifacts directory
-            metadata_path = BASE_DIR / "artifacts" / "model_metadata.json"
-        if metadata_path.exists():
-            import json as json_lib
-            with open(metadata_path, 'r') as f:
-                metadata = json_lib.load(f)
-            training_features = metadata.get('feature_names', [])
-            
-            # Reorder columns to match training order
-            if training_features:
-                # Add missing columns with zeros
-                missing = set(training_features) - set(X.columns)
-                for col in missing:
-                    X[col] = 0
-                # Reorder and select only training features
-                X = X[training_features]
-                if missing:
-                    logger.warning(f"Added {len(missing)} missing features with zeros: {list(missing)[:10]}{'...' if len(missing)>10 else ''}")
-                extra = set(X.columns) - set(training_features)
-                if extra:
-                    logger.info(f"Extra features ignored (after reordering handled via selection): {list(extra)[:10]}{'...' if len(extra)>10 else ''}")
+        _, missing = current.column_plan(X.columns)
+        if missing:
+            logger.warning(f"Added {len(missing)} missing features with zeros: {missing[:10]}{'...' if len(missing)>10 else ''}")
+        extra = set(X.columns) - set(current.feature_names) if current.feature_names else set()
+        if extra:
+            logger.info(f"Extra features ignored (after reordering handled via selection): {list(extra)[:10]}{'...' if len(extra)>10 else ''}")
         
-        predictions = model.predict(X)
-        predicted_labels = label_encoder.inverse_transform(predictions)
+        label_idx, _, proba = current.score(X)
+        predicted_labels = current.classes[label_idx]
         counts = pd.Series(predicted_labels).value_counts().to_dict()
         logger.info(f"Batch predictions done: total={len(predicted_labels)}, counts={counts}")
 
         # Optional debug info for very small batches (first row proba)
         debug_info = None
-        try:
-            if len(X) > 0 and hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(X)
-                class_order = getattr(model, 'classes_', None)
-                debug_info = {
-                    'class_order': class_order.tolist() if class_order is not None else label_encoder.classes_.tolist(),
-                    'first_row_proba': proba[0].tolist() if len(proba) > 0 else []
-                }
-        except Exception as e:
-            logger.debug(f"predict_proba debug in batch failed: {e}")
+        if len(proba) > 0:
+            debug_info = {
+                'class_order': np.asarray(getattr(current.model, 'classes_', current.classes)).tolist(),
+                'first_row_proba': proba[0].tolist()
+            }
 
         response = {
             'success': True,
             'predictions': predicted_labels.tolist(),
-            'classes': label_encoder.classes_.tolist()
+            'classes': current.label_encoder.classes_.tolist()
         }
         if debug_info and len(X) <= 5:
             response['debug'] = debug_info
@@ -445,7 +400,8 @@ def get_metadata():
     """Return model metadata including feature names"""
     # Flask-CORS handles OPTIONS automatically, no manual handling needed
     
-    if model is None or label_encoder is None:
+    current = engine
+    if current is None:
         return jsonify({'error': 'Model not loaded'}), 500
     
     try:
@@ -472,8 +428,8 @@ def get_metadata():
                 'success': True,
                 'feature_names': [],
                 'num_features': 0,
-                'num_classes': len(label_encoder.classes_),
-                'classes': label_encoder.classes_.tolist(),
+                'num_classes': len(current.label_encoder.classes_),
+                'classes': current.label_encoder.classes_.tolist(),
             })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -481,24 +437,77 @@ def get_metadata():
 
 @app.route('/api/latest-alerts', methods=['GET', 'OPTIONS'])
 def get_latest_alerts():
-    """Return the latest IDS alerts from the log file"""
+    """
+    Return the latest IDS alerts (from the sniffer's shared-memory ring, else the log file).
+    
+    Every alert has an increasing "id" and the response's "last_id" is the
+    newest. ?since=<id> returns only newer alerts ("truncated" if more than n
+    arrived; "reset" with the latest n if the id is from a log that is gone).
+    ETag and Last-Modified name the newest alert, so a conditional request
+    is answered 304 from the id counter without reading any alerts.
+    """
     try:
-        from live_ids.logger import read_latest_alerts
+        from live_ids.logger import alert_id_of, latest_alert_id, read_alert_lines_since, read_latest_alert_lines
         
         # Get number of alerts from query parameter (default 50)
         n = request.args.get('n', 50, type=int)
-        alerts = read_latest_alerts(n)
+        since = request.args.get('since', type=int)
         
-        return jsonify({
-            'success': True,
-            'alerts': alerts,
-            'count': len(alerts)
-        })
+        last_id, written_ns = latest_alert_id()
+        response = app.response_class(mimetype='application/json')
+        response.set_etag(f"{last_id}-{written_ns:x}")
+        # Whole seconds only: not until the second is over, or a later alert in it would look unmodified
+        if written_ns and written_ns // 10**9 < int(time.time()):
+            response.last_modified = written_ns // 10**9
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+        
+        truncated = reset = False
+        if since is None or since > last_id:
+            reset = since is not None
+            lines = read_latest_alert_lines(n)
+        elif since == last_id:
+            lines = []
+        else:
+            lines, truncated = read_alert_lines_since(since, n)
+        if lines:
+            last_id = max(last_id, alert_id_of(lines[-1]) or 0)
+        
+        # The alerts are already JSON: splice them in rather than parse and re-encode them
+        body = b'{"success": true, "alerts": [' + b",".join(lines) + b'], "count": %d, "last_id": %d' % (
+            len(lines), last_id)
+        if since is not None:
+            body += b', "truncated": %s, "reset": %s' % (b"true" if truncated else b"false",
+                                                         b"true" if reset else b"false")
+        response.set_data(body + b"}")
+        return response
     except Exception as e:
         logger.exception(f"Error reading alerts: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/alerts/stream', methods=['GET'])
+def stream_alerts():
+    """
+    Push new IDS alerts as Server-Sent Events (event "alert", data = the alert JSON).
+    
+    ?backlog=N sends the last N alerts first. A reconnecting browser sends
+    Last-Event-ID and gets the alerts it missed, or a "reset" event and a
+    fresh backlog if they are no longer available.
+    """
+    from live_ids.alert_stream import get_broadcaster
+    
+    broadcaster = get_broadcaster()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    sub, initial = broadcaster.subscribe(last_event_id, request.args.get('backlog', 0, type=int))
+    if sub is None:
+        return jsonify({'error': 'Too many alert streams'}), 503
+    return Response(broadcaster.stream(sub, initial), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5050, host='localhost')
 
@@ -0,0 +1,225 @@
+# backend/live_ids/alert_ring.py
+
+"""
+Recent alerts in shared memory, for the Flask API.
+
+The sniffer creates the ring and its AlertWriter publishes every batch of
+alert lines it writes to the log; API processes attach to the ring by name
+and copy the newest alerts out of it instead of reading the log file.
+
+Layout: a header (magic, slot count, slot size, owner pid, head = number of
+alerts ever published, creation time) followed by fixed-size slots, each
+holding one JSON line with its sequence number and length. Writers (the
+sniffer, or one per shard) flock the shared memory segment itself per
+batch, so no lock file is left behind. Readers take no lock: a slot is only
+used if its sequence number is the expected one both before and after the
+copy, so a slot overwritten mid-read is detected and the read falls back to
+the file. When created, the ring is filled with the tail of the existing log,
+so it always holds the same newest alerts the file does.
+"""
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single writer process only
+    fcntl = None
+
+# Shared memory name; the API attaches to the same one
+ALERT_RING_NAME = os.environ.get("ALERT_RING_NAME", "live_ids_alerts")
+RING_SLOTS = 4096  # newest alerts kept in memory
+SLOT_BYTES = 4096  # per alert, header included; larger alerts are only in the file
+
+_MAGIC = 0x49445352  # "IDSR"
+_HEADER = struct.Struct("<IIIIqqq")  # magic, version, slots, slot bytes, owner pid, head, created (ns)
+_HEADER_BYTES = 64
+_SLOT_HEADER = struct.Struct("<qI")  # sequence number + 1 (0 = being written), line length
+_PID_OFFSET = 16
+_HEAD_OFFSET = 24
+
+# Rings created by this process: attaching to one of them must not untrack it
+_created = set()
+
+
+def _attach(name):
+    """Attach to an existing segment without letting this process's resource tracker unlink it at exit"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if name in _created:
+        return shm
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AlertRing:
+    """Fixed-slot ring of JSON alert lines in a named shared memory segment"""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self.owner = owner
+        self.name = shm.name.lstrip("/")
+        magic, _, self.slots, self.slot_bytes, self.pid, _, created = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"shared memory {self.name!r} is not an alert ring")
+        # Sequence numbers restart with every ring: (epoch, sequence) identifies an alert
+        self.epoch = format(created // 1000, "x")
+        self.published = 0
+        self.oversize = 0
+
+    @classmethod
+    def create(cls, name=ALERT_RING_NAME, slots=RING_SLOTS, slot_bytes=SLOT_BYTES, preload=()):
+        """
+        Create the ring, replacing one left by a sniffer that did not exit cleanly.
+
+        Args:
+            preload: Existing alert lines (bytes, oldest first) to start with
+
+        Raises:
+            FileExistsError: another running sniffer owns a ring of this name
+        """
+        size = _HEADER_BYTES + slots * slot_bytes
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = cls.attach(name)
+            if stale is not None and stale.pid != os.getpid() and stale.alive():
+                stale._shm.close()
+                raise FileExistsError(f"alert ring {name!r} is in use by process {stale.pid}") from None
+            stale = stale._shm if stale is not None else _attach(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _created.add(name)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, 1, slots, slot_bytes, os.getpid(), 0, time.time_ns())
+        ring = cls(shm, owner=True)
+        ring.publish(list(preload)[-slots:])
+        ring.published = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name=ALERT_RING_NAME):
+        """Attach to a running sniffer's ring; None if there is none"""
+        try:
+            shm = _attach(name)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        try:
+            return cls(shm, owner=False)
+        except (ValueError, struct.error):
+            shm.close()
+            return None
+
+    def alive(self):
+        """False once the sniffer that created the ring has closed it or exited"""
+        pid = struct.unpack_from("<q", self._buf, _PID_OFFSET)[0]
+        return pid != 0 and _pid_alive(pid)
+
+    @property
+    def head(self):
+        return struct.unpack_from("<q", self._buf, _HEAD_OFFSET)[0]
+
+    def publish(self, lines):
+        """Append alert lines (bytes, JSON without the newline)"""
+        if not lines:
+            return
+        # Each attachment has its own descriptor of the segment, so flock serializes processes
+        lock = self._shm._fd if fcntl is not None else None
+        try:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            buf, capacity = self._buf, self.slot_bytes - _SLOT_HEADER.size
+            head = self.head
+            for line in lines:
+                offset = _HEADER_BYTES + (head % self.slots) * self.slot_bytes
+                _SLOT_HEADER.pack_into(buf, offset, 0, 0)
+                if len(line) <= capacity:
+                    buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + len(line)] = line
+                else:
+                    self.oversize += 1
+                # Length beyond capacity: readers take this alert from the file
+                _SLOT_HEADER.pack_into(buf, offset, head + 1, len(line))
+                head += 1
+            struct.pack_into("<q", buf, _HEAD_OFFSET, head)
+            self.published += len(lines)
+        finally:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def latest(self, n):
+        """
+        The newest n alert lines (bytes, oldest first), or None if the ring
+        cannot answer (n larger than the ring, or an alert overwritten during
+        the copy or too large for its slot) and the file must be read.
+        """
+        if n > self.slots:
+            return None
+        head = self.head
+        return self.read_range(max(0, head - n), head)
+
+    def read_range(self, start, stop):
+        """Alert lines with sequence numbers start..stop-1, or None as for latest()"""
+        entries = self.read_entries(start, stop)
+        if len(entries) < stop - start or any(line is None for line, _ in entries):
+            return None
+        return [line for line, _ in entries]
+
+    def read_entries(self, start, stop):
+        """
+        (line, length) for sequence numbers start..stop-1, stopping at the
+        first slot overwritten before or during the copy. line is None for an
+        alert too large for its slot: it is only in the file, length long.
+        """
+        buf, capacity = self._buf, self.slot_bytes - _SLOT_HEADER.size
+        entries = []
+        for seq in range(start, stop):
+            offset = _HEADER_BYTES + (seq % self.slots) * self.slot_bytes
+            tag, length = _SLOT_HEADER.unpack_from(buf, offset)
+            if tag != seq + 1:
+                break
+            if length > capacity:
+                entries.append((None, length))
+                continue
+            line = bytes(buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + length])
+            if _SLOT_HEADER.unpack_from(buf, offset)[0] != tag:
+                break
+            entries.append((line, length))
+        return entries
+
+    def stats(self):
+        return {"name": self.name, "slots": self.slots, "head": self.head,
+                "published": self.published, "oversize": self.oversize, "owner": self.owner}
+
+    def close(self):
+        """Detach; the owner also marks the ring closed for attached readers and removes it"""
+        # A forked shard inherits its parent's ring object but does not own the segment
+        owner = self.owner and self.pid == os.getpid()
+        if owner:
+            struct.pack_into("<q", self._buf, _PID_OFFSET, 0)
+        self._buf = None
+        self._shm.close()
+        if owner:
+            _created.discard(self.name)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
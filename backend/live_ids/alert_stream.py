@@ -0,0 +1,381 @@
+# backend/live_ids/alert_stream.py
+
+"""
+Server-Sent Events feed of new alerts for the dashboard.
+
+One AlertBroadcaster per API process watches for new alerts: in the
+sniffer's shared-memory ring while the sniffer runs (see alert_ring), else
+by tailing the log file. Each new alert is formatted as an SSE event once
+and the same bytes are pushed to every subscriber's buffer, so the cost of
+an alert does not depend on how many dashboards are open.
+
+Event ids are "<epoch>-<position>": the ring's sequence number (or the byte
+offset in the log file) after the alert, and an epoch naming the ring (or
+file) it came from. A client reconnecting with Last-Event-ID gets the
+alerts it missed if they are still available; otherwise it gets a "reset"
+event followed by a fresh backlog. A client whose buffer fills up (it reads
+slower than alerts arrive) is sent an "overflow" event and disconnected;
+the browser reconnects and resumes from its last id. Idle streams get a
+comment line every heartbeat so proxies keep them open.
+
+An alert too large for its ring slot is taken from the log file (the line
+of that length with the id following its predecessor's), so one oversize
+alert does not hold up the stream.
+"""
+
+import os
+import threading
+import time
+
+try:
+    from live_ids.alert_ring import AlertRing
+    from live_ids.log_segments import alert_id_of, tail_file, tail_lines
+except ImportError:
+    from backend.live_ids.alert_ring import AlertRing
+    from backend.live_ids.log_segments import alert_id_of, tail_file, tail_lines
+
+POLL_INTERVAL = 0.05  # seconds between checks for new alerts
+HEARTBEAT = 15.0  # seconds of silence before a keep-alive comment
+CLIENT_BUFFER = 1000  # alerts waiting for one client before it is disconnected (it resumes)
+MAX_CLIENTS = 1000  # concurrent streams per API process
+MAX_BACKLOG = 1000  # alerts a new stream may ask for
+RETRY_MS = 2000  # reconnect delay the browser is told to use
+RING_RETRY = 1.0  # seconds between attempts to attach to the sniffer's ring
+OVERSIZE_SEARCH = 1024  # log lines searched beyond the ring for an alert too large for its slot
+
+_RESET = b"event: reset\ndata: {}\n\n"
+_OVERFLOW = b"event: overflow\ndata: {}\n\n"
+_HEARTBEAT = b": heartbeat\n\n"
+
+
+def format_event(event_id, line):
+    """One SSE alert event for a JSON alert line (bytes)"""
+    return b"id: " + event_id.encode() + b"\nevent: alert\ndata: " + line + b"\n\n"
+
+
+class Subscriber:
+    """One client's bounded buffer of formatted events"""
+
+    def __init__(self, maxsize=CLIENT_BUFFER):
+        self.maxsize = maxsize
+        self.overflowed = False
+        self.closed = False
+        self._cond = threading.Condition()
+        self._chunks = []
+        self._pending = 0
+
+    def push(self, chunk, count):
+        with self._cond:
+            if self.overflowed or self.closed:
+                return
+            if self._pending + count > self.maxsize:
+                self.overflowed = True
+                self._chunks, self._pending = [], 0
+            else:
+                self._chunks.append(chunk)
+                self._pending += count
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def get(self, timeout):
+        """Events queued so far (b"" if none arrived within timeout)"""
+        with self._cond:
+            if not self._chunks and not self.overflowed and not self.closed:
+                self._cond.wait(timeout)
+            chunks, self._chunks, self._pending = self._chunks, [], 0
+        return b"".join(chunks)
+
+
+class AlertBroadcaster:
+    """Fans new alerts out to SSE subscribers from one polling thread"""
+
+    def __init__(self, log_file, ring_name, poll_interval=POLL_INTERVAL, client_buffer=CLIENT_BUFFER,
+                 max_clients=MAX_CLIENTS):
+        self.log_file = log_file
+        self.ring_name = ring_name
+        self.poll_interval = poll_interval
+        self.client_buffer = client_buffer
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+
+        # Where new alerts come from, and the last position broadcast
+        self._ring = None
+        self._ring_checked = None
+        self._file = None
+        self._partial = b""
+        self._generation = 0
+        self.source = None
+        self.epoch = None
+        self.position = 0
+
+        self.alerts = 0
+        self.oversize = 0
+        self.connects = 0
+        self.overflows = 0
+        self.max_clients_seen = 0
+
+    # Sources
+
+    def _use_ring(self, ring):
+        self._close_file()
+        self._ring, self.source, self.epoch, self.position = ring, "ring", ring.epoch, ring.head
+
+    def _use_file(self, start_at_end=True):
+        self._close_file()
+        self._ring, self.source = None, "file"
+        try:
+            self._file = open(self.log_file, "rb")
+        except FileNotFoundError:
+            self.epoch, self.position = None, 0
+            return
+        st = os.fstat(self._file.fileno())
+        self._generation += 1
+        self.epoch = f"f{st.st_ino:x}.{self._generation}"
+        self.position = self._file.seek(0, os.SEEK_END) if start_at_end else 0
+        self._partial = b""
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _refresh_source(self):
+        """Follow the sniffer's ring while it runs, the log file otherwise"""
+        if self._ring is not None:
+            if self._ring.alive():
+                return
+            self._use_file()
+        now = time.monotonic()
+        if self._ring_checked is None or now - self._ring_checked >= RING_RETRY:
+            self._ring_checked = now
+            ring = AlertRing.attach(self.ring_name)
+            if ring is not None and ring.alive():
+                self._use_ring(ring)
+                return
+        if self.source != "file":
+            self._use_file()
+
+    # Reading new alerts
+
+    def _read_ring(self, start, stop):
+        """
+        Events for ring sequence numbers start..stop-1, and the position
+        reached: short of stop at a slot overwritten during the copy (read
+        again from there next time).
+        """
+        ring = self._ring
+        entries = ring.read_entries(start, stop)
+        events = []
+        previous_id = None
+        for i, (line, length) in enumerate(entries):
+            if line is None:
+                if previous_id is not None:
+                    expected = previous_id + 1
+                else:
+                    following = next((alert_id_of(l) for l, _ in entries[i + 1:] if l is not None), None)
+                    expected = following - 1 if following is not None else None
+                line = self._oversize_from_log(length, expected, ring.head - (start + i))
+                if line is None:
+                    continue  # no longer in the log either
+                self.oversize += 1
+            previous_id = alert_id_of(line)
+            events.append((f"{self.epoch}-{start + i + 1}", line))
+        return events, start + len(entries)
+
+    def _oversize_from_log(self, length, expected_id, newer):
+        """The newest log line of this length (with this id, if known); newer = ring alerts since it"""
+        for line in reversed(tail_lines(self.log_file, newer + OVERSIZE_SEARCH)):
+            if len(line) == length and (expected_id is None or alert_id_of(line) == expected_id):
+                return line
+        return None
+
+    def _new_from_ring(self):
+        ring = self._ring
+        head = ring.head
+        start = max(self.position, head - ring.slots)
+        if head <= start:
+            return []
+        events, self.position = self._read_ring(start, head)
+        return events
+
+    def _new_from_file(self):
+        events = []
+        if self._file is not None:
+            data = self._partial + self._file.read()
+            lines = data.split(b"\n")
+            self._partial = lines.pop()
+            for line in lines:
+                self.position += len(line) + 1
+                if line:
+                    events.append((f"{self.epoch}-{self.position}", line))
+        # Rotated, truncated or created since it was opened: follow the new file from its start
+        try:
+            st = os.stat(self.log_file)
+        except FileNotFoundError:
+            return events
+        if (self._file is None or st.st_ino != os.fstat(self._file.fileno()).st_ino
+                or st.st_size < self.position + len(self._partial)):
+            self._use_file(start_at_end=False)
+        return events
+
+    def _poll(self):
+        with self._lock:
+            self._refresh_source()
+            events = self._new_from_ring() if self.source == "ring" else self._new_from_file()
+            if not events:
+                return 0
+            chunk = b"".join(format_event(event_id, line) for event_id, line in events)
+            for sub in self._subscribers:
+                sub.push(chunk, len(events))
+            self.alerts += len(events)
+        return len(events)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    # Idle: drop the source; the next subscriber picks it again
+                    self._thread = None
+                    self._close_file()
+                    self._ring = self._ring_checked = self.source = None
+                    return
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"⚠️  Alert stream error: {e}")
+            time.sleep(self.poll_interval)
+
+    # Backfill for new and reconnecting clients
+
+    def _since(self, event_id):
+        """Events after event_id up to the current position, None if they are no longer available"""
+        epoch, _, position = (event_id or "").rpartition("-")
+        if epoch != self.epoch or not position.isdigit() or int(position) > self.position:
+            return None
+        position = int(position)
+        if self.source == "ring":
+            if self.position - position > self.client_buffer:
+                return None
+            events, reached = self._read_ring(position, self.position)
+            return events if reached == self.position else None
+        if self.position - position > self.client_buffer * 4096:
+            return None
+        with open(self.log_file, "rb") as f:
+            f.seek(position)
+            data = f.read(self.position - position)
+        events = []
+        for line in data.split(b"\n")[:-1]:
+            position += len(line) + 1
+            if line:
+                events.append((f"{self.epoch}-{position}", line))
+        return events if len(events) <= self.client_buffer else None
+
+    def _backlog(self, n):
+        """The last n events up to the current position"""
+        if n <= 0 or self.epoch is None:
+            return []
+        if self.source == "ring":
+            start = max(0, self.position - n, self._ring.head - self._ring.slots)
+            return self._read_ring(start, self.position)[0]
+        lines = tail_file(self.log_file, n, end=self.position)
+        events, position = [], self.position
+        for line in reversed(lines):
+            events.append((f"{self.epoch}-{position}", line))
+            position -= len(line) + 1
+        return [event for event in reversed(events) if event[1]]
+
+    # Subscriptions
+
+    def subscribe(self, last_event_id=None, backlog=0):
+        """
+        Register a client.
+
+        Args:
+            last_event_id: The browser's Last-Event-ID when reconnecting
+            backlog: Recent alerts to send first to a new client (or after a reset)
+
+        Returns:
+            (Subscriber, initial bytes to send), or (None, None) when at max_clients
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None, None
+            self._refresh_source()
+            initial = b"retry: %d\n\n" % RETRY_MS
+            missed = self._since(last_event_id) if last_event_id else None
+            if missed is None:
+                if last_event_id:
+                    initial += _RESET
+                missed = self._backlog(min(backlog, MAX_BACKLOG))
+            initial += b"".join(format_event(event_id, line) for event_id, line in missed)
+
+            sub = Subscriber(self.client_buffer)
+            self._subscribers.add(sub)
+            self.connects += 1
+            self.max_clients_seen = max(self.max_clients_seen, len(self._subscribers))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-stream", daemon=True)
+                self._thread.start()
+        return sub, initial
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+            if sub.overflowed:
+                self.overflows += 1
+        sub.close()
+
+    def stream(self, sub, initial, heartbeat=HEARTBEAT):
+        """The response body for one client: initial events, then new alerts as they arrive"""
+        try:
+            yield initial
+            while not sub.closed:
+                chunk = sub.get(heartbeat)
+                if sub.overflowed:
+                    yield _OVERFLOW
+                    return
+                yield chunk or _HEARTBEAT
+        finally:
+            self.unsubscribe(sub)
+
+    def close(self):
+        """Disconnect every client"""
+        with self._lock:
+            subscribers, self._subscribers = list(self._subscribers), set()
+        for sub in subscribers:
+            sub.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "max_clients": self.max_clients_seen,
+                "connects": self.connects,
+                "overflows": self.overflows,
+                "alerts": self.alerts,
+                "oversize": self.oversize,
+                "source": self.source,
+            }
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """This process's broadcaster for the alert log and ring configured in logger"""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            try:
+                from live_ids import logger
+            except ImportError:
+                from backend.live_ids import logger
+            _broadcaster = AlertBroadcaster(logger.LOG_FILE, logger.ALERT_RING_NAME)
+        return _broadcaster
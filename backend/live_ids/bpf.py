@@ -0,0 +1,91 @@
+# backend/live_ids/bpf.py
+
+"""
+Kernel-side capture filter built from the sniffer's flow filters.
+
+build_bpf_filter() turns the target IP/networks, SUSPECT_PORTS, the UDP/443 (QUIC) rule,
+the whitelisted ports and the 10/8 LAN rule into a tcpdump/BPF expression.
+Passed to scapy's sniff(filter=...) or attached to the AF_PACKET socket,
+packets that could never be scored are dropped in the kernel instead of
+being copied to userspace, dissected and stored in the flow table. The
+Python filters in packet_sniffer still run on every ended flow; the kernel
+filter only has to never drop a packet they would keep.
+
+Compiling an expression needs libpcap (via scapy).
+"""
+
+try:
+    from live_ids.ip_matcher import parse_network
+except ImportError:
+    from backend.live_ids.ip_matcher import parse_network
+
+
+def _any_port(qualifier, ports):
+    return "(" + " or ".join(f"{qualifier}port {p}" for p in sorted(ports)) + ")"
+
+
+def _target_clause(networks):
+    """host/net clause for the monitored addresses, validated so no text is passed through"""
+    terms = []
+    for network in networks:
+        network = network.strip()
+        parse_network(network)  # ValueError for anything that is not an IPv4 address / CIDR
+        terms.append(f"net {network}" if "/" in network else f"host {network}")
+    return terms[0] if len(terms) == 1 else "(" + " or ".join(terms) + ")"
+
+
+def build_bpf_filter(target_ip=None, suspect_ports=None, whitelist_ports=None,
+                     drop_quic=True, drop_private_lan=True, target_networks=None):
+    """
+    BPF expression matching only packets of flows the sniffer may score.
+
+    Args:
+        target_ip: Only packets to/from this IPv4 address (None = any host)
+        suspect_ports: Destination ports that are scored (None = any port)
+        whitelist_ports: Ports whose flows are always Benign (either direction)
+        drop_quic: Drop UDP to port 443
+        drop_private_lan: Drop 10.0.0.0/8 <-> 10.0.0.0/8 traffic
+        target_networks: CIDRs / addresses to monitor (overrides target_ip)
+
+    Returns:
+        str, e.g. "ip and (tcp or udp) and host 10.7.19.211 and (dst port 80 ...) and ..."
+    """
+    clauses = ["ip", "(tcp or udp)"]
+    targets = target_networks or ([target_ip] if target_ip else [])
+    if targets:
+        clauses.append(_target_clause(targets))
+    if suspect_ports:
+        clauses.append(_any_port("dst ", suspect_ports))
+    if drop_quic:
+        clauses.append("not (udp and dst port 443)")
+    if whitelist_ports:
+        clauses.append(f"not {_any_port('', whitelist_ports)}")
+    if drop_private_lan:
+        clauses.append("not (src net 10.0.0.0/8 and dst net 10.0.0.0/8)")
+    return " and ".join(clauses)
+
+
+def check_bpf_filter(expression, interface=None):
+    """
+    Compile the expression once to see whether it can be used here.
+
+    Returns:
+        (ok: bool, error message or None) - fails without libpcap, or for
+        an invalid expression / unknown interface
+    """
+    try:
+        from scapy.arch.common import compile_filter
+        from scapy.arch.common import free_filter
+
+        bpf = compile_filter(expression, interface)
+        free_filter(bpf)
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+
+def attach_bpf_filter(sock, expression, interface=None):
+    """Compile and attach the expression to a raw socket (SO_ATTACH_FILTER)"""
+    from scapy.arch.linux import attach_filter
+
+    attach_filter(sock, expression, interface)
@@ -0,0 +1,130 @@
+# backend/live_ids/expiry_scheduler.py
+
+import threading
+import time
+from collections import deque
+
+try:
+    from live_ids.flow_manager import flow_last_seen
+except ImportError:
+    from backend.live_ids.flow_manager import flow_last_seen
+
+EXPIRY_INTERVAL = 1.0  # seconds between expiry sweeps
+REPORT_INTERVAL = 60.0  # seconds between lateness reports
+LATENESS_SAMPLES = 1024  # recent samples kept for percentiles
+
+
+class ExpiryScheduler(threading.Thread):
+    """
+    Sweep a FlowManager on a fixed cadence and hand ended flows to a handler.
+
+    Flows expire on time even when no packets arrive, and the expiry and
+    scoring work runs on this thread instead of the capture callback.
+    Lateness is how long after its deadline (last packet + flow timeout)
+    each idle-expired flow finished scoring. Flows that end before their
+    deadline (evicted from a full table, or exported at the active timeout)
+    are counted separately, not as zero lateness.
+
+    With deferred=True the handler only queues the flow (ScoringPipeline)
+    and the scoring side calls record_scored() once it is done, so queueing
+    and inference delay are part of the lateness.
+    """
+
+    def __init__(self, flow_manager, handler, interval=EXPIRY_INTERVAL,
+                 report_interval=REPORT_INTERVAL, deferred=False):
+        super().__init__(name="flow-expiry", daemon=True)
+        self.flow_manager = flow_manager
+        self.handler = handler
+        self.interval = interval
+        self.report_interval = report_interval
+        self.deferred = deferred
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # Deadlines of handed-off flows not scored yet, by id(flow) (deferred mode)
+        self._deadlines = {}
+
+        self.flows_early = 0
+        self.flows_scored = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self._recent = deque(maxlen=LATENESS_SAMPLES)
+
+    def run(self):
+        last_report = time.time()
+        while not self._stop_event.wait(self.interval):
+            self.sweep()
+            if self.report_interval and time.time() - last_report >= self.report_interval:
+                self.print_report()
+                last_report = time.time()
+
+    def sweep(self, now=None):
+        """Expire and score every flow past its deadline. Returns the count."""
+        swept = time.time() if now is None else now
+        ended = self.flow_manager.end_expired_flows(now)
+        for key, flow in ended:
+            deadline = flow_last_seen(flow) + self.flow_manager.timeout
+            if deadline > swept:
+                # Evicted or exported while still active: it has no idle deadline to be late for
+                with self._lock:
+                    self.flows_early += 1
+                self.handler(key, flow)
+            elif self.deferred:
+                with self._lock:
+                    self._deadlines[id(flow)] = deadline
+                if self.handler(key, flow) is False:
+                    # Dropped by the pipeline: it will never be scored
+                    with self._lock:
+                        self._deadlines.pop(id(flow), None)
+            else:
+                try:
+                    self.handler(key, flow)
+                finally:
+                    self._record(time.time() - deadline)
+        return len(ended)
+
+    def record_scored(self, batch):
+        """Record lateness for a scored batch of (key, flow, now) handed off by sweep() (deferred mode)"""
+        done = time.time()
+        with self._lock:
+            deadlines = [self._deadlines.pop(id(flow), None) for _, flow, _ in batch]
+        for deadline in deadlines:
+            if deadline is not None:
+                self._record(done - deadline)
+
+    def stop(self, flush=True):
+        """Stop the sweep loop; optionally run one final sweep."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        if flush:
+            self.sweep()
+
+    def _record(self, lateness):
+        lateness = max(lateness, 0.0)
+        with self._lock:
+            self.flows_scored += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            self._recent.append(lateness)
+
+    def report(self):
+        """Lateness of idle-expired flows relative to FLOW_TIMEOUT, in seconds."""
+        with self._lock:
+            recent = sorted(self._recent)
+        return {
+            "flows_scored": self.flows_scored,
+            "flows_early": self.flows_early,
+            "mean_lateness": self.total_lateness / self.flows_scored if self.flows_scored else 0.0,
+            "p50_lateness": recent[len(recent) // 2] if recent else 0.0,
+            "p95_lateness": recent[int(len(recent) * 0.95)] if recent else 0.0,
+            "max_lateness": self.max_lateness,
+            "flow_timeout": self.flow_manager.timeout,
+            "interval": self.interval,
+        }
+
+    def print_report(self):
+        r = self.report()
+        print(f"⏱️  Expiry: {r['flows_scored']} flows scored, lateness after "
+              f"{r['flow_timeout']}s timeout: mean={r['mean_lateness']:.3f}s "
+              f"p95={r['p95_lateness']:.3f}s max={r['max_lateness']:.3f}s; "
+              f"{r['flows_early']} evicted/exported before their deadline (not counted)")
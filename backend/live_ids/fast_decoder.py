@@ -0,0 +1,144 @@
+# backend/live_ids/fast_decoder.py
+
+"""
+Scapy-free capture path.
+
+Decodes just the Ethernet/IPv4/TCP/UDP header fields the flow table needs
+with struct, straight from raw frame bytes. Sources yield
+(flow_key, length, timestamp, tcp_flags) records; flow_key is the packed
+integer key (see flow_key.py), matches FlowManager.get_flow_key() for the
+same packet and is None for frames that are not IPv4 TCP/UDP.
+"""
+
+import socket
+import struct
+import time
+
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+
+# pcap link-layer header types
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+SNAPLEN = 65535
+
+_u16 = struct.Struct("!H")
+_addrs = struct.Struct("!Q")  # source and destination address, read as one int
+_ports = struct.Struct("!HH")
+
+
+def decode_frame(frame, linktype=LINKTYPE_ETHERNET):
+    """
+    Decode one raw frame.
+
+    Returns:
+        (flow_key, tcp_flags) or (None, 0) if the frame is not IPv4 TCP/UDP
+        (or is a non-first IP fragment, which carries no ports).
+    """
+    try:
+        if linktype == LINKTYPE_ETHERNET:
+            ethertype = _u16.unpack_from(frame, 12)[0]
+            off = 14
+            while ethertype in (ETH_P_8021Q, ETH_P_8021AD):
+                ethertype = _u16.unpack_from(frame, off + 2)[0]
+                off += 4
+            if ethertype != ETH_P_IP:
+                return None, 0
+        elif linktype == LINKTYPE_LINUX_SLL:
+            if _u16.unpack_from(frame, 14)[0] != ETH_P_IP:
+                return None, 0
+            off = 16
+        elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+            off = 0
+        else:
+            return None, 0
+
+        ver_ihl = frame[off]
+        if ver_ihl >> 4 != 4:
+            return None, 0
+        proto = frame[off + 9]
+        if proto != PROTO_TCP and proto != PROTO_UDP:
+            return None, 0
+        if _u16.unpack_from(frame, off + 6)[0] & 0x1FFF:
+            return None, 0
+
+        l4 = off + (ver_ihl & 0x0F) * 4
+        sport, dport = _ports.unpack_from(frame, l4)
+        flags = frame[l4 + 13] if proto == PROTO_TCP else 0
+
+        # Same layout as flow_key.pack_key(): src | dst | sport | dport | proto
+        addrs = _addrs.unpack_from(frame, off + 12)[0]
+        key = (addrs << 40) | (sport << 24) | (dport << 8) | proto
+        return key, flags
+    except (struct.error, IndexError):
+        # Truncated frame
+        return None, 0
+
+
+def iter_pcap_records(path):
+    """
+    Stream (flow_key, length, timestamp, tcp_flags) records from a classic
+    pcap file. pcapng is not supported here - use the scapy replay path.
+    """
+    with open(path, "rb") as f:
+        header = f.read(24)
+        if len(header) < 24:
+            return
+        magic = struct.unpack("<I", header[:4])[0]
+        if magic in (0xA1B2C3D4, 0xA1B23C4D):
+            endian = "<"
+        elif magic in (0xD4C3B2A1, 0x4D3CB2A1):
+            endian = ">"
+        else:
+            raise ValueError(f"{path} is not a classic pcap file (magic {magic:#x})")
+        ts_div = 1e9 if magic in (0xA1B23C4D, 0x4D3CB2A1) else 1e6
+        linktype = struct.unpack(endian + "I", header[20:24])[0]
+
+        record = struct.Struct(endian + "IIII")
+        read = f.read
+        while True:
+            rec = read(16)
+            if len(rec) < 16:
+                return
+            ts_sec, ts_frac, incl_len, _ = record.unpack(rec)
+            frame = read(incl_len)
+            if len(frame) < incl_len:
+                return
+            key, flags = decode_frame(frame, linktype)
+            yield key, incl_len, ts_sec + ts_frac / ts_div, flags
+
+
+def iter_af_packet(interface=None, bpf_filter=None):
+    """
+    Stream (flow_key, length, timestamp, tcp_flags) records from a Linux
+    AF_PACKET raw socket. Requires root (CAP_NET_RAW).
+
+    bpf_filter: Optional BPF expression attached to the socket, so packets it
+                rejects are dropped in the kernel (see bpf.py)
+    """
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    try:
+        if bpf_filter:
+            try:
+                from live_ids.bpf import attach_bpf_filter
+            except ImportError:
+                from backend.live_ids.bpf import attach_bpf_filter
+            attach_bpf_filter(sock, bpf_filter, interface)
+        if interface:
+            sock.bind((interface, 0))
+        buf = bytearray(SNAPLEN)
+        view = memoryview(buf)
+        while True:
+            n = sock.recv_into(buf)
+            key, flags = decode_frame(view[:n])
+            yield key, n, time.time(), flags
+    finally:
+        sock.close()
@@ -1,10 +1,15 @@
 # backend/live_ids/feature_extractor.py
 
 import numpy as np
-import pandas as pd
 import json
+from itertools import chain
 from pathlib import Path
 
+try:
+    from live_ids.flow_key import key_protocol
+except ImportError:
+    from backend.live_ids.flow_key import key_protocol
+
 # Get absolute paths
 _extractor_file = Path(__file__).resolve()
 MODEL_DIR = _extractor_file.parent.parent / "models"
@@ -23,73 +28,186 @@ else:
     print(f"WARNING: model_metadata.json not found at {METADATA_PATH}. Feature extraction might be incomplete.")
 
 
+# Statistics computed for every live flow (columns of the stats matrix)
+_STATS = ("protocol", "duration", "packets", "bytes",
+          "size_max", "size_min", "size_mean", "size_std", "size_var",
+          "bytes_per_s", "packets_per_s",
+          "iat_mean", "iat_std", "iat_max", "iat_min", "iat_total")
+
+# Training feature -> live statistic; every other feature is 0
+FEATURE_SOURCES = {
+    "Protocol": "protocol",  # CRITICAL: This was missing!
+    "Flow Duration": "duration",
+    "Total Fwd Packets": "packets",
+    "Fwd Packets Length Total": "bytes",
+    "Fwd Packet Length Max": "size_max",
+    "Fwd Packet Length Min": "size_min",
+    "Fwd Packet Length Mean": "size_mean",
+    "Fwd Packet Length Std": "size_std",
+    "Flow Bytes/s": "bytes_per_s",
+    "Flow Packets/s": "packets_per_s",
+    "Flow IAT Mean": "iat_mean",
+    "Flow IAT Std": "iat_std",
+    "Flow IAT Max": "iat_max",
+    "Flow IAT Min": "iat_min",
+    "Fwd IAT Total": "iat_total",
+    "Fwd IAT Mean": "iat_mean",
+    "Fwd IAT Std": "iat_std",
+    "Fwd IAT Max": "iat_max",
+    "Fwd IAT Min": "iat_min",
+    "Fwd Packets/s": "packets_per_s",  # Same as Flow Packets/s for unidirectional
+    "Packet Length Min": "size_min",
+    "Packet Length Max": "size_max",
+    "Packet Length Mean": "size_mean",
+    "Packet Length Std": "size_std",
+    "Packet Length Variance": "size_var",
+    "Avg Packet Size": "size_mean",
+    "Avg Fwd Segment Size": "size_mean",
+    "Subflow Fwd Packets": "packets",  # Approximate
+    "Subflow Fwd Bytes": "bytes",  # Approximate
+    "Fwd Act Data Packets": "packets",  # Approximate
+}
+
+# Output column order: training order, or just the live features without metadata
+FEATURE_COLUMNS = list(FEATURE_NAMES) if FEATURE_NAMES else list(FEATURE_SOURCES)
+_FEATURE_COLS = np.array([FEATURE_COLUMNS.index(name) for name in FEATURE_SOURCES
+                          if name in FEATURE_COLUMNS], dtype=np.intp)
+_STAT_COLS = np.array([_STATS.index(stat) for name, stat in FEATURE_SOURCES.items()
+                       if name in FEATURE_COLUMNS], dtype=np.intp)
+_S = {stat: i for i, stat in enumerate(_STATS)}
+
+
 def extract_features(flow_key, flow):
     """
     Extract features from a flow for ML prediction, matching the full 77 features
     from model_metadata.json.
+    
+    Accepts both list-based flows (packet_sizes/timestamps) and streaming flow
+    records from FlowManager(streaming=True), which are read in O(1).
+    
+    Returns:
+        One-row DataFrame in training column order, or None for an empty flow.
+        Values are the same row extract_features_batch() produces.
     """
-    sizes = flow["packet_sizes"]
-    times = flow["timestamps"]
-
-    if len(times) == 0:
+    if "packet_sizes" in flow:
+        if len(flow["timestamps"]) == 0:
+            return None
+    elif flow.packet_count == 0:
         return None
 
-    duration = times[-1] - times[0] if len(times) > 1 else 0
-    iat = np.diff(times) if len(times) > 1 else [0]
+    # pandas is only needed by this per-flow API; the sniffer scores batches as arrays
+    import pandas as pd
+
+    return pd.DataFrame(extract_features_batch([(flow_key, flow)]), columns=FEATURE_COLUMNS)
+
+
+def extract_features_batch(flows):
+    """
+    Extract features for many flows at once.
     
-    total_packets = len(sizes)
-    total_bytes = sum(sizes)
+    Packet sizes and timestamps of all list-based flows are concatenated into
+    flat arrays and every statistic is a segmented reduction (np.add.reduceat,
+    np.minimum.reduceat, ...) over them; streaming records are read attribute
+    by attribute. Costs a few numpy calls per batch instead of per flow.
     
-    # Calculate rates
-    flow_bytes_per_s = total_bytes / duration if duration > 0 else 0
-    flow_packets_per_s = total_packets / duration if duration > 0 else 0
+    Args:
+        flows: Sequence of (flow_key, flow) pairs
     
-    # Extract protocol from flow_key (5th element: protocol number)
-    # Protocol: 6=TCP, 17=UDP, 1=ICMP, etc.
-    protocol = flow_key[4] if len(flow_key) >= 5 else 0
-
-    # Initialize a dictionary with all expected features set to 0
-    features_dict = {name: 0 for name in FEATURE_NAMES} if FEATURE_NAMES else {}
-
-    # Populate the features that can be derived from the live flow
-    features_dict.update({
-        "Protocol": protocol,  # CRITICAL: This was missing!
-        "Flow Duration": duration,
-        "Total Fwd Packets": total_packets,
-        "Fwd Packets Length Total": total_bytes,
-        "Fwd Packet Length Max": np.max(sizes) if len(sizes) > 0 else 0,
-        "Fwd Packet Length Min": np.min(sizes) if len(sizes) > 0 else 0,
-        "Fwd Packet Length Mean": np.mean(sizes) if len(sizes) > 0 else 0,
-        "Fwd Packet Length Std": np.std(sizes) if len(sizes) > 0 else 0,
-        "Flow Bytes/s": flow_bytes_per_s,
-        "Flow Packets/s": flow_packets_per_s,
-        "Flow IAT Mean": np.mean(iat) if len(iat) > 0 else 0,
-        "Flow IAT Std": np.std(iat) if len(iat) > 0 else 0,
-        "Flow IAT Max": np.max(iat) if len(iat) > 0 else 0,
-        "Flow IAT Min": np.min(iat) if len(iat) > 0 else 0,
-        "Fwd IAT Total": sum(iat) if len(iat) > 0 else 0,
-        "Fwd IAT Mean": np.mean(iat) if len(iat) > 0 else 0,
-        "Fwd IAT Std": np.std(iat) if len(iat) > 0 else 0,
-        "Fwd IAT Max": np.max(iat) if len(iat) > 0 else 0,
-        "Fwd IAT Min": np.min(iat) if len(iat) > 0 else 0,
-        "Fwd Packets/s": flow_packets_per_s,  # Same as Flow Packets/s for unidirectional
-        "Packet Length Min": np.min(sizes) if len(sizes) > 0 else 0,
-        "Packet Length Max": np.max(sizes) if len(sizes) > 0 else 0,
-        "Packet Length Mean": np.mean(sizes) if len(sizes) > 0 else 0,
-        "Packet Length Std": np.std(sizes) if len(sizes) > 0 else 0,
-        "Packet Length Variance": np.var(sizes) if len(sizes) > 0 else 0,
-        "Avg Packet Size": np.mean(sizes) if len(sizes) > 0 else 0,
-        "Avg Fwd Segment Size": np.mean(sizes) if len(sizes) > 0 else 0,
-        "Subflow Fwd Packets": total_packets,  # Approximate
-        "Subflow Fwd Bytes": total_bytes,  # Approximate
-        "Fwd Act Data Packets": total_packets,  # Approximate
-    })
-
-    df = pd.DataFrame([features_dict])
-
-    # Ensure column order matches training features
-    if FEATURE_NAMES:
-        df = df[FEATURE_NAMES]
-
-    return df
+    Returns:
+        float64 matrix of shape (len(flows), len(FEATURE_COLUMNS)). Rows of
+        flows without packets are NaN.
+    """
+    stats = np.zeros((len(flows), len(_STATS)))
+    stats[:, _S["protocol"]] = np.fromiter((key_protocol(k) for k, _ in flows), np.float64, len(flows))
+
+    listed = [i for i, (_, flow) in enumerate(flows) if "packet_sizes" in flow]
+    if len(listed) == len(flows):
+        empty = _list_stats([flow for _, flow in flows], stats)
+    else:
+        empty = np.zeros(len(flows), dtype=bool)
+        streamed = [i for i, (_, flow) in enumerate(flows) if "packet_sizes" not in flow]
+        for rows, fill in ((listed, _list_stats), (streamed, _streaming_stats)):
+            if rows:
+                part = stats[rows]
+                empty[rows] = fill([flows[i][1] for i in rows], part)
+                stats[rows] = part
+
+    # Calculate rates
+    duration = stats[:, _S["duration"]]
+    moving = duration > 0
+    for rate, total in (("bytes_per_s", "bytes"), ("packets_per_s", "packets")):
+        np.divide(stats[:, _S[total]], duration, out=stats[:, _S[rate]], where=moving)
+
+    stats[empty] = np.nan
+
+    features = np.zeros((len(flows), len(FEATURE_COLUMNS)))
+    features[:, _FEATURE_COLS] = stats[:, _STAT_COLS]
+    return features
+
+
+def _segments(values, counts):
+    """sum, min, max, mean, var of consecutive non-empty segments of `values`"""
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    total = np.add.reduceat(values, starts)
+    mean = total / counts
+    dev = values - np.repeat(mean, counts)
+    var = np.add.reduceat(dev * dev, starts) / counts
+    return total, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts), mean, var
+
+
+def _list_stats(flows, stats):
+    """Fill `stats` rows for list-based flows (packet_sizes/timestamps); returns the empty-flow mask"""
+    n = len(flows)
+    size_counts = np.fromiter((len(f["packet_sizes"]) for f in flows), np.int64, n)
+    time_counts = np.fromiter((len(f["timestamps"]) for f in flows), np.int64, n)
+    sizes = np.fromiter(chain.from_iterable(f["packet_sizes"] for f in flows), np.float64, size_counts.sum())
+    times = np.fromiter(chain.from_iterable(f["timestamps"] for f in flows), np.float64, time_counts.sum())
+
+    stats[:, _S["packets"]] = size_counts
+    has_sizes = size_counts > 0
+    if has_sizes.any():
+        total, lo, hi, mean, var = _segments(sizes, size_counts[has_sizes])
+        for stat, column in (("bytes", total), ("size_min", lo), ("size_max", hi),
+                             ("size_mean", mean), ("size_var", var), ("size_std", np.sqrt(var))):
+            stats[has_sizes, _S[stat]] = column
+
+    # Inter-arrival times: consecutive timestamp differences within each flow
+    ends = np.cumsum(time_counts)
+    multi = time_counts > 1
+    if multi.any():
+        stats[multi, _S["duration"]] = times[ends[multi] - 1] - times[ends[multi] - time_counts[multi]]
+        within = np.ones(max(len(times) - 1, 0), dtype=bool)
+        boundaries = ends[:-1]
+        within[boundaries[(boundaries > 0) & (boundaries < len(times))] - 1] = False
+        iat = np.diff(times)[within]
+        total, lo, hi, mean, var = _segments(iat, time_counts[multi] - 1)
+        for stat, column in (("iat_total", total), ("iat_min", lo), ("iat_max", hi),
+                             ("iat_mean", mean), ("iat_std", np.sqrt(var))):
+            stats[multi, _S[stat]] = column
+    return time_counts == 0
+
+
+def _streaming_stats(flows, stats):
+    """Fill `stats` rows from StreamingFlowRecords (running count/min/max/Welford stats); returns the empty-flow mask"""
+    def column(attr):
+        return np.fromiter((getattr(f, attr) for f in flows), np.float64, len(flows))
+
+    packets = column("packet_count")
+    total_bytes = column("total_bytes")
+    iat_count = column("iat_count")
+    stats[:, _S["packets"]] = packets
+    stats[:, _S["bytes"]] = total_bytes
+    stats[:, _S["duration"]] = np.where(packets > 1, column("last_seen") - column("first_seen"), 0)
+    for stat, attr in (("size_min", "size_min"), ("size_max", "size_max"), ("iat_mean", "iat_mean"),
+                       ("iat_min", "iat_min"), ("iat_max", "iat_max"), ("iat_total", "iat_sum")):
+        stats[:, _S[stat]] = column(attr)
 
+    with np.errstate(divide="ignore", invalid="ignore"):
+        size_var = column("size_m2") / packets
+        iat_var = np.where(iat_count > 0, column("iat_m2") / iat_count, 0.0)
+        stats[:, _S["size_mean"]] = total_bytes / packets
+    stats[:, _S["size_var"]] = size_var
+    stats[:, _S["size_std"]] = np.sqrt(size_var)
+    stats[:, _S["iat_std"]] = np.sqrt(iat_var)
+    return packets == 0
@@ -0,0 +1,120 @@
+# backend/live_ids/flow_key.py
+
+"""
+Packed integer flow keys.
+
+A flow key is one int instead of a (src_ip, dst_ip, src_port, dst_port,
+protocol) tuple of strings and ints:
+
+    bits 103..72  source IPv4 address
+    bits  71..40  destination IPv4 address
+    bits  39..24  source port
+    bits  23..8   destination port
+    bits   7..0   IP protocol
+
+Packed keys hash and compare as a single integer, take one object per flow
+instead of six, and let the sniffer filters test addresses with integer
+masks. Keys are decoded back to dotted-quad tuples only for output (alerts
+and log lines). Only unpack_key() and key_protocol() also accept the old
+tuple form; unpack_fields(), pack_key() and the sniffer filters built on
+them need packed keys, so code and tests that build keys by hand should
+pass them through pack_flow_key().
+"""
+
+import socket
+import struct
+from functools import lru_cache
+
+_SRC_SHIFT = 72
+_DST_SHIFT = 40
+_SPORT_SHIFT = 24
+_DPORT_SHIFT = 8
+
+IP_MASK = 0xFFFFFFFF
+PORT_MASK = 0xFFFF
+PROTO_MASK = 0xFF
+
+# Distinct addresses seen by a sensor are far fewer than packets, so
+# string <-> int conversions are memoised (this is the IP intern table)
+IP_CACHE_SIZE = 65536
+
+_u32 = struct.Struct("!I")
+
+
+@lru_cache(maxsize=IP_CACHE_SIZE)
+def ip_to_int(ip):
+    """Dotted-quad IPv4 string -> 32-bit int (ValueError if invalid)"""
+    try:
+        return _u32.unpack(socket.inet_pton(socket.AF_INET, ip))[0]
+    except (OSError, TypeError):
+        raise ValueError(f"Invalid IPv4 address: {ip!r}") from None
+
+
+@lru_cache(maxsize=IP_CACHE_SIZE)
+def int_to_ip(value):
+    """32-bit int -> dotted-quad IPv4 string"""
+    return socket.inet_ntoa(_u32.pack(value))
+
+
+def pack_key(src_ip, dst_ip, src_port, dst_port, protocol):
+    """Pack integer addresses, ports and protocol into one flow key"""
+    return ((src_ip << _SRC_SHIFT) | (dst_ip << _DST_SHIFT)
+            | (src_port << _SPORT_SHIFT) | (dst_port << _DPORT_SHIFT) | protocol)
+
+
+def pack_flow_key(flow_key):
+    """(src_ip, dst_ip, src_port, dst_port, protocol) with string IPs -> packed key"""
+    src_ip, dst_ip, src_port, dst_port, protocol = flow_key
+    return pack_key(ip_to_int(src_ip), ip_to_int(dst_ip), src_port, dst_port, protocol)
+
+
+def unpack_fields(key):
+    """Packed key -> (src_ip, dst_ip, src_port, dst_port, protocol), all ints"""
+    return (
+        key >> _SRC_SHIFT,
+        (key >> _DST_SHIFT) & IP_MASK,
+        (key >> _SPORT_SHIFT) & PORT_MASK,
+        (key >> _DPORT_SHIFT) & PORT_MASK,
+        key & PROTO_MASK,
+    )
+
+
+def unpack_key(key):
+    """
+    Flow key -> (src_ip, dst_ip, src_port, dst_port, protocol) with dotted IPs.
+
+    Tuple keys are returned unchanged.
+    """
+    if not isinstance(key, int):
+        return key
+    src_ip, dst_ip, src_port, dst_port, protocol = unpack_fields(key)
+    return int_to_ip(src_ip), int_to_ip(dst_ip), src_port, dst_port, protocol
+
+
+def key_protocol(key):
+    """IP protocol number of a packed or tuple flow key"""
+    if isinstance(key, int):
+        return key & PROTO_MASK
+    return key[4] if len(key) >= 5 else 0
+
+
+def ip_prefix_mask(prefix):
+    """
+    Parse an address prefix into (network, mask) ints for `ip & mask == network`.
+
+    Accepts the string-prefix form used by the sniffer whitelist ('142.250.',
+    '8.8.8.') as well as CIDR notation ('142.250.0.0/15').
+    """
+    if "/" in prefix:
+        network, bits = prefix.split("/", 1)
+        bits = int(bits)
+        if not 0 <= bits <= 32:
+            raise ValueError(f"Invalid prefix length in {prefix!r}")
+        octets = network.split(".")
+        octets += ["0"] * (4 - len(octets))
+    else:
+        octets = [o for o in prefix.split(".") if o]
+        bits = 8 * len(octets)
+        octets += ["0"] * (4 - len(octets))
+    mask = (IP_MASK << (32 - bits)) & IP_MASK
+    return ip_to_int(".".join(octets)) & mask, mask
@@ -1,13 +1,191 @@
 # backend/live_ids/flow_manager.py
 
+import heapq
+import threading
 import time
+from array import array
+from collections import OrderedDict
+
+try:
+    from live_ids.flow_key import ip_to_int, pack_key
+except ImportError:
+    from backend.live_ids.flow_key import ip_to_int, pack_key
 
 FLOW_TIMEOUT = 5  # seconds of inactivity = flow end
+ACTIVE_TIMEOUT = 120  # seconds after its first packet a flow is exported even if still busy
+MAX_FLOWS = 1_000_000  # flow table size; the least recently seen flow is evicted beyond this
+REJECT_CACHE_SIZE = 65536  # keys remembered as refused by the admission check
 
 
-class FlowManager:
+class FlowRecord:
+    """
+    Per-packet flow record.
+
+    Sizes and timestamps are kept in typed arrays (4 + 8 bytes per packet
+    instead of a boxed int and float each) and __slots__ drops the
+    per-instance dict. flow["packet_sizes"]-style reads still work for code
+    written against the original dict flows.
+    """
+
+    __slots__ = ("packet_sizes", "timestamps", "total_bytes")
+
     def __init__(self):
+        self.packet_sizes = array("I")
+        self.timestamps = array("d")
+        self.total_bytes = 0
+
+    def __getitem__(self, name):
+        if name in self.__slots__:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self.__slots__
+
+
+class StreamingFlowRecord:
+    """
+    Constant-size flow record for streaming mode.
+
+    Holds running count/sum/min/max and Welford mean/M2 for packet sizes and
+    inter-arrival times instead of per-packet lists, so memory per flow and
+    feature extraction cost are O(1) however long the flow lives.
+    """
+
+    __slots__ = (
+        "packet_count", "total_bytes",
+        "size_min", "size_max", "size_mean", "size_m2",
+        "first_seen", "last_seen",
+        "iat_count", "iat_sum", "iat_min", "iat_max", "iat_mean", "iat_m2",
+    )
+
+    def __init__(self, packet_size, timestamp):
+        self.packet_count = 1
+        self.total_bytes = packet_size
+        self.size_min = packet_size
+        self.size_max = packet_size
+        self.size_mean = float(packet_size)
+        self.size_m2 = 0.0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.iat_count = 0
+        self.iat_sum = 0.0
+        self.iat_min = 0.0
+        self.iat_max = 0.0
+        self.iat_mean = 0.0
+        self.iat_m2 = 0.0
+
+    def add(self, packet_size, timestamp):
+        """Fold one more packet into the running statistics"""
+        n = self.packet_count + 1
+        self.packet_count = n
+        self.total_bytes += packet_size
+        if packet_size < self.size_min:
+            self.size_min = packet_size
+        if packet_size > self.size_max:
+            self.size_max = packet_size
+        delta = packet_size - self.size_mean
+        self.size_mean += delta / n
+        self.size_m2 += delta * (packet_size - self.size_mean)
+
+        iat = timestamp - self.last_seen
+        k = self.iat_count + 1
+        self.iat_count = k
+        self.iat_sum += iat
+        if k == 1 or iat < self.iat_min:
+            self.iat_min = iat
+        if k == 1 or iat > self.iat_max:
+            self.iat_max = iat
+        delta = iat - self.iat_mean
+        self.iat_mean += delta / k
+        self.iat_m2 += delta * (iat - self.iat_mean)
+        self.last_seen = timestamp
+
+    def __getitem__(self, name):
+        if name in self.__slots__:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return name in self.__slots__
+
+
+def flow_packet_count(flow):
+    """Number of packets in a flow (list or streaming record)"""
+    if "packet_sizes" in flow:
+        return len(flow["packet_sizes"])
+    return flow["packet_count"]
+
+
+def flow_duration(flow):
+    """Last packet time minus first packet time (0 for a single packet)"""
+    if "timestamps" in flow:
+        times = flow["timestamps"]
+        return times[-1] - times[0] if len(times) > 1 else 0
+    return flow["last_seen"] - flow["first_seen"] if flow["packet_count"] > 1 else 0
+
+
+def flow_first_seen(flow):
+    """Time of the first packet"""
+    if "timestamps" in flow:
+        return flow["timestamps"][0]
+    return flow["first_seen"]
+
+
+def flow_last_seen(flow):
+    """Time of the most recent packet"""
+    if "timestamps" in flow:
+        return flow["timestamps"][-1]
+    return flow["last_seen"]
+
+
+class FlowManager:
+    def __init__(self, timeout=FLOW_TIMEOUT, streaming=False, max_flows=MAX_FLOWS,
+                 active_timeout=ACTIVE_TIMEOUT, admit=None):
         self.flows = {}
+        self.timeout = timeout
+
+        # Streaming mode keeps O(1) running statistics per flow instead of
+        # per-packet size/timestamp arrays (see StreamingFlowRecord)
+        self.streaming = streaming
+
+        # Table bound (None = unbounded). Creating a flow in a full table
+        # evicts the least recently seen one; evicted flows are handed out by
+        # the next end_expired_flows() call and scored like any ended flow.
+        self.max_flows = max_flows
+
+        # Flows older than this are exported even if still active (None = never)
+        self.active_timeout = active_timeout
+
+        # Optional admission check, admit(key) -> bool, run once when a flow
+        # would be created. Refused keys go in a small FIFO negative cache so
+        # their later packets cost one dict lookup and are never stored.
+        self.admit = admit
+        self._rejected = OrderedDict()
+
+        # Lazy-deletion min-heap of (last_seen, key). Each flow has one
+        # entry armed with the last-seen time it had when the entry was pushed.
+        # Packets only update the flow itself; stale entries are re-armed with
+        # the real last-seen time when they reach the top of the heap, so
+        # expiry costs O(expired flows) instead of a scan of the whole table.
+        # The same walk finds the least recently seen flow for eviction.
+        self._expiry_heap = []
+
+        # Min-heap of (first_seen, key) for the active timeout
+        self._active_heap = []
+
+        # Evicted flows waiting to be returned by end_expired_flows()
+        self._pending = []
+
+        self.idle_expired = 0
+        self.evictions = 0
+        self.active_exports = 0
+        self.admitted = 0
+        self.rejected_flows = 0
+        self.rejected_packets = 0
+
+        # Guards the table when expiry runs on its own thread
+        self.lock = threading.Lock()
 
     def get_flow_key(self, pkt):
         try:
@@ -21,10 +199,10 @@ class FlowManager:
             if transport is None:
                 return None
             
-            # Create flow key: (src_ip, dst_ip, src_port, dst_port, protocol)
-            return (
-                ip_layer.src,
-                ip_layer.dst,
+            # Create packed flow key: (src_ip, dst_ip, src_port, dst_port, protocol)
+            return pack_key(
+                ip_to_int(ip_layer.src),
+                ip_to_int(ip_layer.dst),
                 transport.sport,
                 transport.dport,
                 ip_layer.proto
@@ -33,25 +211,152 @@ class FlowManager:
             return None
 
     def update_flow(self, key, packet_size, timestamp):
-        flow = self.flows.setdefault(key, {
-            "packet_sizes": [],
-            "timestamps": [],
-            "total_bytes": 0
-        })
-
-        flow["packet_sizes"].append(packet_size)
-        flow["timestamps"].append(timestamp)
-        flow["total_bytes"] += packet_size
-
-    def end_expired_flows(self):
-        now = time.time()
-        ended = []
-
-        for key, flow in list(self.flows.items()):
-            if len(flow["timestamps"]) > 0:
-                if now - flow["timestamps"][-1] > FLOW_TIMEOUT:
+        if self.streaming:
+            self._update_streaming_flow(key, packet_size, timestamp)
+            return
+
+        with self.lock:
+            flow = self.flows.get(key)
+            if flow is None:
+                if self.admit is not None and not self._admit(key):
+                    return
+                self._add_flow(key, timestamp)
+                flow = FlowRecord()
+                self.flows[key] = flow
+            elif timestamp < flow.timestamps[-1]:
+                # Out-of-order timestamp: the armed entry may now be later than
+                # the flow's real deadline, so arm an extra one.
+                heapq.heappush(self._expiry_heap, (timestamp, key))
+
+            flow.packet_sizes.append(packet_size)
+            flow.timestamps.append(timestamp)
+            flow.total_bytes += packet_size
+
+    def _update_streaming_flow(self, key, packet_size, timestamp):
+        with self.lock:
+            flow = self.flows.get(key)
+            if flow is None:
+                if self.admit is not None and not self._admit(key):
+                    return
+                self._add_flow(key, timestamp)
+                self.flows[key] = StreamingFlowRecord(packet_size, timestamp)
+                return
+            if timestamp < flow.last_seen:
+                heapq.heappush(self._expiry_heap, (timestamp, key))
+            flow.add(packet_size, timestamp)
+
+    def _admit(self, key):
+        """Run the admission check for a new flow key, through the negative cache (lock held)"""
+        rejected = self._rejected
+        if key in rejected:
+            self.rejected_packets += 1
+            return False
+        if self.admit(key):
+            self.admitted += 1
+            return True
+        if len(rejected) >= REJECT_CACHE_SIZE:
+            rejected.popitem(last=False)
+        rejected[key] = None
+        self.rejected_flows += 1
+        self.rejected_packets += 1
+        return False
+
+    def _add_flow(self, key, timestamp):
+        """Arm the heaps for a new flow, evicting first if the table is full (lock held)"""
+        if self.max_flows is not None and len(self.flows) >= self.max_flows:
+            self._evict_lru()
+        heapq.heappush(self._expiry_heap, (timestamp, key))
+        if self.active_timeout is not None:
+            active = self._active_heap
+            if len(active) > 2 * len(self.flows) + 1024:
+                # Entries of evicted flows only leave the active heap at their
+                # (distant) deadline; rebuild it so a flood can't grow it unbounded
+                active[:] = [(flow_first_seen(flow), k) for k, flow in self.flows.items()]
+                heapq.heapify(active)
+            heapq.heappush(active, (timestamp, key))
+
+    def _evict_lru(self):
+        """Move the least recently seen flow to the pending list (lock held)"""
+        heap = self._expiry_heap
+        while heap:
+            armed, key = heapq.heappop(heap)
+            flow = self.flows.get(key)
+            if flow is None:
+                continue
+
+            # Every live flow has an entry armed at or before its last-seen
+            # time, so the first entry that is up to date is the LRU flow
+            last_seen = flow_last_seen(flow)
+            if last_seen <= armed:
+                del self.flows[key]
+                self._pending.append((key, flow))
+                self.evictions += 1
+                return
+            heapq.heappush(heap, (last_seen, key))
+
+    def end_expired_flows(self, now=None):
+        """
+        Remove and return (key, flow) for every flow that has ended: idle for
+        longer than the timeout, past the active timeout, or evicted from a
+        full table since the last call.
+        """
+        if now is None:
+            now = time.time()
+        heap = self._expiry_heap
+
+        with self.lock:
+            ended = self._pending
+            self._pending = []
+
+            while heap and now - heap[0][0] > self.timeout:
+                _, key = heapq.heappop(heap)
+                flow = self.flows.get(key)
+                if flow is None:
+                    # Duplicate entry for a flow that has already ended
+                    continue
+
+                last_seen = flow_last_seen(flow)
+                if now - last_seen > self.timeout:
+                    ended.append((key, flow))
+                    del self.flows[key]
+                    self.idle_expired += 1
+                else:
+                    # Flow saw packets since this entry was armed - re-arm it
+                    heapq.heappush(heap, (last_seen, key))
+
+            if self.active_timeout is not None:
+                active = self._active_heap
+                while active and now - active[0][0] > self.active_timeout:
+                    first_seen, key = heapq.heappop(active)
+                    flow = self.flows.get(key)
+                    if flow is None or flow_first_seen(flow) != first_seen:
+                        # Flow already ended (and maybe restarted under the same key)
+                        continue
                     ended.append((key, flow))
                     del self.flows[key]
+                    self.active_exports += 1
 
         return ended
 
+    def stats(self):
+        """Flow table size and how flows have ended so far"""
+        return {
+            "flows": len(self.flows),
+            "max_flows": self.max_flows,
+            "idle_expired": self.idle_expired,
+            "evictions": self.evictions,
+            "active_exports": self.active_exports,
+            "active_timeout": self.active_timeout,
+            "admitted": self.admitted,
+            "rejected_flows": self.rejected_flows,
+            "rejected_packets": self.rejected_packets,
+        }
+
+    def print_report(self):
+        s = self.stats()
+        print(f"📊 Flow table: {s['flows']} open (max {s['max_flows'] or 'unbounded'}), "
+              f"{s['idle_expired']} idle-expired, {s['evictions']} evicted, "
+              f"{s['active_exports']} exported at the {s['active_timeout']}s active timeout")
+        if self.admit is not None:
+            print(f"🚪 Admission: {s['admitted']} flows admitted, {s['rejected_flows']} refused "
+                  f"({s['rejected_packets']} packets never stored)")
@@ -0,0 +1,332 @@
+# backend/live_ids/log_segments.py
+
+"""
+Segmented alert log.
+
+Alerts are appended to the active log (ids_alerts.log). Once it reaches
+SEGMENT_BYTES, or is SEGMENT_SECONDS old, rotate() renames it to the next
+numbered segment (ids_alerts.000001.log, ...) and a new active log is
+started. A background thread compresses sealed segments into a series of
+independent gzip members of about BLOCK_BYTES each (ids_alerts.000001.log.gz;
+concatenated members are still a normal gzip file for zcat) and writes a
+sidecar index (ids_alerts.000001.idx) with each member's offset, length,
+alert count and first/last timestamp.
+
+tail_lines() reads the newest alerts by seeking backwards from the end of
+the active log in READ_CHUNK steps and, if it needs more, decompressing only
+the last members of the newest segments, so its cost depends on the number
+of lines asked for and not on the size of the log.
+
+Every alert carries an "id", increasing across rotations and restarts. The
+last id assigned and when (ids_alerts.ids) is advanced by writers under a
+lock once their alerts are written, so readers can tell whether anything
+was logged since a given id from 16 bytes, without reading the log.
+"""
+
+import gzip
+import json
+import os
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is not serialized between processes
+    fcntl = None
+
+SEGMENT_BYTES = 64 * 1024 * 1024  # rotate the active log at this size...
+SEGMENT_SECONDS = 24 * 3600  # ...or this many seconds after its first alert (0 = size only)
+BLOCK_BYTES = 1024 * 1024  # uncompressed bytes per gzip member of a sealed segment
+READ_CHUNK = 64 * 1024  # bytes read per backward step through an uncompressed log
+
+_IDS = struct.Struct("<qq")  # last alert id assigned, when it was committed (ns since the epoch)
+_ID_PREFIX = b'{"id": '
+
+
+def _segment_pattern(log_file):
+    return re.compile(rf"^{re.escape(log_file.stem)}\.(\d+){re.escape(log_file.suffix)}(\.gz)?$")
+
+
+def segment_path(log_file, sequence):
+    log_file = Path(log_file)
+    return log_file.with_name(f"{log_file.stem}.{sequence:06d}{log_file.suffix}")
+
+
+def index_path(segment):
+    """Sidecar index of a segment (ids_alerts.000001.log[.gz] -> ids_alerts.000001.idx)"""
+    segment = Path(segment)
+    name = segment.name[:-3] if segment.name.endswith(".gz") else segment.name
+    return segment.with_name(Path(name).stem + ".idx")
+
+
+def list_segments(log_file):
+    """
+    Sealed segments of a log, newest first.
+
+    Returns:
+        List of (sequence, path): the .gz once it and its index are complete,
+        else the uncompressed segment
+    """
+    log_file = Path(log_file)
+    pattern = _segment_pattern(log_file)
+    found = {}
+    try:
+        names = os.listdir(log_file.parent)
+    except OSError:
+        return []
+    for name in names:
+        match = pattern.match(name)
+        if match is None:
+            continue
+        sequence, compressed = int(match.group(1)), bool(match.group(2))
+        path = log_file.parent / name
+        if compressed and not index_path(path).exists():
+            continue  # compression still running, or interrupted
+        if compressed or sequence not in found:
+            found[sequence] = path
+    return sorted(found.items(), reverse=True)
+
+
+def read_index(segment):
+    """A compressed segment's sidecar index (dict), None if it has none"""
+    try:
+        with open(index_path(segment), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _rotation_lock(log_file):
+    """Serialize rotation between processes sharing the log (shards)"""
+    if fcntl is None:
+        yield
+        return
+    with open(Path(log_file).with_suffix(".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def rotate(log_file, inode=None):
+    """
+    Seal the active log as the next numbered segment.
+
+    Args:
+        inode: Only rotate if the active log is still this file (a writer
+               passes its descriptor's inode, so a log another process has
+               just rotated is not rotated again)
+
+    Returns:
+        The new segment's path, or None if there was nothing to rotate
+    """
+    log_file = Path(log_file)
+    with _rotation_lock(log_file):
+        try:
+            st = os.stat(log_file)
+        except FileNotFoundError:
+            return None
+        if st.st_size == 0 or (inode is not None and st.st_ino != inode):
+            return None
+        segments = list_segments(log_file)
+        segment = segment_path(log_file, segments[0][0] + 1 if segments else 1)
+        os.rename(log_file, segment)
+    return segment
+
+
+def ids_path(log_file):
+    """The log's alert id counter (ids_alerts.log -> ids_alerts.ids)"""
+    return Path(log_file).with_suffix(".ids")
+
+
+def alert_id_of(line):
+    """The id of an alert line (bytes), None for alerts logged before ids were added"""
+    if not line.startswith(_ID_PREFIX):
+        return None
+    try:
+        return int(line[len(_ID_PREFIX):line.index(b",", len(_ID_PREFIX))])
+    except ValueError:
+        return None
+
+
+def last_alert_id(log_file):
+    """(last alert id committed, when in ns); (0, 0) if no alert has an id yet"""
+    try:
+        with open(ids_path(log_file), "rb") as f:
+            return _IDS.unpack(f.read(_IDS.size))
+    except (OSError, struct.error):
+        return 0, 0
+
+
+@contextmanager
+def assign_alert_ids(log_file, count):
+    """
+    Reserve count consecutive alert ids and yield the first; the caller
+    writes its alerts inside the block. The counter stays locked until the
+    block ends and is only advanced if it succeeds, so writers sharing the
+    log (shards) append in id order and last_alert_id() never names an alert
+    that is not in the log yet.
+    """
+    fd = os.open(ids_path(log_file), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            last, _ = _IDS.unpack(os.read(fd, _IDS.size))
+        except struct.error:
+            # New (or damaged) counter: continue from the newest alert in the log
+            last = max([alert_id_of(line) or 0 for line in tail_lines(log_file, 1)] + [0])
+        yield last + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, _IDS.pack(last + count, time.time_ns()))
+    finally:
+        os.close(fd)  # releases the lock
+
+
+def _timestamp(line):
+    try:
+        return json.loads(line)["timestamp"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def first_timestamp(log_file):
+    """Timestamp of the first alert in a log file, None if empty or missing"""
+    try:
+        with open(log_file, "rb") as f:
+            return _timestamp(f.readline())
+    except OSError:
+        return None
+
+
+def compress_segment(segment, block_bytes=BLOCK_BYTES):
+    """
+    Compress an uncompressed segment into gzip members of about block_bytes
+    each, write its sidecar index, then delete the uncompressed file.
+
+    Returns:
+        The index dict
+    """
+    segment = Path(segment)
+    target = segment.with_name(segment.name + ".gz")
+    # Per-process temp names: shard processes may compress the same segment at once
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    blocks = []
+    with open(segment, "rb") as src, open(tmp, "wb") as dst:
+        while True:
+            lines = src.readlines(block_bytes)
+            if not lines:
+                break
+            member = gzip.compress(b"".join(lines), mtime=0)
+            # [offset, length, alerts, first timestamp, last timestamp]
+            blocks.append([dst.tell(), len(member), len(lines), _timestamp(lines[0]), _timestamp(lines[-1])])
+            dst.write(member)
+    index = {
+        "segment": target.name,
+        "bytes": segment.stat().st_size,
+        "alerts": sum(block[2] for block in blocks),
+        "first_ts": blocks[0][3] if blocks else None,
+        "last_ts": blocks[-1][4] if blocks else None,
+        "blocks": blocks,
+    }
+    os.replace(tmp, target)
+    idx_tmp = index_path(segment).with_suffix(f".idx.{os.getpid()}.tmp")
+    with open(idx_tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(idx_tmp, index_path(segment))
+    segment.unlink()
+    return index
+
+
+def compress_pending(log_file, block_bytes=BLOCK_BYTES):
+    """Compress every sealed segment that is still uncompressed. Returns how many were."""
+    done = 0
+    for _, segment in sorted(list_segments(log_file)):
+        if segment.suffix == ".gz":
+            continue
+        try:
+            compress_segment(segment, block_bytes)
+            done += 1
+        except FileNotFoundError:
+            pass  # another process compressed it first
+        except OSError as e:
+            print(f"⚠️  Could not compress alert log segment {segment.name}: {e}")
+    return done
+
+
+def compress_in_background(log_file, block_bytes=BLOCK_BYTES):
+    """compress_pending() on a daemon thread; returns the thread"""
+    thread = threading.Thread(target=compress_pending, args=(log_file, block_bytes),
+                              name="alert-log-compressor", daemon=True)
+    thread.start()
+    return thread
+
+
+def tail_file(path, n, end=None):
+    """Last n complete lines of an uncompressed file (before byte offset end), reading backwards"""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END) if end is None else end
+        chunks = []
+        newlines = 0
+        # n + 1 newlines: the line before the first one kept may be cut by the chunk boundary
+        while pos > 0 and newlines <= n:
+            step = min(READ_CHUNK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    lines = b"".join(reversed(chunks)).split(b"\n")
+    # The last piece is after the final newline: empty, or a line still being written
+    lines = lines[1:-1] if pos > 0 else lines[:-1]
+    return lines[-n:] if n else []
+
+
+def _tail_compressed(path, index, n):
+    """Last n lines of a compressed segment, decompressing members from the end"""
+    lines = []
+    with open(path, "rb") as f:
+        for offset, length, _, _, _ in reversed(index["blocks"]):
+            if len(lines) >= n:
+                break
+            f.seek(offset)
+            lines = gzip.decompress(f.read(length)).split(b"\n")[:-1] + lines
+    return lines[-n:] if n else []
+
+
+def tail_lines(log_file, n):
+    """
+    The newest n alert lines (bytes, oldest first) across the active log and
+    its sealed segments.
+    """
+    log_file = Path(log_file)
+    try:
+        lines = tail_file(log_file, n)
+    except FileNotFoundError:
+        lines = []
+    if len(lines) >= n:
+        return lines
+
+    for _, segment in list_segments(log_file):
+        wanted = n - len(lines)
+        try:
+            if segment.suffix == ".gz":
+                index = read_index(segment)
+                older = _tail_compressed(segment, index, wanted) if index else []
+            else:
+                older = tail_file(segment, wanted)
+        except FileNotFoundError:
+            # Compressed (and removed) while we were reading: take the .gz
+            gz = segment.with_name(segment.name + ".gz")
+            index = read_index(gz)
+            older = _tail_compressed(gz, index, wanted) if index else []
+        lines = older + lines
+        if len(lines) >= n:
+            break
+    return lines
@@ -1,9 +1,25 @@
 # backend/live_ids/logger.py
 
+import atexit
 import json
+import os
+import queue
+import threading
 import time
 from pathlib import Path
-import numpy as np
+
+try:
+    from live_ids.alert_ring import AlertRing, ALERT_RING_NAME, RING_SLOTS
+    from live_ids.flow_key import unpack_key
+    from live_ids.log_segments import (SEGMENT_BYTES, SEGMENT_SECONDS, alert_id_of, assign_alert_ids,
+                                       compress_in_background, compress_pending, first_timestamp,
+                                       last_alert_id, list_segments, rotate, tail_lines)
+except ImportError:
+    from backend.live_ids.alert_ring import AlertRing, ALERT_RING_NAME, RING_SLOTS
+    from backend.live_ids.flow_key import unpack_key
+    from backend.live_ids.log_segments import (SEGMENT_BYTES, SEGMENT_SECONDS, alert_id_of, assign_alert_ids,
+                                               compress_in_background, compress_pending, first_timestamp,
+                                               last_alert_id, list_segments, rotate, tail_lines)
 
 # Get absolute path to logs directory
 _logger_file = Path(__file__).resolve()
@@ -11,48 +27,450 @@ BACKEND_DIR = _logger_file.parent.parent
 LOG_FILE = BACKEND_DIR / "logs" / "ids_alerts.log"
 LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+ALERT_QUEUE_SIZE = 10000  # alerts waiting for the writer thread before new ones are dropped
+FLUSH_EVERY = 256  # write out after this many buffered alerts...
+FLUSH_INTERVAL = 0.1  # ...or this many seconds after the oldest buffered alert
+FSYNC = False  # fsync after every write (survives a power loss, costs a disk round trip)
+
+RING_RETRY = 1.0  # seconds between a reader's attempts to attach to the sniffer's alert ring
+
+_STOP = object()
+
+# Background writer used by log_alert() (None = write synchronously)
+alert_writer = None
+
+# Shared-memory ring of recent alerts this process publishes to (sniffer and shards)
+alert_ring = None
+
+# The sniffer's ring as attached to by a reader (the API), and when attaching was last tried
+_reader_ring = None
+_reader_checked = None
+
+
+def _json_default(value):
+    """numpy scalars as their Python value, anything else json cannot encode as a string"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def format_alert(flow_key, label, confidence=None, features=None, timestamp=None, alert_id=None):
+    """One JSON line (with newline) for an alert; see log_alert(). The id, if given, comes first."""
+    entry = {} if alert_id is None else {"id": alert_id}
+    entry["timestamp"] = time.time() if timestamp is None else timestamp
+    entry["flow"] = str(unpack_key(flow_key))
+    entry["label"] = label
+    
+    if confidence is not None:
+        entry["confidence"] = round(confidence, 4)
+    
+    if features is not None:
+        # Native values (the sniffer passes ndarray.tolist()) are encoded as they are;
+        # numpy scalars and anything else go through _json_default
+        entry["features"] = features
+    
+    return json.dumps(entry, default=_json_default) + "\n"
+
+
+def _with_ids(lines, first):
+    """Alert lines formatted without an id, encoded and numbered from first as format_alert() would"""
+    return [b'{"id": %d, ' % (first + i) + line[1:].encode() for i, line in enumerate(lines)]
+
+
+class AlertWriter:
+    """
+    Writes alerts to the log from a background thread.
+
+    log_alert() only puts the alert's fields on a bounded queue, so the
+    capture and inference threads never open files or serialize JSON. When
+    the queue is full the alert is dropped and counted rather than stalling
+    capture. The writer thread formats alerts and keeps them in memory until
+    flush_every alerts are buffered or flush_interval seconds have passed
+    since the oldest one, then appends them with a single write() on a file
+    descriptor it keeps open (O_APPEND, so shard processes sharing the log
+    never interleave within a line). With fsync each write is also synced to
+    disk. stop() writes out everything queued; the log is reopened if it is
+    moved or deleted underneath the writer. Each batch is numbered with the
+    next alert ids while it is written (see log_segments.assign_alert_ids).
+
+    After a write that takes the log past segment_bytes, or segment_seconds
+    after its first alert, the log is rotated into a numbered segment and
+    compressed on a background thread (see log_segments).
+
+    With a ring, every written batch is also published to the shared-memory
+    ring of recent alerts read by the API (see alert_ring).
+    """
+
+    def __init__(self, path=None, maxsize=ALERT_QUEUE_SIZE, flush_every=FLUSH_EVERY,
+                 flush_interval=FLUSH_INTERVAL, fsync=FSYNC, segment_bytes=SEGMENT_BYTES,
+                 segment_seconds=SEGMENT_SECONDS, ring=None):
+        self.path = Path(path or LOG_FILE)
+        self.ring = ring
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._fd = None
+        self._segment_started = None
+        self._compressor = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.writes = 0
+        self.bytes = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.rotations = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-writer", daemon=True)
+            self._thread.start()
+            # Segments left uncompressed by an earlier run
+            if any(segment.suffix != ".gz" for _, segment in list_segments(self.path)):
+                self._compress()
+        return self
+
+    def submit(self, flow_key, label, confidence=None, features=None, timestamp=None):
+        """Queue an alert (see log_alert). Returns False if it was dropped."""
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._queue.put_nowait((flow_key, label, confidence, features, timestamp))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        depth = self._queue.qsize()
+        with self._lock:
+            self.submitted += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def flush(self, timeout=5.0):
+        """Block until every alert queued so far is written. Returns False on timeout."""
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self):
+        """Write out everything already queued, then stop the thread and close the log."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._compressor is not None:
+            self._compressor.join()
+            self._compressor = None
+            # A rotation while the compressor was finishing
+            compress_pending(self.path)
+
+    def _run(self):
+        lines = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                self._write(lines)
+                lines, deadline = [], None
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+            if item is not None:
+                try:
+                    lines.append(format_alert(*item))
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    print(f"⚠️  Could not format alert: {e}")
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if len(lines) >= self.flush_every or (lines and time.monotonic() >= deadline):
+                self._write(lines)
+                lines, deadline = [], None
+
+    def _open(self):
+        """The log's descriptor, reopened if the file was rotated or deleted since the last write"""
+        if self._fd is not None:
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+                    return self._fd
+            except OSError:
+                pass
+            os.close(self._fd)
+            self._fd = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Age of the segment: from its first alert (pcap replay logs packet times, so never later than now)
+        started = first_timestamp(self.path)
+        self._segment_started = min(started, time.time()) if isinstance(started, (int, float)) else None
+        return self._fd
+
+    def _compress(self):
+        if self._compressor is None or not self._compressor.is_alive():
+            self._compressor = compress_in_background(self.path)
+
+    def _maybe_rotate(self, fd):
+        now = time.time()
+        if self._segment_started is None:
+            self._segment_started = now
+        st = os.fstat(fd)
+        if not ((self.segment_bytes and st.st_size >= self.segment_bytes)
+                or (self.segment_seconds and now - self._segment_started >= self.segment_seconds)):
+            return
+        segment = rotate(self.path, inode=st.st_ino)
+        # Rotated by us or by another process sharing the log: the next write starts a new segment
+        os.close(self._fd)
+        self._fd = None
+        if segment is not None:
+            with self._lock:
+                self.rotations += 1
+            self._compress()
+
+    def _write(self, lines):
+        if not lines:
+            return
+        try:
+            fd = self._open()
+            with assign_alert_ids(self.path, len(lines)) as first:
+                encoded = _with_ids(lines, first)
+                data = b"".join(encoded)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if self.fsync:
+                    os.fsync(fd)
+                if self.ring is not None:
+                    # After the file, so the ring never holds an alert the log does not,
+                    # and before the ids are committed, so it holds them in id order
+                    try:
+                        self.ring.publish([line[:-1] for line in encoded])
+                    except Exception as e:
+                        print(f"⚠️  Could not publish alerts to the alert ring: {e}")
+        except OSError as e:
+            with self._lock:
+                self.errors += len(lines)
+            print(f"⚠️  Could not write {len(lines)} alert(s) to {self.path}: {e}")
+            return
+        with self._lock:
+            self.written += len(lines)
+            self.writes += 1
+            self.bytes += len(data)
+        try:
+            self._maybe_rotate(fd)
+        except OSError as e:
+            print(f"⚠️  Could not rotate {self.path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "writes": self.writes,
+                "avg_batch": self.written / self.writes if self.writes else 0.0,
+                "bytes": self.bytes,
+                "errors": self.errors,
+                "fsync": self.fsync,
+                "rotations": self.rotations,
+            }
+
+    def print_report(self):
+        s = self.stats()
+        print(f"📝 Alert log: {s['written']}/{s['submitted']} alerts written in {s['writes']} writes "
+              f"(avg {s['avg_batch']:.1f}{', fsync' if s['fsync'] else ''}), "
+              f"{s['dropped']} dropped (queue full), max depth {s['max_depth']}/{s['queue_size']}, "
+              f"{s['rotations']} rotations, {s['errors']} errors")
+
+
+def start_alert_writer(path=None, **options):
+    """
+    Send log_alert() through a background AlertWriter from now on (stopped
+    and flushed at exit). options are AlertWriter's keyword arguments; the
+    writer publishes to alert_ring (see open_alert_ring) unless given a ring.
+    """
+    global alert_writer
+    stop_alert_writer(report=False)
+    options.setdefault("ring", alert_ring)
+    alert_writer = AlertWriter(path, **options).start()
+    return alert_writer
+
+
+def stop_alert_writer(report=True):
+    """Flush and stop the background writer, if any; log_alert() writes synchronously again"""
+    global alert_writer
+    writer, alert_writer = alert_writer, None
+    if writer is not None:
+        writer.stop()
+        if report:
+            writer.print_report()
+    return writer
+
+
+def open_alert_ring(name=ALERT_RING_NAME, slots=RING_SLOTS, create=True):
+    """
+    Create the shared-memory ring of recent alerts, starting with the tail of
+    the log (the sniffer), or attach to it to publish (shard processes).
+    Alert writers started afterwards publish to it.
+
+    Returns:
+        The ring, or None if it could not be set up (the API then reads the file)
+    """
+    global alert_ring
+    close_alert_ring()
+    try:
+        if create:
+            alert_ring = AlertRing.create(name, slots, preload=tail_lines(LOG_FILE, slots))
+        else:
+            alert_ring = AlertRing.attach(name)
+    except Exception as e:
+        print(f"⚠️  Alert ring unavailable, the API will read the log file: {e}")
+        alert_ring = None
+    return alert_ring
+
+
+def close_alert_ring():
+    """Detach from the ring (removing it if this process created it)"""
+    global alert_ring
+    ring, alert_ring = alert_ring, None
+    if ring is not None:
+        ring.close()
 
-def log_alert(flow_key, label, confidence=None, features=None):
+
+def _shutdown():
+    stop_alert_writer(report=False)
+    close_alert_ring()
+
+
+atexit.register(_shutdown)
+
+
+def _latest_from_ring(n):
+    """The newest n alert lines from the running sniffer's ring, None to read the file instead"""
+    global _reader_ring, _reader_checked
+    if alert_ring is not None:
+        return alert_ring.latest(n)
+    ring = _reader_ring
+    if ring is None:
+        now = time.monotonic()
+        if _reader_checked is not None and now - _reader_checked < RING_RETRY:
+            return None
+        _reader_checked = now
+        ring = _reader_ring = AlertRing.attach(ALERT_RING_NAME)
+        if ring is None:
+            return None
+    if not ring.alive():
+        # Sniffer stopped: let the segment go once no other thread is reading it
+        _reader_ring = None
+        return None
+    return ring.latest(n)
+
+
+def log_alert(flow_key, label, confidence=None, features=None, timestamp=None):
     """
     Log an alert to the JSON lines log file.
     
+    With a background writer running (start_alert_writer) this only queues
+    the alert; otherwise it is appended before returning.
+    
     Args:
-        flow_key: Tuple representing the flow (src_ip, dst_ip, src_port, dst_port, protocol)
+        flow_key: Packed flow key or (src_ip, dst_ip, src_port, dst_port, protocol) tuple;
+                  logged as the dotted-IP tuple either way
         label: Predicted label (e.g., "DDoS", "Benign", etc.)
         confidence: Optional confidence score
-        features: Optional dict of feature values
-    """
-    entry = {
-        "timestamp": time.time(),
-        "flow": str(flow_key),
-        "label": label
-    }
-    
-    if confidence is not None:
-        entry["confidence"] = round(confidence, 4)
+        features: Optional dict of feature values (not copied: do not modify it afterwards)
+        timestamp: Optional alert time (default: now); pcap replay passes packet time
     
-    if features is not None:
-        # Convert numpy types to native Python types for JSON serialization
-        features_clean = {}
-        for k, v in features.items():
-            if hasattr(v, 'item'):  # numpy scalar
-                features_clean[k] = v.item()
-            elif isinstance(v, (np.integer, np.floating)):
-                features_clean[k] = float(v) if isinstance(v, np.floating) else int(v)
-            elif isinstance(v, (int, float, str, bool)) or v is None:
-                features_clean[k] = v
-            else:
-                # Fallback: convert to string
-                features_clean[k] = str(v)
-        entry["features"] = features_clean
+    Returns:
+        False if the writer's queue was full and the alert was dropped
+    """
+    writer = alert_writer
+    if writer is not None:
+        return writer.submit(flow_key, label, confidence, features, timestamp)
     
-    with open(LOG_FILE, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    line = format_alert(flow_key, label, confidence, features, timestamp)
+    with assign_alert_ids(LOG_FILE, 1) as first, open(LOG_FILE, "ab") as f:
+        f.write(_with_ids([line], first)[0])
+        full = f.tell() >= SEGMENT_BYTES
+    if full and rotate(LOG_FILE) is not None:
+        compress_in_background(LOG_FILE)
+    return True
+
+
+def read_latest_alert_lines(n=50):
+    """
+    The latest n alerts as JSON lines (bytes, oldest first): from the running
+    sniffer's shared-memory ring when it holds them, else from the log file
+    (and its rotated segments, when the active log holds fewer than n), read
+    backwards from the end so the cost does not grow with the size of the
+    log. Lines from the file that are not valid JSON are skipped.
+    """
+    # Alerts logged by this process are read back once queued ones are written
+    if alert_writer is not None:
+        alert_writer.flush()
+    n = max(n, 0)
+    lines = _latest_from_ring(n)
+    if lines is not None:
+        return lines
+    valid = []
+    for line in tail_lines(LOG_FILE, n):
+        try:
+            json.loads(line)
+        except ValueError:
+            continue
+        valid.append(line)
+    return valid
+
+
+def latest_alert_id():
+    """
+    Id of the newest alert in the log and when it was written (ns since the
+    epoch), from the id counter alone; (0, 0) before the first alert.
+    """
+    if alert_writer is not None:
+        alert_writer.flush()
+    return last_alert_id(LOG_FILE)
+
+
+def read_alert_lines_since(since, n=50):
+    """
+    Alerts with an id above since, as JSON lines (bytes, oldest first): at
+    most the newest n of them (see read_latest_alert_lines).
+
+    Returns:
+        (lines, truncated): truncated if older alerts after since were left out
+    """
+    n = max(n, 0)
+    lines = [line for line in read_latest_alert_lines(n + 1) if (alert_id_of(line) or 0) > since]
+    return lines[-n:] if n else [], len(lines) > n
 
 
 def read_latest_alerts(n=50):
     """
-    Read the latest n alerts from the log file.
+    Read the latest n alerts (see read_latest_alert_lines).
     
     Args:
         n: Number of latest alerts to return
@@ -60,21 +478,7 @@ def read_latest_alerts(n=50):
     Returns:
         List of alert dictionaries
     """
-    if not LOG_FILE.exists():
-        return []
-    
     try:
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-            # Get last n lines
-            recent_lines = lines[-n:] if len(lines) > n else lines
-            alerts = []
-            for line in recent_lines:
-                try:
-                    alerts.append(json.loads(line.strip()))
-                except json.JSONDecodeError:
-                    continue
-            return alerts
+        return [json.loads(line) for line in read_latest_alert_lines(n)]
     except Exception:
         return []
-
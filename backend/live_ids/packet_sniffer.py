@@ -1,8 +1,8 @@
 # backend/live_ids/packet_sniffer.py
 
-from scapy.all import sniff
 import time
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -11,56 +11,117 @@ BACKEND_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(BASE_DIR))
 sys.path.insert(0, str(BACKEND_DIR))
 
+# Startup timing begins here; scapy is imported only when scapy capture is used
+try:
+    from models.startup import STARTUP
+except ImportError:
+    from backend.models.startup import STARTUP
+
 # Try different import paths
 try:
-    from live_ids.flow_manager import FlowManager
-    from live_ids.feature_extractor import extract_features
-    from live_ids.logger import log_alert
-    from models.predictor import predict_flows, load_model
+    from live_ids.flow_manager import FlowManager, flow_packet_count, flow_duration, MAX_FLOWS, ACTIVE_TIMEOUT
+    from live_ids.flow_key import ip_prefix_mask, unpack_fields, unpack_key
+    from live_ids.ip_matcher import IPMatcher
+    from live_ids.expiry_scheduler import ExpiryScheduler, EXPIRY_INTERVAL
+    from live_ids.pipeline import ScoringPipeline, WORKERS, QUEUE_SIZE, BATCH_SIZE, BATCH_DEADLINE
+    from live_ids.feature_extractor import extract_features_batch, FEATURE_COLUMNS
+    from live_ids.fast_decoder import iter_af_packet, iter_pcap_records
+    from live_ids.bpf import build_bpf_filter, check_bpf_filter
+    from live_ids.logger import (log_alert, start_alert_writer, stop_alert_writer, open_alert_ring,
+                                 close_alert_ring,
+                                 ALERT_QUEUE_SIZE, FLUSH_EVERY, FLUSH_INTERVAL,
+                                 SEGMENT_BYTES, SEGMENT_SECONDS)
+    from models.predictor import configure_prediction_cache, load_model, get_engine, start_model_watcher
 except ImportError:
     # Fallback for different execution contexts
-    from backend.live_ids.flow_manager import FlowManager
-    from backend.live_ids.feature_extractor import extract_features
-    from backend.live_ids.logger import log_alert
-    from backend.models.predictor import predict_flows, load_model
+    from backend.live_ids.flow_manager import FlowManager, flow_packet_count, flow_duration, MAX_FLOWS, ACTIVE_TIMEOUT
+    from backend.live_ids.flow_key import ip_prefix_mask, unpack_fields, unpack_key
+    from backend.live_ids.ip_matcher import IPMatcher
+    from backend.live_ids.expiry_scheduler import ExpiryScheduler, EXPIRY_INTERVAL
+    from backend.live_ids.pipeline import ScoringPipeline, WORKERS, QUEUE_SIZE, BATCH_SIZE, BATCH_DEADLINE
+    from backend.live_ids.feature_extractor import extract_features_batch, FEATURE_COLUMNS
+    from backend.live_ids.fast_decoder import iter_af_packet, iter_pcap_records
+    from backend.live_ids.bpf import build_bpf_filter, check_bpf_filter
+    from backend.live_ids.logger import (log_alert, start_alert_writer, stop_alert_writer, open_alert_ring,
+                                         close_alert_ring,
+                                         ALERT_QUEUE_SIZE, FLUSH_EVERY, FLUSH_INTERVAL,
+                                         SEGMENT_BYTES, SEGMENT_SECONDS)
+    from backend.models.predictor import configure_prediction_cache, load_model, get_engine, start_model_watcher
+
+STARTUP.imports_done()
 
 flow_manager = FlowManager()
 
+# Background expiry thread (None = expire inline from process_packet)
+expiry_scheduler = None
+
+# Inference workers fed by a bounded queue (None = score on the calling thread)
+scoring_pipeline = None
+
 # Whitelist for known benign protocols/ports
 BENIGN_WHITELIST = {
     'ports': {53, 67, 68, 123, 1900, 5353, 137, 138, 139},  # DNS, DHCP, NTP, SSDP, mDNS, NetBIOS
     'multicast_prefixes': ['224.0.0.', '239.255.255.', '239.0.0.'],  # Multicast IPs
-    'ip_prefixes': [
-        '8.8.8.',      # Google DNS
-        '8.8.4.',
-        '142.250.',    # Google (expanded)
-        '142.251.',    # Google (expanded)
-        '142.252.',    # Google (expanded)
-        '172.217.',    # Google
-        '216.58.',     # Google
-        '17.248.',     # Apple
-        '35.186.',     # GCP
-        '34.160.',     # GCP
-        '100.24.'      # AWS
-    ]
 }
 
+# Benign cloud/CDN networks (source or destination), one CIDR per line
+BENIGN_NETWORKS_FILE = Path(__file__).parent / "benign_networks.txt"
+
 # Only run ML on "interesting" ports that might be attack targets
 SUSPECT_PORTS = {21, 22, 23, 80, 8080, 443}  # FTP, SSH, Telnet, HTTP, HTTP-alt, HTTPS
 
 # Target IP address to monitor (set to None to monitor all traffic)
-TARGET_IP = " 10.7.19.211"  # Your machine's IP address
+TARGET_IP = "10.7.19.211"  # Your machine's IP address
+
+# Target networks to monitor instead of the single TARGET_IP, as a tuple of
+# CIDRs / addresses, e.g. ("10.7.19.0/24", "192.168.1.10"). None = use TARGET_IP.
+TARGET_NETWORKS = None
+
+# Address lists compiled to sorted integer intervals (see ip_matcher.py):
+# one bisect per check on the packed key's integer IPs, no string work
+MULTICAST_NETWORKS = IPMatcher(BENIGN_WHITELIST['multicast_prefixes'])
+BENIGN_NETWORKS = IPMatcher.from_file(BENIGN_NETWORKS_FILE) if BENIGN_NETWORKS_FILE.exists() else IPMatcher()
+
+PRIVATE_LAN_NET, PRIVATE_LAN_MASK = ip_prefix_mask('10.')
+
+
+def load_benign_networks(path):
+    """Replace the benign network whitelist with the CIDR list in `path`"""
+    global BENIGN_NETWORKS
+    BENIGN_NETWORKS = IPMatcher.from_file(path)
+    return BENIGN_NETWORKS
+
+
+def target_networks():
+    """Monitored networks as a list of CIDR / address strings (empty = all traffic)"""
+    if TARGET_NETWORKS:
+        return list(TARGET_NETWORKS)
+    return [TARGET_IP.strip()] if TARGET_IP else []
+
+
+@lru_cache(maxsize=8)
+def _target_matcher(target_ip, networks):
+    """IPMatcher for TARGET_NETWORKS / TARGET_IP (None = monitor all traffic)"""
+    if networks:
+        return IPMatcher(networks)
+    if target_ip:
+        return IPMatcher([target_ip.strip()])
+    return None
+
 
 def is_whitelisted(flow_key):
     """
     Check if a flow should be whitelisted as Benign based on port/IP patterns.
     Returns True if flow should be considered Benign without ML prediction.
-    """
-    if len(flow_key) < 5:
-        return False
-    
-    src_ip, dst_ip, src_port, dst_port, protocol = flow_key
     
+    Args:
+        flow_key: Packed integer flow key (see flow_key.py)
+    """
+    return _whitelisted_fields(*unpack_fields(flow_key))
+
+
+def _whitelisted_fields(src_ip, dst_ip, src_port, dst_port, protocol):
+    """is_whitelisted() on an already unpacked key (integer IPs)"""
     # Fix #1: QUIC/HTTP3 traffic (UDP 443) - whitelist all UDP:443
     # QUIC uses UDP 443 with big bursts, looks like DoS/Bruteforce to ML
     if protocol == 17 and dst_port == 443:  # UDP protocol = 17
@@ -71,202 +132,312 @@ def is_whitelisted(flow_key):
         return True
     
     # Check multicast IPs
-    for prefix in BENIGN_WHITELIST['multicast_prefixes']:
-        if dst_ip.startswith(prefix):
-            return True
+    if dst_ip in MULTICAST_NETWORKS:
+        return True
     
-    # Fix #2: Expanded cloud IP prefixes
-    for prefix in BENIGN_WHITELIST.get('ip_prefixes', []):
-        if src_ip.startswith(prefix) or dst_ip.startswith(prefix):
-            return True
+    # Fix #2: Expanded cloud IP networks (benign_networks.txt)
+    if src_ip in BENIGN_NETWORKS or dst_ip in BENIGN_NETWORKS:
+        return True
     
     return False
 
 
+def check_flow_key(flow_key):
+    """
+    Key-only part of the flow filter: everything that can be decided from
+    the 5-tuple alone, so it can run once when a flow is first seen.
+    
+    Args:
+        flow_key: Packed integer flow key (see flow_key.py)
+    
+    Returns:
+        tuple: (admit: bool, reason: str)
+    """
+    src_ip, dst_ip, src_port, dst_port, protocol = unpack_fields(flow_key)
+    
+    # Filter: Only process flows involving a target network (if TARGET_NETWORKS/TARGET_IP is set)
+    target = _target_matcher(TARGET_IP, TARGET_NETWORKS)
+    if target is not None and src_ip not in target and dst_ip not in target:
+        return False, f"Not involving target {', '.join(target_networks())}"
+    
+    # Check whitelist first (skip ML for known benign protocols)
+    if _whitelisted_fields(src_ip, dst_ip, src_port, dst_port, protocol):
+        return False, "Whitelisted port/IP"
+    
+    # Ignore private LAN traffic (10.x.x.x to 10.x.x.x)
+    # This is typically local network noise, not internet traffic like CICIDS
+    if src_ip & PRIVATE_LAN_MASK == PRIVATE_LAN_NET and dst_ip & PRIVATE_LAN_MASK == PRIVATE_LAN_NET:
+        return False, "Private LAN traffic"
+    
+    # Only run ML on "interesting" ports that might be attack targets
+    # This reduces false positives from random ports
+    if dst_port not in SUSPECT_PORTS:
+        return False, f"Non-suspect port ({dst_port})"
+    
+    return True, "OK"
+
+
+def admit_flow(flow_key):
+    """FlowManager admission check: track only flows check_flow_key() accepts"""
+    return check_flow_key(flow_key)[0]
+
+
 def should_process_flow(flow_key, flow):
     """
     Determine if a flow should be sent to ML model.
     
     Filters out flows that don't match CICIDS training data patterns:
+    - Flows rejected by the key-only checks in check_flow_key() (target IP,
+      whitelisted benign protocols, private LAN traffic, non-suspect ports).
+      With admission enabled these never reach the flow table, but they are
+      re-checked here for flow tables without it.
     - Single-packet or very small flows (< 5 packets)
     - Ultra-short flows (duration < 0.01s)
-    - Private LAN traffic (10.x.x.x to 10.x.x.x)
-    - Whitelisted benign protocols
-    - Flows not involving target IP (if TARGET_IP is set)
+    
+    Args:
+        flow_key: Packed integer flow key (see flow_key.py)
     
     Returns:
         tuple: (should_process: bool, reason: str)
     """
-    if len(flow_key) < 5:
-        return False, "Invalid flow key"
-    
-    src_ip, dst_ip, src_port, dst_port, protocol = flow_key
+    admit, reason = check_flow_key(flow_key)
+    if not admit:
+        return False, reason
     
-    # Filter: Only process flows involving target IP (if TARGET_IP is set)
-    if TARGET_IP:
-        if TARGET_IP not in [src_ip, dst_ip]:
-            return False, f"Not involving target IP {TARGET_IP}"
-    
-    # 1. Check whitelist first (skip ML for known benign protocols)
-    if is_whitelisted(flow_key):
-        return False, "Whitelisted port/IP"
+    # Calculate flow statistics
+    packet_count = flow_packet_count(flow)
+    duration = flow_duration(flow)
     
-    # 2. Calculate flow statistics
-    packet_count = len(flow['packet_sizes'])
-    if len(flow['timestamps']) > 1:
-        duration = flow['timestamps'][-1] - flow['timestamps'][0]
-    else:
-        duration = 0
-    
-    # 3. Ignore flows with < 5 packets (CICIDS never has such small flows)
+    # Ignore flows with < 5 packets (CICIDS never has such small flows)
     if packet_count < 5:
         return False, f"Too few packets ({packet_count} < 5)"
     
-    # 4. Ignore ultra-short flows (duration < 0.01s)
+    # Ignore ultra-short flows (duration < 0.01s)
     # CICIDS flows have meaningful durations (0.2s - 100s)
     if duration < 0.01:
         return False, f"Duration too short ({duration:.4f}s < 0.01s)"
     
-    # 5. Ignore private LAN traffic (10.x.x.x to 10.x.x.x)
-    # This is typically local network noise, not internet traffic like CICIDS
-    if src_ip.startswith("10.") and dst_ip.startswith("10."):
-        return False, "Private LAN traffic"
-    
-    # 6. Only run ML on "interesting" ports that might be attack targets
-    # This reduces false positives from random ports
-    if dst_port not in SUSPECT_PORTS:
-        return False, f"Non-suspect port ({dst_port})"
-    
     # Flow passes all filters - should be processed by ML
     return True, "OK"
 
-def process_packet(pkt):
-    """Process each captured packet"""
+
+def kernel_filter_expression():
+    """
+    BPF expression for the current target networks / SUSPECT_PORTS / whitelist ports.
+    
+    Packets it rejects could never pass should_process_flow(), so they can be
+    dropped in the kernel. IP-prefix whitelists and the packet-count and
+    duration checks still run in Python.
+    """
+    return build_bpf_filter(target_networks=target_networks(), suspect_ports=SUSPECT_PORTS,
+                            whitelist_ports=BENIGN_WHITELIST['ports'])
+
+
+def process_packet(pkt, timestamp=None):
+    """
+    Process each captured packet.
+    
+    Args:
+        pkt: Scapy packet
+        timestamp: Packet time used as the flow clock (default: time.time()).
+                   Replay passes the capture timestamp so runs are reproducible.
+    """
     key = flow_manager.get_flow_key(pkt)
     if key is None:
         return
 
-    size = len(pkt)
-    timestamp = time.time()
+    if timestamp is None:
+        timestamp = time.time()
+    process_record(key, len(pkt), timestamp)
+
+
+def process_record(key, size, timestamp):
+    """Feed one decoded packet (flow key, length, time) into the flow table"""
     flow_manager.update_flow(key, size, timestamp)
 
-    # Handle ended flows
-    ended = flow_manager.end_expired_flows()
+    # Without a background scheduler, handle ended flows inline
+    if expiry_scheduler is None:
+        for f_key, flow in flow_manager.end_expired_flows(now=timestamp):
+            dispatch_flow(f_key, flow, now=timestamp)
+
 
-    for f_key, flow in ended:
+def dispatch_flow(f_key, flow, now=None):
+    """Hand an ended flow to the inference workers, or score it right here. False if it was dropped."""
+    if scoring_pipeline is not None:
+        return scoring_pipeline.submit(f_key, flow, now)
+    score_flow(f_key, flow, now)
+    return True
+
+
+def score_flow(f_key, flow, now=None):
+    """
+    Filter, score and (if needed) alert on a single ended flow.
+    
+    Args:
+        now: Clock time stamped on any alert (default: time.time())
+    """
+    try:
+        should_process, _ = should_process_flow(f_key, flow)
+        if not should_process or flow_packet_count(flow) == 0:
+            return
+
+        # Make prediction with probabilities (1-row matrix, no DataFrame)
+        features = extract_features_batch([(f_key, flow)])
+        labels, confidences = get_engine().predict_labels(features, FEATURE_COLUMNS)
+        
+        handle_prediction(f_key, flow, features[0], labels[0], confidences[0], now)
+    except Exception as e:
+        print(f"Error processing flow {unpack_key(f_key)}: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+def score_flows(batch):
+    """
+    Score a micro-batch of ended flows with a single predict call.
+    
+    Features of all flows that pass the filters are extracted together
+    (extract_features_batch) into one matrix.
+    
+    Args:
+        batch: List of (f_key, flow, now) tuples
+    """
+    prepared = []
+    for f_key, flow, now in batch:
+        try:
+            should_process, _ = should_process_flow(f_key, flow)
+        except Exception as e:
+            print(f"Error processing flow {unpack_key(f_key)}: {e}")
+            continue
+        if should_process:
+            prepared.append((f_key, flow, now))
+    
+    if not prepared:
+        return
+    
+    try:
+        features = extract_features_batch([(f_key, flow) for f_key, flow, _ in prepared])
+        labels, confidences = get_engine().predict_labels(features, FEATURE_COLUMNS)
+    except Exception as e:
+        print(f"Error scoring batch of {len(prepared)} flows: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+    
+    for (f_key, flow, now), row, label, confidence in zip(prepared, features, labels, confidences):
         try:
-            # Apply comprehensive filtering before ML prediction
-            should_process, reason = should_process_flow(f_key, flow)
-            
-            if not should_process:
-                # Flow filtered out - skip ML prediction
-                # Uncomment for debugging: print(f"⏭️  Filtered: {reason} - Flow {f_key[:2]}")
-                continue
-            
-            # Extract features
-            df = extract_features(f_key, flow)
-            if df is None:
-                continue
-
-            # Make prediction with probabilities
-            result = predict_flows(df)
-            label = result["predicted_label"].iloc[0]
-            confidence = result["prediction_confidence"].iloc[0]
-            
-            # Calculate flow stats once for validation and debugging
-            packet_count = len(flow['packet_sizes'])
-            if len(flow['timestamps']) > 1:
-                duration = flow['timestamps'][-1] - flow['timestamps'][0]
-            else:
-                duration = 0
-            
-            protocol = f_key[4] if len(f_key) >= 5 else 0
-            protocol_name = {6: "TCP", 17: "UDP", 1: "ICMP"}.get(protocol, f"Proto-{protocol}")
-            
-            # Debug: Print protocol and key features
-            print(f"🔍 Flow {f_key[:2]} Protocol={protocol_name}({protocol}), "
-                  f"Packets={packet_count}, "
-                  f"Duration={duration:.3f}s, "
-                  f"Prediction={label} (Confidence: {confidence:.4f})")
-
-            # Fix #3: Protocol-based validation
-            # UDP flows can NEVER be Bruteforce or Infiltration (these are TCP-only attacks)
-            if protocol == 17 and label in ["Bruteforce", "Infiltration"]:  # UDP = 17
-                print(f"⚠️  Rejected: {label} on UDP flow (impossible attack signature) - Flow {f_key[:2]}")
-                continue  # Ignore impossible predictions
-            
-            # Fix #4: Realistic flow validation for Bruteforce
-            # CICIDS Bruteforce flows were: TCP only, 30-200 packets, duration >1s, ports 22/80/443
-            if label == "Bruteforce":
-                # Bruteforce must be TCP (protocol 6)
-                if protocol != 6:
-                    print(f"⚠️  Rejected: Bruteforce on non-TCP flow (protocol {protocol}) - Flow {f_key[:2]}")
-                    continue
-                
-                # Bruteforce must have at least 30 packets (CICIDS minimum)
-                if packet_count < 30:
-                    print(f"⚠️  Rejected: Bruteforce with only {packet_count} packets (need 30+) - Flow {f_key[:2]}")
-                    continue
-                
-                # Bruteforce must have duration > 1s
-                if duration < 1.0:
-                    print(f"⚠️  Rejected: Bruteforce with duration {duration:.3f}s (need >1s) - Flow {f_key[:2]}")
-                    continue
-            
-            # Fix #5: Realistic flow validation for Infiltration
-            # CICIDS Infiltration flows were: TCP only, 50+ packets, duration >2s, sustained connections
-            if label == "Infiltration":
-                # Infiltration must be TCP (protocol 6)
-                if protocol != 6:
-                    print(f"⚠️  Rejected: Infiltration on non-TCP flow (protocol {protocol}) - Flow {f_key[:2]}")
-                    continue
-                
-                # Infiltration must have at least 50 packets (CICIDS minimum)
-                if packet_count < 50:
-                    print(f"⚠️  Rejected: Infiltration with only {packet_count} packets (need 50+) - Flow {f_key[:2]}")
-                    continue
-                
-                # Infiltration must have duration > 2s (sustained attack)
-                if duration < 2.0:
-                    print(f"⚠️  Rejected: Infiltration with duration {duration:.3f}s (need >2s) - Flow {f_key[:2]}")
-                    continue
-            
-            # Fix #6: Low confidence override - treat low confidence predictions as Benign
-            # If confidence is too low (< 0.7), the model is uncertain - treat as Benign
-            if label != "Benign" and confidence < 0.7:
-                print(f"⚠️  Low confidence ({confidence:.4f}) - treating {label} as Benign - Flow {f_key[:2]}")
-                label = "Benign"  # Override to Benign for low confidence
-            
-            # Only alert if:
-            # 1. Not Benign (after all validations) AND
-            # 2. Confidence meets class-specific threshold
-            #    - Infiltration/Bruteforce: 0.99 (very high - these are often false positives)
-            #    - Other classes: 0.9 (high confidence)
-            if label != "Benign":
-                if label in ["Infiltration", "Bruteforce"]:
-                    min_conf = 0.99
-                else:
-                    min_conf = 0.9
-                
-                if confidence >= min_conf:
-                    # Extract features dict for logging
-                    features_dict = df.iloc[0].to_dict()
-                    log_alert(f_key, label, confidence, features_dict)
-                    print(f"🚨 ALERT: {label} detected on flow {f_key} (Confidence: {confidence:.4f})")
-            else:
-                # Optional: print benign flows for debugging (can be removed in production)
-                # print(f"✅ BENIGN: Flow {f_key[:2]} (Confidence: {confidence:.4f})")
-                pass
-            # else:
-                # Optional: print benign flows for debugging (can be removed)
-                # print(f"✅ BENIGN: {label} detected on flow {f_key} (Confidence: {confidence:.4f})")
+            handle_prediction(f_key, flow, row, label, confidence, now)
         except Exception as e:
-            print(f"Error processing flow {f_key}: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"Error processing flow {unpack_key(f_key)}: {e}")
 
 
-def start_sniffer(interface=None, target_ip=None):
+def handle_prediction(f_key, flow, features, label, confidence, now=None):
+    """
+    Validate one flow's prediction and log an alert if it holds up.
+    
+    Args:
+        features: The flow's feature row (FEATURE_COLUMNS order)
+    """
+    # Calculate flow stats once for validation and debugging
+    packet_count = flow_packet_count(flow)
+    duration = flow_duration(flow)
+    
+    # Decode the packed key to dotted IPs once, for the messages below
+    flow_ips = unpack_key(f_key)
+    protocol = flow_ips[4]
+    protocol_name = {6: "TCP", 17: "UDP", 1: "ICMP"}.get(protocol, f"Proto-{protocol}")
+    
+    # Debug: Print protocol and key features
+    print(f"🔍 Flow {flow_ips[:2]} Protocol={protocol_name}({protocol}), "
+          f"Packets={packet_count}, "
+          f"Duration={duration:.3f}s, "
+          f"Prediction={label} (Confidence: {confidence:.4f})")
+
+    # Fix #3: Protocol-based validation
+    # UDP flows can NEVER be Bruteforce or Infiltration (these are TCP-only attacks)
+    if protocol == 17 and label in ["Bruteforce", "Infiltration"]:  # UDP = 17
+        print(f"⚠️  Rejected: {label} on UDP flow (impossible attack signature) - Flow {flow_ips[:2]}")
+        return  # Ignore impossible predictions
+    
+    # Fix #4: Realistic flow validation for Bruteforce
+    # CICIDS Bruteforce flows were: TCP only, 30-200 packets, duration >1s, ports 22/80/443
+    if label == "Bruteforce":
+        # Bruteforce must be TCP (protocol 6)
+        if protocol != 6:
+            print(f"⚠️  Rejected: Bruteforce on non-TCP flow (protocol {protocol}) - Flow {flow_ips[:2]}")
+            return
+        
+        # Bruteforce must have at least 30 packets (CICIDS minimum)
+        if packet_count < 30:
+            print(f"⚠️  Rejected: Bruteforce with only {packet_count} packets (need 30+) - Flow {flow_ips[:2]}")
+            return
+        
+        # Bruteforce must have duration > 1s
+        if duration < 1.0:
+            print(f"⚠️  Rejected: Bruteforce with duration {duration:.3f}s (need >1s) - Flow {flow_ips[:2]}")
+            return
+    
+    # Fix #5: Realistic flow validation for Infiltration
+    # CICIDS Infiltration flows were: TCP only, 50+ packets, duration >2s, sustained connections
+    if label == "Infiltration":
+        # Infiltration must be TCP (protocol 6)
+        if protocol != 6:
+            print(f"⚠️  Rejected: Infiltration on non-TCP flow (protocol {protocol}) - Flow {flow_ips[:2]}")
+            return
+        
+        # Infiltration must have at least 50 packets (CICIDS minimum)
+        if packet_count < 50:
+            print(f"⚠️  Rejected: Infiltration with only {packet_count} packets (need 50+) - Flow {flow_ips[:2]}")
+            return
+        
+        # Infiltration must have duration > 2s (sustained attack)
+        if duration < 2.0:
+            print(f"⚠️  Rejected: Infiltration with duration {duration:.3f}s (need >2s) - Flow {flow_ips[:2]}")
+            return
+    
+    # Fix #6: Low confidence override - treat low confidence predictions as Benign
+    # If confidence is too low (< 0.7), the model is uncertain - treat as Benign
+    if label != "Benign" and confidence < 0.7:
+        print(f"⚠️  Low confidence ({confidence:.4f}) - treating {label} as Benign - Flow {flow_ips[:2]}")
+        label = "Benign"  # Override to Benign for low confidence
+    
+    # Only alert if:
+    # 1. Not Benign (after all validations) AND
+    # 2. Confidence meets class-specific threshold
+    #    - Infiltration/Bruteforce: 0.99 (very high - these are often false positives)
+    #    - Other classes: 0.9 (high confidence)
+    if label != "Benign":
+        if label in ["Infiltration", "Bruteforce"]:
+            min_conf = 0.99
+        else:
+            min_conf = 0.9
+        
+        if confidence >= min_conf:
+            # Extract features dict for logging
+            features_dict = dict(zip(FEATURE_COLUMNS, features.tolist()))
+            log_alert(f_key, label, confidence, features_dict, timestamp=now)
+            print(f"🚨 ALERT: {label} detected on flow {flow_ips} (Confidence: {confidence:.4f})")
+    else:
+        # Optional: print benign flows for debugging (can be removed in production)
+        # print(f"✅ BENIGN: Flow {flow_ips[:2]} (Confidence: {confidence:.4f})")
+        pass
+    # else:
+        # Optional: print benign flows for debugging (can be removed)
+        # print(f"✅ BENIGN: {label} detected on flow {flow_ips} (Confidence: {confidence:.4f})")
+
+
+def print_cache_report():
+    """Prediction cache hit rate and size, if the cache is on"""
+    cache = get_engine().cache
+    if cache is not None:
+        cache.print_report()
+
+
+def start_sniffer(interface=None, target_ip=None, expiry_interval=EXPIRY_INTERVAL, fast=False,
+                  workers=WORKERS, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                  batch_deadline=BATCH_DEADLINE, streaming=False, max_flows=MAX_FLOWS,
+                  active_timeout=ACTIVE_TIMEOUT, kernel_filter=True, admission=True,
+                  target_nets=None):
     """
     Start the packet sniffer.
     
@@ -274,39 +445,209 @@ def start_sniffer(interface=None, target_ip=None):
         interface: Network interface name (e.g., 'en0' for macOS, 'eth0' for Linux)
                    If None, uses default interface
         target_ip: IP address to monitor (if None, uses TARGET_IP constant or monitors all)
+        expiry_interval: Seconds between background expiry sweeps
+                         (0 = expire flows inline on each packet)
+        fast: Capture from an AF_PACKET socket with the struct header decoder
+              instead of scapy (Linux only)
+        workers: Inference worker threads (0 = score on the expiry/capture thread)
+        queue_size: Ended flows that may wait for a worker before new ones are dropped
+        batch_size: Max flows per predict call (1 = score flows one at a time)
+        batch_deadline: Seconds a worker waits to fill a batch
+        streaming: Keep O(1) running statistics per flow instead of packet lists
+        max_flows: Flow table size (None = unbounded); the least recently seen
+                   flow is evicted and scored when a new flow would exceed it
+        active_timeout: Seconds after which a still-active flow is exported
+                        and scored (None = only on inactivity)
+        kernel_filter: Drop out-of-scope packets in the kernel with a BPF
+                       filter built from the sniffer settings (needs libpcap)
+        admission: Run the key-only filters when a flow is first seen and
+                   never track refused flows (see check_flow_key)
+        target_nets: CIDRs / addresses to monitor instead of a single target IP
     """
-    global TARGET_IP
+    global TARGET_IP, TARGET_NETWORKS, expiry_scheduler, scoring_pipeline, flow_manager
     if target_ip:
         TARGET_IP = target_ip
+    if target_nets:
+        TARGET_NETWORKS = tuple(target_nets)
+    try:
+        _target_matcher(TARGET_IP, TARGET_NETWORKS)
+    except ValueError as e:
+        print(f"ERROR: Invalid target IP/network: {e}")
+        return
     
     # Load model first
     if not load_model():
         print("ERROR: Failed to load ML model. Cannot start sniffer.")
         return
+    with STARTUP.phase("warm-up"):
+        get_engine().warm_up()
+    sniff = None
+    if not fast:
+        with STARTUP.phase("scapy import"):
+            sniff = scapy_sniff()
     
     print("=" * 70)
     print("🖥️  Live IDS - Network Traffic Monitoring")
     print("=" * 70)
-    if TARGET_IP:
-        print(f"📡 Monitoring traffic for IP: {TARGET_IP}")
-        print(f"   (Only flows involving {TARGET_IP} will be analyzed)")
+    if target_networks():
+        targets = ", ".join(target_networks())
+        print(f"📡 Monitoring traffic for: {targets}")
+        print(f"   (Only flows involving {targets} will be analyzed)")
     else:
         print("📡 Monitoring ALL traffic on interface")
     print(f"🌐 Interface: {interface or 'default'}")
+    if fast:
+        print("⚡ Fast path: raw AF_PACKET capture, scapy-free header decoding")
+    if expiry_interval:
+        print(f"⏱️  Flow expiry sweep every {expiry_interval}s")
+    print(f"📊 Flow table: max {max_flows or 'unbounded'} flows, "
+          f"active timeout {active_timeout or 'off'}{'s' if active_timeout else ''}")
+    if workers:
+        print(f"🧵 {workers} inference worker(s), queue size {queue_size}, "
+              f"batches of up to {batch_size} flows / {batch_deadline * 1000:.0f} ms")
+    bpf = None
+    if kernel_filter:
+        bpf = kernel_filter_expression()
+        ok, error = check_bpf_filter(bpf, interface)
+        if ok:
+            print(f"🧰 Kernel BPF filter: {bpf}")
+        else:
+            print(f"⚠️  Kernel BPF filter unavailable ({error}) - filtering in Python only")
+            bpf = None
+    STARTUP.report()
     print("=" * 70)
     print("Press Ctrl+C to stop")
     print()
     
+    flow_manager = FlowManager(streaming=streaming, max_flows=max_flows, active_timeout=active_timeout,
+                               admit=admit_flow if admission else None)
+    if expiry_interval:
+        # With workers, lateness is recorded once they have scored the flow
+        expiry_scheduler = ExpiryScheduler(flow_manager, dispatch_flow, interval=expiry_interval,
+                                           deferred=bool(workers))
+    if workers:
+        on_scored = expiry_scheduler.record_scored if expiry_scheduler is not None else None
+        scoring_pipeline = ScoringPipeline(score_flow, workers=workers, maxsize=queue_size,
+                                           batch_handler=score_flows, batch_size=batch_size,
+                                           batch_deadline=batch_deadline, on_scored=on_scored).start()
+    if expiry_scheduler is not None:
+        expiry_scheduler.start()
+    
+    # Packets that reached userspace, to compare runs with and without the kernel filter
+    received = [0]
+    capture_start = time.perf_counter()
+    
+    def on_packet(pkt):
+        received[0] += 1
+        process_packet(pkt)
+    
     try:
-        if interface:
-            sniff(iface=interface, prn=process_packet, store=False)
+        if fast:
+            for key, size, timestamp, _flags in iter_af_packet(interface, bpf_filter=bpf):
+                received[0] += 1
+                if key is not None:
+                    process_record(key, size, timestamp)
+        elif interface:
+            sniff(iface=interface, prn=on_packet, store=False, filter=bpf)
         else:
             # Use default interface
-            sniff(prn=process_packet, store=False)
+            sniff(prn=on_packet, store=False, filter=bpf)
     except KeyboardInterrupt:
         print("\nStopping packet sniffer...")
     except Exception as e:
         print(f"Error in packet sniffer: {e}")
+    finally:
+        if expiry_scheduler is not None:
+            expiry_scheduler.stop()
+        if scoring_pipeline is not None:
+            scoring_pipeline.stop()
+            scoring_pipeline.print_report()
+            scoring_pipeline = None
+        if expiry_scheduler is not None:
+            # After the workers: the last flows are only scored once they have drained
+            expiry_scheduler.print_report()
+            expiry_scheduler = None
+        stop_alert_writer()
+        close_alert_ring()
+        flow_manager.print_report()
+        print_cache_report()
+        elapsed = time.perf_counter() - capture_start
+        print(f"📦 {received[0]} packets reached userspace in {elapsed:.1f}s "
+              f"({received[0] / elapsed if elapsed > 0 else 0:.0f} packets/sec, "
+              f"kernel filter {'on' if bpf else 'off'})")
+
+
+def scapy_sniff():
+    """
+    scapy's sniff() with only the layers flow keys need: scapy.layers.inet
+    registers Ether/IP/TCP/UDP, where scapy.all loads every protocol scapy has.
+    """
+    import scapy.layers.inet  # noqa: F401
+    from scapy.sendrecv import sniff
+    return sniff
+
+
+def _scapy_records(path):
+    """(flow_key, length, timestamp) for each packet, dissected by scapy"""
+    import scapy.layers.inet  # noqa: F401
+    from scapy.utils import PcapReader
+    
+    with PcapReader(str(path)) as reader:
+        for pkt in reader:
+            yield flow_manager.get_flow_key(pkt), len(pkt), float(pkt.time)
+
+
+def replay_pcap(path, speed=None, fast=False):
+    """
+    Run a recorded pcap/pcapng through the live pipeline.
+    
+    Packets are streamed from disk (no rdpcap) and the flow clock follows each
+    packet's capture timestamp, so a replay always ends and scores the same
+    flows. Flows still open at the end of the file are flushed and scored.
+    
+    Args:
+        path: Path to the capture file
+        speed: Replay rate - None/0 = as fast as possible, 1.0 = real time,
+               N = N times real time
+        fast: Decode headers with the struct fast path (classic pcap only)
+    
+    Returns:
+        dict with packet count, capture span, wall time and packets/sec
+    """
+    if fast:
+        records = ((key, size, ts) for key, size, ts, _flags in iter_pcap_records(path))
+    else:
+        records = _scapy_records(path)
+    
+    packets = 0
+    first_ts = last_ts = None
+    wall_start = time.perf_counter()
+    
+    for key, size, ts in records:
+        if first_ts is None:
+            first_ts = ts
+        elif speed:
+            # Pace against the capture clock
+            delay = (ts - first_ts) / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+        last_ts = ts
+        packets += 1
+        if key is not None:
+            process_record(key, size, ts)
+    
+    # End of capture: flush every flow that is still open
+    if last_ts is not None:
+        for f_key, flow in flow_manager.end_expired_flows(now=float("inf")):
+            dispatch_flow(f_key, flow, now=last_ts)
+    
+    wall = time.perf_counter() - wall_start
+    return {
+        "packets": packets,
+        "capture_seconds": (last_ts - first_ts) if packets else 0.0,
+        "wall_seconds": wall,
+        "packets_per_sec": packets / wall if wall > 0 else 0.0,
+    }
 
 
 if __name__ == "__main__":
@@ -315,6 +656,61 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Live IDS Packet Sniffer')
     parser.add_argument('--iface', type=str, help='Network interface name (e.g., en0, eth0)')
     parser.add_argument('--target-ip', type=str, help='IP address to monitor (default: 10.7.19.211)')
+    parser.add_argument('--target-net', type=str,
+                        help='Comma-separated CIDRs/IPs to monitor instead of --target-ip (e.g. 10.7.19.0/24,192.168.1.10)')
+    parser.add_argument('--benign-networks', type=str,
+                        help=f'CIDR list file of benign networks to whitelist (default: {BENIGN_NETWORKS_FILE.name})')
+    parser.add_argument('--expiry-interval', type=float, default=EXPIRY_INTERVAL,
+                        help=f'Seconds between flow expiry sweeps, 0 = inline per packet (default: {EXPIRY_INTERVAL})')
+    parser.add_argument('--pcap', type=str, help='Replay a pcap/pcapng file instead of live capture')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Replay speed for --pcap: 1 = real time, N = Nx, 0 = as fast as possible (default: 0)')
+    parser.add_argument('--fast', action='store_true',
+                        help='Scapy-free header decoding (AF_PACKET socket live, classic pcap for --pcap)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f'Inference worker threads, 0 = score inline (default: {WORKERS} live, 0 for --pcap)')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help=f'Max ended flows waiting for inference before drops (default: {QUEUE_SIZE})')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Max flows per predict call, 1 = per-flow scoring (default: {BATCH_SIZE})')
+    parser.add_argument('--batch-deadline-ms', type=float, default=BATCH_DEADLINE * 1000,
+                        help=f'Max ms a worker waits to fill a batch (default: {BATCH_DEADLINE * 1000:.0f})')
+    parser.add_argument('--streaming-stats', action='store_true',
+                        help='Constant-memory running flow statistics instead of per-packet lists')
+    parser.add_argument('--max-flows', type=int, default=MAX_FLOWS,
+                        help=f'Flow table size, LRU flow evicted and scored beyond it, 0 = unbounded (default: {MAX_FLOWS})')
+    parser.add_argument('--active-timeout', type=float, default=ACTIVE_TIMEOUT,
+                        help=f'Export flows still active after this many seconds, 0 = off (default: {ACTIVE_TIMEOUT})')
+    parser.add_argument('--no-kernel-filter', action='store_true',
+                        help='Do not attach the generated BPF filter; every packet reaches userspace')
+    parser.add_argument('--no-admission', action='store_true',
+                        help='Track every flow; apply the key-only filters at expiry instead of at the first packet')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='Track and score flows in N processes sharded by flow-key hash, 0 = off (default: 0)')
+    parser.add_argument('--prediction-cache', type=int, default=0,
+                        help='Cache predictions of up to N quantized feature vectors (repetitive floods), 0 = off (default: 0)')
+    parser.add_argument('--cache-max-error', type=float, default=0.0,
+                        help='Max probability difference a cached verdict may have from exact inference, '
+                             '0 = identical (default: 0)')
+    parser.add_argument('--watch-model', type=float, default=0,
+                        help='Hot-reload the model when its files change, checking every N seconds, 0 = off (default: 0)')
+    parser.add_argument('--alert-queue', type=int, default=ALERT_QUEUE_SIZE,
+                        help=f'Alerts buffered for the background log writer before drops, '
+                             f'0 = write each alert synchronously (default: {ALERT_QUEUE_SIZE})')
+    parser.add_argument('--alert-flush-every', type=int, default=FLUSH_EVERY,
+                        help=f'Write the alert log after N buffered alerts (default: {FLUSH_EVERY})')
+    parser.add_argument('--alert-flush-ms', type=float, default=FLUSH_INTERVAL * 1000,
+                        help=f'...or N ms after the oldest buffered alert (default: {FLUSH_INTERVAL * 1000:.0f})')
+    parser.add_argument('--alert-fsync', action='store_true',
+                        help='fsync the alert log after every write')
+    parser.add_argument('--alert-segment-mb', type=float, default=SEGMENT_BYTES / 2**20,
+                        help=f'Rotate the alert log into a compressed segment at N MiB, 0 = off '
+                             f'(default: {SEGMENT_BYTES / 2**20:.0f})')
+    parser.add_argument('--alert-segment-hours', type=float, default=SEGMENT_SECONDS / 3600,
+                        help=f'...or N hours after its first alert, 0 = off (default: {SEGMENT_SECONDS / 3600:g})')
+    parser.add_argument('--no-alert-ring', action='store_true',
+                        help='Do not publish recent alerts to the shared-memory ring the API reads '
+                             '(the API then reads the log file)')
     parser.add_argument('interface', nargs='?', help='Network interface name (positional argument)')
     
     args = parser.parse_args()
@@ -325,5 +721,90 @@ if __name__ == "__main__":
     # Use --target-ip if provided, otherwise use default from TARGET_IP constant
     target_ip = args.target_ip if args.target_ip else TARGET_IP
     
-    start_sniffer(interface, target_ip)
+    target_nets = tuple(n.strip() for n in args.target_net.split(',') if n.strip()) if args.target_net else None
+    if args.benign_networks:
+        print(f"📋 Benign networks: {load_benign_networks(args.benign_networks)!r} from {args.benign_networks}")
+    
+    max_flows = args.max_flows or None
+    active_timeout = args.active_timeout or None
+    if args.prediction_cache:
+        configure_prediction_cache(args.prediction_cache, args.cache_max_error)
+    if args.watch_model and not args.shards:
+        start_model_watcher(args.watch_model, available_features=FEATURE_COLUMNS)
+        print(f"👀 Hot model reload: checking the model files every {args.watch_model:g}s")
+    alert_writer_options = dict(maxsize=args.alert_queue, flush_every=args.alert_flush_every,
+                                flush_interval=args.alert_flush_ms / 1000, fsync=args.alert_fsync,
+                                segment_bytes=int(args.alert_segment_mb * 2**20),
+                                segment_seconds=args.alert_segment_hours * 3600)
+    alert_ring = None
+    if args.alert_queue and not args.no_alert_ring:
+        alert_ring = open_alert_ring()
+        if alert_ring is not None:
+            print(f"📢 Alert ring: newest {alert_ring.slots} alerts in shared memory '{alert_ring.name}' for the API")
+    if args.alert_queue and not args.shards:
+        start_alert_writer(**alert_writer_options)
+        print(f"📝 Alert log: background writer, queue {args.alert_queue}, written every "
+              f"{args.alert_flush_every} alerts / {args.alert_flush_ms:.0f} ms{', fsync' if args.alert_fsync else ''}")
+    
+    if args.shards:
+        try:
+            from live_ids.sharded import replay_pcap_sharded, start_sharded_sniffer
+        except ImportError:
+            from backend.live_ids.sharded import replay_pcap_sharded, start_sharded_sniffer
+        
+        options = dict(streaming=args.streaming_stats, max_flows=max_flows, active_timeout=active_timeout,
+                       admission=not args.no_admission, target_networks=target_nets,
+                       benign_networks=args.benign_networks,
+                       prediction_cache=(args.prediction_cache, args.cache_max_error),
+                       watch_model=args.watch_model, alert_writer=alert_writer_options,
+                       alert_ring=alert_ring.name if alert_ring is not None else None)
+        if args.pcap:
+            print(f"📼 Replaying {args.pcap} across {args.shards} shard(s) (speed: max)")
+            stats, shard_stats = replay_pcap_sharded(args.pcap, shards=args.shards, target_ip=target_ip,
+                                                     fast=args.fast, **options)
+            for s in shard_stats:
+                print(f"   shard {s['shard']}: {s['packets']} packets, {s['flows_ended']} flows ended")
+            print(f"✅ Replayed {stats['packets']} packets in {stats['wall_seconds']:.2f}s "
+                  f"- {stats['packets_per_sec']:.0f} packets/sec")
+        else:
+            start_sharded_sniffer(interface, shards=args.shards, target_ip=target_ip, fast=args.fast,
+                                  kernel_filter=not args.no_kernel_filter,
+                                  expiry_interval=args.expiry_interval, **options)
+        close_alert_ring()
+    elif args.pcap:
+        TARGET_IP = target_ip
+        TARGET_NETWORKS = target_nets
+        flow_manager = FlowManager(streaming=args.streaming_stats, max_flows=max_flows,
+                                   active_timeout=active_timeout,
+                                   admit=None if args.no_admission else admit_flow)
+        if not load_model():
+            print("ERROR: Failed to load ML model. Cannot replay capture.")
+            sys.exit(1)
+        with STARTUP.phase("warm-up"):
+            get_engine().warm_up()
+        STARTUP.report()
+        print(f"📼 Replaying {args.pcap} (speed: {args.speed or 'max'})")
+        if args.workers:
+            scoring_pipeline = ScoringPipeline(score_flow, workers=args.workers, maxsize=args.queue_size,
+                                               batch_handler=score_flows, batch_size=args.batch_size,
+                                               batch_deadline=args.batch_deadline_ms / 1000).start()
+        stats = replay_pcap(args.pcap, speed=args.speed, fast=args.fast)
+        if scoring_pipeline is not None:
+            scoring_pipeline.stop()
+            scoring_pipeline.print_report()
+        stop_alert_writer()
+        close_alert_ring()
+        flow_manager.print_report()
+        print_cache_report()
+        print(f"✅ Replayed {stats['packets']} packets "
+              f"({stats['capture_seconds']:.1f}s of capture) in {stats['wall_seconds']:.2f}s "
+              f"- {stats['packets_per_sec']:.0f} packets/sec")
+    else:
+        workers = WORKERS if args.workers is None else args.workers
+        start_sniffer(interface, target_ip, expiry_interval=args.expiry_interval, fast=args.fast,
+                      workers=workers, queue_size=args.queue_size, batch_size=args.batch_size,
+                      batch_deadline=args.batch_deadline_ms / 1000, streaming=args.streaming_stats,
+                      max_flows=max_flows, active_timeout=active_timeout,
+                      kernel_filter=not args.no_kernel_filter, admission=not args.no_admission,
+                      target_nets=target_nets)
 
@@ -0,0 +1,148 @@
+# backend/live_ids/pipeline.py
+
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 10000  # ended flows waiting for inference
+WORKERS = 1
+BATCH_SIZE = 256  # max flows per predict call in micro-batch mode
+BATCH_DEADLINE = 0.05  # seconds a worker waits to fill a batch
+
+_STOP = object()
+
+
+class ScoringPipeline:
+    """
+    Bounded queue between the capture stage and inference workers.
+
+    The capture side calls submit(), which never blocks: when the queue is
+    full the flow is dropped and counted, so a slow model can never stall
+    packet capture. Worker threads take flows off the queue and run the
+    handler (feature extraction, prediction, validation, alerting).
+
+    With a batch_handler and batch_size > 1, each worker collects up to
+    batch_size flows, waiting at most batch_deadline seconds after the first
+    one, and hands the whole list of (key, flow, now) to batch_handler so the
+    model is called once per batch instead of once per flow.
+
+    on_scored, if given, is called with each list of (key, flow, now) after
+    its handler has returned (ExpiryScheduler.record_scored measures lateness).
+    """
+
+    def __init__(self, handler, workers=WORKERS, maxsize=QUEUE_SIZE,
+                 batch_handler=None, batch_size=1, batch_deadline=BATCH_DEADLINE, on_scored=None):
+        self.handler = handler
+        self.on_scored = on_scored
+        self.workers = workers
+        self.batch_handler = batch_handler
+        self.batch_size = batch_size if batch_handler is not None else 1
+        self.batch_deadline = batch_deadline
+        self._queue = queue.Queue(maxsize)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.scored = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"ids-inference-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, key, flow, now=None):
+        """Queue an ended flow for scoring. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((key, flow, now))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        depth = self._queue.qsize()
+        with self._lock:
+            self.submitted += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if self.batch_size <= 1:
+                self._score([item], self.handler, item)
+                continue
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_deadline
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._score(batch, self.batch_handler, (batch,))
+            if stop:
+                return
+
+    def _score(self, batch, handler, args):
+        try:
+            handler(*args)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Error in inference worker: {e}")
+        finally:
+            with self._lock:
+                self.scored += len(batch)
+                self.batches += 1
+            if self.on_scored is not None:
+                try:
+                    self.on_scored(batch)
+                except Exception as e:
+                    print(f"Error in inference worker: {e}")
+
+    def stop(self):
+        """Let workers finish everything already queued, then stop them."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "batch_size": self.batch_size,
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "scored": self.scored,
+                "batches": self.batches,
+                "avg_batch": self.scored / self.batches if self.batches else 0.0,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+    def print_report(self):
+        s = self.stats()
+        print(f"🧵 Inference: {s['workers']} worker(s), {s['scored']}/{s['submitted']} flows scored, "
+              f"{s['dropped']} dropped (queue full), depth {s['queue_depth']}/{s['queue_size']} "
+              f"(max {s['max_depth']}), avg batch {s['avg_batch']:.1f}, {s['errors']} errors")
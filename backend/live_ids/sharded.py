@@ -0,0 +1,386 @@
+# backend/live_ids/sharded.py
+
+"""
+Multi-process sharded flow tracking and scoring.
+
+One dispatcher (the capture process) decodes packets and hashes each flow
+key onto one of N shard processes. Each shard owns its own FlowManager, its
+own copy of the model and runs the normal filter/predict/validate/alert path
+from packet_sniffer, so capture, flow tracking and inference scale across
+cores instead of sharing one GIL. Alerts from every shard go to the same
+JSON lines log (one appended write per alert).
+
+The hash is symmetric: both directions of a connection land on the same
+shard. Records are shipped to shards in batches to keep IPC cost per packet
+small.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+try:
+    from live_ids.flow_key import unpack_fields
+    from live_ids.flow_manager import MAX_FLOWS, ACTIVE_TIMEOUT
+    from live_ids.expiry_scheduler import EXPIRY_INTERVAL
+except ImportError:
+    from backend.live_ids.flow_key import unpack_fields
+    from backend.live_ids.flow_manager import MAX_FLOWS, ACTIVE_TIMEOUT
+    from backend.live_ids.expiry_scheduler import EXPIRY_INTERVAL
+
+SHARDS = 2
+DISPATCH_BATCH = 512  # packet records per IPC message
+DISPATCH_DEADLINE = 0.05  # seconds after its first record a partial batch is sent
+SHARD_QUEUE_SIZE = 256  # batches waiting per shard before live capture drops
+
+_MIX = 0x9E3779B97F4A7C15  # 64-bit golden-ratio multiplier
+_MASK64 = (1 << 64) - 1
+
+
+def shard_of(key, shards):
+    """
+    Shard index for a packed flow key, the same for both directions.
+
+    The (ip, port) endpoints are ordered before mixing, so A:p -> B:q and
+    B:q -> A:p hash alike. Deterministic across processes (no hash() salt).
+    """
+    src_ip, dst_ip, src_port, dst_port, protocol = unpack_fields(key)
+    a = (src_ip << 16) | src_port
+    b = (dst_ip << 16) | dst_port
+    if a > b:
+        a, b = b, a
+    h = (a * _MIX) & _MASK64
+    h = ((h ^ b ^ protocol) * _MIX) & _MASK64
+    return (h >> 32) % shards
+
+
+def _shard_main(shard_id, inbox, results, options):
+    """Shard process: own flow table + model, fed batches of (key, size, ts)"""
+    try:
+        from live_ids import packet_sniffer as sniffer
+        from live_ids.flow_manager import FlowManager
+    except ImportError:
+        from backend.live_ids import packet_sniffer as sniffer
+        from backend.live_ids.flow_manager import FlowManager
+
+    if options["target_ip"] is not None:
+        sniffer.TARGET_IP = options["target_ip"]
+    if options["target_networks"]:
+        sniffer.TARGET_NETWORKS = tuple(options["target_networks"])
+    if options["benign_networks"]:
+        sniffer.load_benign_networks(options["benign_networks"])
+    manager = FlowManager(streaming=options["streaming"], max_flows=options["max_flows"],
+                          active_timeout=options["active_timeout"],
+                          admit=sniffer.admit_flow if options["admission"] else None)
+    sniffer.flow_manager = manager
+    if options["prediction_cache"][0]:
+        sniffer.configure_prediction_cache(*options["prediction_cache"])
+    if not sniffer.load_model():
+        results.put({"shard": shard_id, "error": "model not loaded"})
+        return
+    if options["watch_model"]:
+        sniffer.start_model_watcher(options["watch_model"], available_features=sniffer.FEATURE_COLUMNS)
+    if options["alert_writer"] and options["alert_writer"].get("maxsize"):
+        if options["alert_ring"]:
+            sniffer.open_alert_ring(options["alert_ring"], create=False)
+        sniffer.start_alert_writer(**options["alert_writer"])
+    results.put({"shard": shard_id, "ready": True})
+
+    live = options["live"]
+    update = manager.update_flow
+    packets = scored = 0
+    last_ts = None
+
+    def score(now):
+        ended = manager.end_expired_flows(now=now)
+        if ended:
+            sniffer.score_flows([(key, flow, now) for key, flow in ended])
+        return len(ended)
+
+    while True:
+        try:
+            batch = inbox.get(timeout=options["expiry_interval"] if live else None)
+        except queue.Empty:
+            # Idle link: still expire flows on the wall clock
+            scored += score(time.time())
+            continue
+        if batch is None:
+            break
+
+        for key, size, ts in batch:
+            update(key, size, ts)
+        packets += len(batch)
+        last_ts = batch[-1][2]
+        scored += score(time.time() if live else last_ts)
+
+    # End of capture: flush every flow that is still open
+    ended = manager.end_expired_flows(now=float("inf"))
+    if ended:
+        now = time.time() if live or last_ts is None else last_ts
+        sniffer.score_flows([(key, flow, now) for key, flow in ended])
+    scored += len(ended)
+
+    cache = sniffer.get_engine().cache
+    writer = sniffer.stop_alert_writer(report=False)
+    sniffer.close_alert_ring()
+    results.put({"shard": shard_id, "packets": packets, "flows_ended": scored, **manager.stats(),
+                 "cache": cache.stats() if cache is not None else None,
+                 "alert_log": writer.stats() if writer is not None else None})
+
+
+class ShardedIDS:
+    """
+    Dispatcher side: hash packet records onto shard processes in batches.
+
+    Use as start() / submit(key, size, ts) per packet / stop(). For live
+    capture a full shard queue drops the batch (counted) so capture never
+    blocks; replay (live=False) blocks instead so runs are reproducible and
+    shards follow the packet clock.
+
+    A partial batch is sent batch_deadline after its first record: in replay
+    when a later packet's timestamp passes it, in live capture also by a
+    timer thread, so the last packets before the link goes quiet reach the
+    shards (and are scored) without waiting for more traffic.
+    """
+
+    def __init__(self, shards=SHARDS, target_ip=None, live=True, streaming=False,
+                 max_flows=MAX_FLOWS, active_timeout=ACTIVE_TIMEOUT,
+                 batch_size=DISPATCH_BATCH, batch_deadline=DISPATCH_DEADLINE,
+                 queue_size=SHARD_QUEUE_SIZE, expiry_interval=EXPIRY_INTERVAL, admission=True,
+                 target_networks=None, benign_networks=None, prediction_cache=(0, 0.0), watch_model=0,
+                 alert_writer=None, alert_ring=None):
+        self.shards = shards
+        self.live = live
+        self.batch_size = batch_size
+        self.batch_deadline = batch_deadline
+        self.options = {
+            "target_ip": target_ip,
+            "target_networks": target_networks,
+            "benign_networks": str(benign_networks) if benign_networks else None,
+            "live": live,
+            "streaming": streaming,
+            # Each shard gets an even slice of the table budget
+            "max_flows": -(-max_flows // shards) if max_flows else None,
+            "active_timeout": active_timeout,
+            "admission": admission,
+            "expiry_interval": expiry_interval or EXPIRY_INTERVAL,
+            # (max entries, max probability error) of each shard's prediction cache
+            "prediction_cache": tuple(prediction_cache),
+            # Seconds between model file checks for hot reload in each shard (0 = off)
+            "watch_model": watch_model,
+            # AlertWriter options of each shard's alert log writer (None = synchronous writes)
+            "alert_writer": dict(alert_writer) if alert_writer else None,
+            # Name of the dispatcher's shared-memory alert ring the shards' writers publish to
+            "alert_ring": alert_ring,
+        }
+
+        self._inboxes = [mp.Queue(maxsize=queue_size) for _ in range(shards)]
+        self._results = mp.Queue()
+        self._procs = []
+        self._batches = [[] for _ in range(shards)]
+        self._last_flush = None
+        # submit() runs on the capture thread, the deadline flush on its own
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stopping = threading.Event()
+
+        self.packets = 0
+        self.batches_sent = 0
+        self.batches_dropped = 0
+        self.packets_dropped = 0
+
+    def start(self):
+        """Start the shard processes and wait until every one has loaded the model"""
+        for i in range(self.shards):
+            proc = mp.Process(target=_shard_main, name=f"ids-shard-{i}",
+                              args=(i, self._inboxes[i], self._results, self.options), daemon=True)
+            proc.start()
+            self._procs.append(proc)
+        for _ in range(self.shards):
+            msg = self._results.get()
+            if "error" in msg:
+                self.stop(flush=False)
+                raise RuntimeError(f"Shard {msg['shard']}: {msg['error']}")
+        if self.live:
+            self._flusher = threading.Thread(target=self._flush_on_deadline, name="dispatch-flush", daemon=True)
+            self._flusher.start()
+        return self
+
+    def _flush_on_deadline(self):
+        """Live capture: send partial batches at their deadline even if no packet follows"""
+        while not self._stopping.wait(self.batch_deadline / 2):
+            with self._lock:
+                if self._last_flush is not None and time.time() - self._last_flush >= self.batch_deadline:
+                    self._flush()
+
+    def submit(self, key, size, timestamp):
+        """Queue one packet record for the shard that owns its flow"""
+        shards = self.shards
+        shard = shard_of(key, shards) if shards > 1 else 0
+        with self._lock:
+            batch = self._batches[shard]
+            batch.append((key, size, timestamp))
+            self.packets += 1
+            if len(batch) >= self.batch_size:
+                self._send(shard)
+            if self._last_flush is None:
+                self._last_flush = timestamp
+            elif timestamp - self._last_flush >= self.batch_deadline:
+                self._flush()
+
+    def flush(self):
+        """Send every partial batch"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        for shard in range(self.shards):
+            if self._batches[shard]:
+                self._send(shard)
+        self._last_flush = None
+
+    def _send(self, shard):
+        batch = self._batches[shard]
+        self._batches[shard] = []
+        if self.live:
+            try:
+                self._inboxes[shard].put_nowait(batch)
+            except queue.Full:
+                self.batches_dropped += 1
+                self.packets_dropped += len(batch)
+                return
+        else:
+            self._inboxes[shard].put(batch)
+        self.batches_sent += 1
+
+    def stop(self, flush=True):
+        """Flush, stop the shards (they score their open flows) and collect stats"""
+        self._stopping.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if flush:
+            self.flush()
+        for inbox in self._inboxes:
+            inbox.put(None)
+        stats = []
+        for _ in self._procs:
+            try:
+                stats.append(self._results.get(timeout=60))
+            except queue.Empty:
+                break
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._procs = []
+        return sorted((s for s in stats if "packets" in s), key=lambda s: s["shard"])
+
+    def print_report(self, shard_stats):
+        print(f"🔀 Dispatcher: {self.packets} packets to {self.shards} shard(s) in "
+              f"{self.batches_sent} batches, {self.batches_dropped} batches "
+              f"({self.packets_dropped} packets) dropped")
+        for s in shard_stats:
+            print(f"   shard {s['shard']}: {s['packets']} packets, {s['flows_ended']} flows ended, "
+                  f"{s['evictions']} evicted, {s['active_exports']} active exports")
+            if s.get("cache"):
+                print(f"      prediction cache: {s['cache']['hit_rate']:.1%} hits, "
+                      f"{s['cache']['entries']} entries, {s['cache']['evictions']} evicted")
+            if s.get("alert_log"):
+                print(f"      alert log: {s['alert_log']['written']} alerts written, "
+                      f"{s['alert_log']['dropped']} dropped (queue full)")
+
+
+def replay_pcap_sharded(path, shards=SHARDS, target_ip=None, fast=False, **options):
+    """
+    Replay a capture through N shard processes (as fast as possible).
+
+    Returns:
+        (dict with packets, wall_seconds and packets_per_sec, list of per-shard stats)
+    """
+    try:
+        from live_ids.fast_decoder import iter_pcap_records
+        from live_ids.packet_sniffer import _scapy_records
+    except ImportError:
+        from backend.live_ids.fast_decoder import iter_pcap_records
+        from backend.live_ids.packet_sniffer import _scapy_records
+
+    if fast:
+        records = ((key, size, ts) for key, size, ts, _flags in iter_pcap_records(path))
+    else:
+        records = _scapy_records(path)
+
+    ids = ShardedIDS(shards, target_ip=target_ip, live=False, **options).start()
+    packets = 0
+    wall_start = time.perf_counter()
+    submit = ids.submit
+    for key, size, ts in records:
+        packets += 1
+        if key is not None:
+            submit(key, size, ts)
+    shard_stats = ids.stop()
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "packets": packets,
+        "wall_seconds": wall,
+        "packets_per_sec": packets / wall if wall > 0 else 0.0,
+    }, shard_stats
+
+
+def start_sharded_sniffer(interface=None, shards=SHARDS, target_ip=None, fast=False,
+                          kernel_filter=True, **options):
+    """Live capture in this process, flow tracking and scoring in N shard processes"""
+    try:
+        from live_ids import packet_sniffer as sniffer
+        from live_ids.bpf import check_bpf_filter
+        from live_ids.fast_decoder import iter_af_packet
+        from live_ids.flow_manager import FlowManager
+    except ImportError:
+        from backend.live_ids import packet_sniffer as sniffer
+        from backend.live_ids.bpf import check_bpf_filter
+        from backend.live_ids.fast_decoder import iter_af_packet
+        from backend.live_ids.flow_manager import FlowManager
+
+    ids = ShardedIDS(shards, target_ip=target_ip, live=True, **options).start()
+    print(f"🔀 Sharded mode: {shards} flow/scoring process(es), "
+          f"batches of {ids.batch_size} records / {ids.batch_deadline * 1000:.0f} ms")
+
+    bpf = None
+    if kernel_filter:
+        if target_ip:
+            sniffer.TARGET_IP = target_ip
+        if options.get("target_networks"):
+            sniffer.TARGET_NETWORKS = tuple(options["target_networks"])
+        bpf = sniffer.kernel_filter_expression()
+        ok, error = check_bpf_filter(bpf, interface)
+        if ok:
+            print(f"🧰 Kernel BPF filter: {bpf}")
+        else:
+            print(f"⚠️  Kernel BPF filter unavailable ({error}) - filtering in Python only")
+            bpf = None
+    print("Press Ctrl+C to stop")
+
+    submit = ids.submit
+    try:
+        if fast:
+            for key, size, timestamp, _flags in iter_af_packet(interface, bpf_filter=bpf):
+                if key is not None:
+                    submit(key, size, timestamp)
+        else:
+            sniff = sniffer.scapy_sniff()
+            get_flow_key = FlowManager().get_flow_key
+
+            def on_packet(pkt):
+                key = get_flow_key(pkt)
+                if key is not None:
+                    submit(key, len(pkt), time.time())
+
+            sniff(iface=interface, prn=on_packet, store=False, filter=bpf)
+    except KeyboardInterrupt:
+        print("\nStopping packet sniffer...")
+    except Exception as e:
+        print(f"Error in packet sniffer: {e}")
+    finally:
+        ids.print_report(ids.stop())
@@ -0,0 +1,316 @@
+# backend/models/compiled_histgb.py
+
+"""
+Array-compiled HistGradientBoostingClassifier.
+
+export_histgb() flattens every fitted tree of a HistGradientBoostingClassifier
+into contiguous numpy arrays (feature, threshold, missing direction, left,
+right, leaf value) with global node indices and saves them, with the
+baseline, classes and feature names, as an uncompressed .npz. The file is
+written next to the target and renamed over it, so engines that have the
+old file memory-mapped keep reading it unchanged.
+
+load_compiled() opens that file and memory-maps each array in place (the
+members of an uncompressed .npz are plain .npy files inside the zip), so
+loading does not import sklearn or unpickle anything.
+
+CompiledHistGB.predict_proba() walks all trees for all rows at once: one
+vectorized step per tree level over the (row, tree) pairs that have not
+reached a leaf yet, then sums leaf values in sklearn's order. It reproduces
+sklearn's predict_proba to float rounding (bit-identical on the shipped
+model) without sklearn's per-call validation and thread-pool overhead, which
+dominate single-flow and small-batch scoring. Large batches are faster in
+sklearn's compiled tree walk.
+
+Usage:
+    python backend/models/compiled_histgb.py [model.joblib] [out.npz]
+"""
+
+import hashlib
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+MODEL_DIR = Path(__file__).resolve().parent
+DEFAULT_MODEL_PATH = MODEL_DIR / "ids_7class_histgb_safe.joblib"
+
+# Rows evaluated together; bounds the (rows x trees) working arrays
+CHUNK_ROWS = 4096
+
+FORMAT_VERSION = 1
+
+
+def file_sha256(path):
+    """Hex digest of a file (ties a compiled artifact to its source model)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def histgb_arrays(model, source_path=None):
+    """The flattened tables of a fitted HistGradientBoostingClassifier (see export_histgb)"""
+    if getattr(model, "_preprocessor", None) is not None:
+        raise ValueError("Models with categorical features are not supported")
+
+    predictors = model._predictors
+    n_iter, n_trees_per_iter = len(predictors), len(predictors[0])
+    trees = [tree.nodes for iteration in predictors for tree in iteration]
+    if any(nodes["is_categorical"].any() for nodes in trees):
+        raise ValueError("Models with categorical splits are not supported")
+
+    sizes = np.array([len(nodes) for nodes in trees])
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    nodes = np.concatenate(trees)
+    base = np.repeat(offsets, sizes)
+    is_leaf = nodes["is_leaf"].astype(bool)
+
+    # Leaves point to themselves so finished walks stay put
+    own = np.arange(len(nodes))
+    left = np.where(is_leaf, own, nodes["left"] + base)
+    right = np.where(is_leaf, own, nodes["right"] + base)
+
+    classes = np.asarray(model.classes_)
+    feature_names = np.asarray(getattr(model, "feature_names_in_", []), dtype=str)
+    return dict(
+        format_version=np.array(FORMAT_VERSION),
+        feature=np.where(is_leaf, 0, nodes["feature_idx"]).astype(np.int32),
+        threshold=nodes["num_threshold"].astype(np.float64),
+        missing_left=nodes["missing_go_to_left"].astype(bool),
+        left=left.astype(np.int32),
+        right=right.astype(np.int32),
+        is_leaf=is_leaf,
+        value=nodes["value"].astype(np.float64),
+        roots=offsets.astype(np.int32),
+        baseline=np.asarray(model._baseline_prediction, dtype=np.float64).reshape(n_trees_per_iter),
+        n_iter=np.array(n_iter),
+        n_features=np.array(model.n_features_in_),
+        classes=classes.astype(str) if classes.dtype == object else classes,
+        feature_names=feature_names,
+        source_sha256=np.array(file_sha256(source_path) if source_path else ""),
+    )
+
+
+def export_histgb(model, path, source_path=None):
+    """
+    Save a fitted HistGradientBoostingClassifier as a compiled .npz.
+
+    Args:
+        model: Fitted HistGradientBoostingClassifier (numerical features only)
+        path: Output .npz path
+        source_path: The model file it was loaded from; its sha256 is stored
+                     so stale artifacts can be detected
+
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    if path.suffix != ".npz":
+        path = path.with_name(path.name + ".npz")
+    # Never rewrite the file in place: running engines have it memory-mapped
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, **histgb_arrays(model, source_path))
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def compile_histgb(model):
+    """CompiledHistGB of a fitted model, in memory (nothing written)"""
+    if isinstance(model, CompiledHistGB):
+        return model
+    return CompiledHistGB(histgb_arrays(model))
+
+
+def _mmap_npz(path):
+    """{name: read-only memmap} for every member of an uncompressed .npz"""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} in {path} is compressed and cannot be memory-mapped")
+            # Local file header: 30 bytes + name + extra field, then the .npy bytes
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran, dtype = read_header(f)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if dtype.hasobject:
+                raise ValueError(f"{name} in {path} holds Python objects")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran else "C")
+    return arrays
+
+
+def load_compiled(path, mmap=True):
+    """Open a compiled model (.npz from export_histgb); arrays are memory-mapped by default"""
+    if mmap:
+        arrays = _mmap_npz(path)
+    else:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    if int(arrays["format_version"]) != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported compiled model version {int(arrays['format_version'])}")
+    return CompiledHistGB(arrays)
+
+
+def compiled_artifact_for(model_path):
+    """
+    The .npz exported next to a model file, if there is one and it was
+    exported from this exact file (sha256); None otherwise.
+    """
+    model_path = Path(model_path)
+    path = model_path.with_suffix(".npz")
+    if not path.exists():
+        return None
+    try:
+        source_sha256 = str(_mmap_npz(path)["source_sha256"])
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"⚠️  Ignoring unreadable compiled model {path}: {e}")
+        return None
+    if model_path.exists() and source_sha256 != file_sha256(model_path):
+        print(f"⚠️  Ignoring stale compiled model {path.name} (re-export it from {model_path.name})")
+        return None
+    return path
+
+
+class CompiledHistGB:
+    """predict / predict_proba of an exported HistGradientBoostingClassifier"""
+
+    def __init__(self, arrays):
+        self.source_sha256 = str(arrays["source_sha256"])
+        self.classes_ = np.asarray(arrays["classes"])
+        self.n_features_in_ = int(arrays["n_features"])
+        if len(arrays["feature_names"]):
+            self.feature_names_in_ = np.asarray(arrays["feature_names"], dtype=object)
+        self.n_iter_ = int(arrays["n_iter"])
+        self.n_trees_per_iteration_ = len(arrays["baseline"])
+
+        # Plain ndarray views of the (memory-mapped) tables; index arrays as intp
+        # so fancy indexing does not convert them on every level
+        self._feature = np.asarray(arrays["feature"], dtype=np.intp)
+        self._threshold = np.asarray(arrays["threshold"])
+        self._missing_left = np.asarray(arrays["missing_left"])
+        self._is_leaf = np.asarray(arrays["is_leaf"])
+        self._value = np.asarray(arrays["value"])
+        self._roots = np.asarray(arrays["roots"], dtype=np.intp)
+        self._baseline = np.asarray(arrays["baseline"])
+        # children[2 * node + go_right]
+        self._children = np.empty(2 * len(self._feature), dtype=np.intp)
+        self._children[0::2] = arrays["left"]
+        self._children[1::2] = arrays["right"]
+
+    def _check(self, X):
+        columns = getattr(X, "columns", None)
+        names = getattr(self, "feature_names_in_", None)
+        if columns is not None and names is not None and list(columns) != list(names):
+            raise ValueError("The feature names should match those that were passed during fit.")
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model is expecting "
+                             f"{self.n_features_in_} features as input.")
+        return X
+
+    def _leaves(self, X):
+        """Leaf node index reached in every tree: (rows, trees)"""
+        n_rows, n_trees = len(X), len(self._roots)
+        values = X.ravel()
+        has_missing = np.isnan(values).any()
+
+        leaves = np.tile(self._roots, n_rows)
+        pos = np.flatnonzero(~self._is_leaf[leaves])
+        node = leaves[pos]
+        cell = pos // n_trees * X.shape[1]
+        while node.size:
+            x = values[cell + self._feature[node]]
+            go_right = x > self._threshold[node]
+            if has_missing:
+                missing = np.isnan(x)
+                go_right[missing] = ~self._missing_left[node[missing]]
+            node = self._children[2 * node + go_right]
+
+            done = self._is_leaf[node]
+            finished = np.count_nonzero(done)
+            if finished == node.size:
+                leaves[pos] = node
+                break
+            # Finished walks just loop on their leaf; drop them once they are the majority
+            if 2 * finished > node.size:
+                leaves[pos[done]] = node[done]
+                keep = ~done
+                node, pos, cell = node[keep], pos[keep], cell[keep]
+        return leaves.reshape(n_rows, n_trees)
+
+    def splits(self):
+        """
+        (feature, threshold, class, spread) of every split node. spread is
+        max - min of the leaf values below the node: the most that sending a
+        row down the other branch can change that class's raw score.
+        """
+        left, right = self._children[0::2], self._children[1::2]
+        low = np.where(self._is_leaf, self._value, np.inf)
+        high = np.where(self._is_leaf, self._value, -np.inf)
+        # Leaves point to themselves, so one pass per tree level settles every node
+        while True:
+            new_low = np.minimum(low[left], low[right])
+            new_high = np.maximum(high[left], high[right])
+            if np.array_equal(new_low, low) and np.array_equal(new_high, high):
+                break
+            low, high = new_low, new_high
+
+        node = np.flatnonzero(~self._is_leaf)
+        tree = np.searchsorted(self._roots, node, side="right") - 1
+        return (self._feature[node], self._threshold[node], tree % self.n_trees_per_iteration_,
+                high[node] - low[node])
+
+    def raw_predict(self, X):
+        """Baseline + sum of leaf values per class, accumulated in sklearn's order"""
+        X = self._check(X)
+        n_classes = self.n_trees_per_iteration_
+        raw = np.zeros((len(X), n_classes))
+        raw += self._baseline
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            leaf_values = self._value[self._leaves(chunk)].reshape(len(chunk), self.n_iter_, n_classes)
+            out = raw[start:start + CHUNK_ROWS]
+            for iteration in range(self.n_iter_):
+                out += leaf_values[:, iteration]
+        return raw
+
+    def predict_proba(self, X):
+        raw = self.raw_predict(X)
+        if raw.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack((1.0 - positive, positive))
+        exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+if __name__ == "__main__":
+    import joblib
+
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MODEL_PATH
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else source.with_suffix(".npz")
+    fitted = joblib.load(source)
+    export_histgb(fitted, target, source_path=source)
+    compiled = load_compiled(target)
+    print(f"✅ Compiled {fitted.n_iter_} iterations x {compiled.n_trees_per_iteration_} trees "
+          f"({len(compiled._value):,} nodes) from {source.name} to {target} "
+          f"({target.stat().st_size / 1024:.0f} KiB)")
@@ -0,0 +1,270 @@
+# backend/models/inference_engine.py
+
+"""
+One inference path for the Flask API and the live sniffer.
+
+InferenceEngine wraps the loaded model, label encoder and training feature
+order and scores numpy matrices:
+
+    label_idx, confidence, proba = engine.score(X)
+    labels = engine.classes[label_idx]
+
+Only predict_proba() is evaluated - the label is its argmax, which is what
+the classifier's predict() computes anyway - so each tree ensemble is run
+once per batch. Input columns are mapped to training order with a cached
+index plan instead of a per-call DataFrame reindex. An engine is never
+modified after construction (the plan cache only grows under a lock), so
+score() can be called from any number of threads.
+
+enable_cache() puts a PredictionCache (prediction_cache.py) in front of
+predict_proba() for repetitive traffic; call it before sharing the engine.
+
+Loading stays light: the compiled model is memory-mapped (export_histgb
+replaces it atomically), the label encoder's classes come from the startup
+cache when the encoder file is unchanged (no sklearn import), and
+joblib/pandas are only imported when a pickle has to be read or a DataFrame
+is passed in.
+"""
+
+import json
+import pickle
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from models.compiled_histgb import compiled_artifact_for, file_sha256, load_compiled
+    from models.prediction_cache import PREDICTION_CACHE_SIZE, PredictionCache
+    from models.startup import cached_label_classes, remember_label_classes
+except ImportError:
+    from backend.models.compiled_histgb import compiled_artifact_for, file_sha256, load_compiled
+    from backend.models.prediction_cache import PREDICTION_CACHE_SIZE, PredictionCache
+    from backend.models.startup import cached_label_classes, remember_label_classes
+
+# Matrices are aligned to training order by the engine itself
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+# With a compiled model, batches of at least this many rows go to the pickled
+# sklearn estimator instead (its Cython tree walk wins on large batches);
+# it is loaded the first time such a batch arrives
+LARGE_BATCH_ROWS = 128
+
+
+# First byte of an uncompressed joblib/pickle file (protocol 2+ opcode); compressed
+# dumps start with their codec's magic and cannot be memory-mapped
+_PICKLE_PROTO = b"\x80"
+
+
+def _load_pickle(path, mmap=False):
+    """
+    joblib.load with a plain pickle fallback for older dumps.
+
+    With mmap=True an uncompressed dump is opened with mmap_mode='r' so its
+    numpy arrays stay in the page cache instead of being copied onto the
+    heap. Only do that for files that are replaced atomically (written
+    elsewhere, then renamed over): the training notebooks joblib.dump() onto
+    the same path, which truncates the file under the mapped arrays of a
+    running model, so the engine loads its pickles into memory.
+    """
+    import joblib
+
+    mmap_mode = None
+    if mmap:
+        with open(path, 'rb') as f:
+            mmap_mode = 'r' if f.read(1) == _PICKLE_PROTO else None
+    try:
+        return joblib.load(path, mmap_mode=mmap_mode)
+    except Exception as e1:
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e2:
+            raise RuntimeError(f"Could not load {path}: {e1}, fallback also failed: {e2}") from e2
+
+
+class InferenceEngine:
+    """Thread-safe scorer: model + label encoder + training feature order"""
+
+    def __init__(self, model, label_encoder, feature_names=None, source=None, large_batch_model_path=None):
+        self.model = model
+        self.source = source
+        # Set by load(): short sha256 of the model file, and when it was loaded
+        self.version = None
+        self.loaded_at = time.time()
+        self._large_batch_model_path = large_batch_model_path
+        self._large_batch_model = None
+        self._large_batch_lock = threading.Lock()
+        self.label_encoder = label_encoder
+        self.feature_names = list(feature_names or getattr(model, "feature_names_in_", []))
+        self.classes = np.asarray(label_encoder.classes_)
+
+        # Map predict_proba columns (model.classes_ order) to label encoder indices;
+        # model.classes_ holds either encoded ints or the label strings themselves
+        model_classes = np.asarray(getattr(model, "classes_", np.arange(len(self.classes))))
+        if np.issubdtype(model_classes.dtype, np.integer):
+            self._label_of_column = model_classes.astype(np.intp)
+        else:
+            index = {label: i for i, label in enumerate(self.classes.tolist())}
+            self._label_of_column = np.array([index[label] for label in model_classes.tolist()], dtype=np.intp)
+        self._column_of_class = {label: i for i, label in enumerate(model_classes.tolist())}
+        self.classes_match = np.array_equal(self._label_of_column, np.arange(len(self.classes)))
+        self._has_proba = hasattr(model, "predict_proba")
+
+        self._plans = {}
+        self._plans_lock = threading.Lock()
+        self.cache = None
+
+    @classmethod
+    def load(cls, model_path, encoder_path, metadata_path=None, compiled=True):
+        """
+        Load the model, label encoder and (optional) metadata feature order from disk.
+        
+        With compiled=True an up-to-date array-compiled export of the model
+        (model_path with a .npz suffix, see compiled_histgb.py) is used instead
+        of unpickling the sklearn estimator. The label encoder's classes are
+        taken from the startup cache when the encoder file is unchanged.
+        """
+        model_path = Path(model_path)
+        feature_names = None
+        if metadata_path is not None and metadata_path.exists():
+            with open(metadata_path, 'r') as f:
+                feature_names = json.load(f).get('feature_names') or None
+        source = compiled_artifact_for(model_path) if compiled else None
+        if source is not None:
+            model = load_compiled(source)
+            large_batch_model_path = model_path if model_path.exists() else None
+        else:
+            source = model_path
+            model = _load_pickle(model_path)
+            large_batch_model_path = None
+
+        label_encoder = cached_label_classes(encoder_path)
+        if label_encoder is None:
+            label_encoder = _load_pickle(encoder_path)
+            remember_label_classes(encoder_path, label_encoder)
+        engine = cls(model, label_encoder, feature_names, source, large_batch_model_path)
+        version_of = model_path if model_path.exists() else source
+        engine.version = getattr(model, "source_sha256", "")[:12] or file_sha256(version_of)[:12]
+        return engine
+
+    def _model_for(self, rows):
+        """The estimator to score a batch of `rows` rows with"""
+        if rows < LARGE_BATCH_ROWS or self._large_batch_model_path is None:
+            return self.model
+        if self._large_batch_model is None:
+            with self._large_batch_lock:
+                if self._large_batch_model is None:
+                    try:
+                        self._large_batch_model = _load_pickle(self._large_batch_model_path)
+                    except Exception as e:
+                        print(f"⚠️  Large batches stay on the compiled model: {e}")
+                        self._large_batch_model_path = None
+                        return self.model
+        return self._large_batch_model
+
+    def enable_cache(self, max_entries=PREDICTION_CACHE_SIZE, max_proba_error=0.0):
+        """
+        Serve repeated (quantized) feature vectors from a PredictionCache.
+
+        Args:
+            max_entries: LRU capacity in feature vectors
+            max_proba_error: Most a cached probability may differ from exact
+                             inference (0 = identical results)
+
+        Returns:
+            The PredictionCache, or None if this model cannot be quantized
+        """
+        try:
+            self.cache = PredictionCache(self.model, max_entries, max_proba_error)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"⚠️  Prediction cache disabled: {e}")
+            self.cache = None
+        return self.cache
+
+    def _predict_proba(self, X):
+        return self._model_for(len(X)).predict_proba(X)
+
+    def column_plan(self, columns):
+        """
+        (take, missing) for input columns: the input position of each training
+        feature (-1 = missing, filled with 0) and the missing feature names.
+        Cached per column tuple.
+        """
+        columns = tuple(columns)
+        plan = self._plans.get(columns)
+        if plan is None:
+            if not self.feature_names or columns == tuple(self.feature_names):
+                plan = (None, [])
+            else:
+                position = {name: i for i, name in enumerate(columns)}
+                take = np.array([position.get(name, -1) for name in self.feature_names], dtype=np.intp)
+                plan = (take, [name for name, i in zip(self.feature_names, take) if i < 0])
+            with self._plans_lock:
+                self._plans.setdefault(columns, plan)
+        return plan
+
+    def align(self, X, columns=None):
+        """
+        Feature matrix in training order.
+
+        Args:
+            X: DataFrame, or 2-D array whose columns are `columns`
+               (default: already in training order)
+        """
+        if hasattr(X, "columns") and hasattr(X, "to_numpy"):
+            # DataFrame (duck-typed so pandas is not imported for numpy callers)
+            columns = X.columns
+            X = X.to_numpy(dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+        if columns is None:
+            return X
+
+        take, _ = self.column_plan(columns)
+        if take is None:
+            return X
+        aligned = np.zeros((len(X), len(take)))
+        present = take >= 0
+        aligned[:, present] = X[:, take[present]]
+        return aligned
+
+    def score(self, X, columns=None):
+        """
+        Score a batch with one model pass.
+
+        Returns:
+            (label_idx, confidence, proba): label encoder indices (use
+            engine.classes[label_idx] for names), the top probability per
+            row and the full probability matrix in model.classes_ order
+        """
+        X = self.align(X, columns)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty((0, len(self._label_of_column)))
+
+        if self._has_proba:
+            if self.cache is not None:
+                proba = self.cache.predict_proba(X, self._predict_proba)
+            else:
+                proba = self._predict_proba(X)
+            column = np.argmax(proba, axis=1)
+            confidence = proba[np.arange(len(proba)), column]
+        else:
+            # No probabilities: one-hot on predict(), confidence 1
+            preds = self.model.predict(X)
+            column = np.array([self._column_of_class[p] for p in np.asarray(preds).tolist()], dtype=np.intp)
+            proba = np.zeros((len(X), len(self._label_of_column)))
+            proba[np.arange(len(X)), column] = 1.0
+            confidence = np.ones(len(X))
+        return self._label_of_column[column], confidence, proba
+
+    def warm_up(self):
+        """Score one all-zero row so the first real batch does not pay page faults and lazy setup"""
+        self.score(np.zeros((1, len(self.feature_names) or getattr(self.model, "n_features_in_", 1))))
+
+    def predict_labels(self, X, columns=None):
+        """(label strings, confidence) for a batch"""
+        label_idx, confidence, _ = self.score(X, columns)
+        return self.classes[label_idx], confidence
@@ -0,0 +1,191 @@
+# backend/models/model_reloader.py
+
+"""
+Hot model reload for the Flask API and the sniffer.
+
+ModelReloader loads a new model, label encoder and model_metadata.json into
+a fresh InferenceEngine next to the running one, checks it on a warm-up
+batch, and only then hands it to on_swap(), which replaces the process's
+engine reference in one assignment. Scoring code reads that reference once
+per batch or request, so in-flight work finishes on the engine it started
+with and the old model is freed once nothing holds it.
+
+Reloads are triggered either by reload() (the API's admin endpoint) or by
+the watcher thread, which polls the model files and reloads once a change
+has settled (stat unchanged for a whole poll interval, so a half-written
+export is not picked up). A failed load or validation keeps the old model.
+
+Files may be replaced while the old engine still serves: the compiled .npz
+it has memory-mapped is only ever renamed over (export_histgb), and pickles
+are copied into memory on load, so retraining in place cannot change or
+crash the running model.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from models.inference_engine import InferenceEngine
+except ImportError:
+    from backend.models.inference_engine import InferenceEngine
+
+# Seconds between checks of the model files by the watcher thread
+RELOAD_INTERVAL = 5.0
+
+# Rows in the validation batch a new model must score before it is swapped in
+WARM_UP_ROWS = 64
+
+
+def warm_up_batch(n_features, rows=WARM_UP_ROWS, seed=0):
+    """Zeros, ones and random rows at flow-feature scales (seconds to bytes/s)"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((rows, n_features)) * rng.choice([1.0, 1e3, 1e6], size=n_features)
+    X[0], X[1] = 0.0, 1.0
+    return X
+
+
+def validate_engine(engine, available_features=None):
+    """
+    Check a freshly loaded engine before it serves traffic.
+
+    Args:
+        available_features: Feature names the caller can produce (e.g. the
+                            sniffer's extractor); the model may not need others
+
+    Raises:
+        ValueError: describing the first problem found
+    """
+    names = engine.feature_names
+    n_features = getattr(engine.model, "n_features_in_", len(names))
+    if names and len(names) != n_features:
+        raise ValueError(f"metadata lists {len(names)} features, the model expects {n_features}")
+    if available_features is not None:
+        unknown = [name for name in names if name not in set(available_features)]
+        if unknown:
+            raise ValueError(f"model needs features this process cannot extract: {unknown[:5]}")
+
+    label_idx, confidence, proba = engine.score(warm_up_batch(n_features))
+    if proba.shape != (WARM_UP_ROWS, len(engine._label_of_column)):
+        raise ValueError(f"warm-up batch gave probabilities of shape {proba.shape}")
+    if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0):
+        raise ValueError("warm-up batch gave invalid probabilities")
+    if label_idx.min() < 0 or label_idx.max() >= len(engine.classes):
+        raise ValueError("warm-up batch gave labels outside the label encoder")
+
+
+def _stat(path):
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class ModelReloader:
+    """Background load + validate + atomic swap of an InferenceEngine"""
+
+    def __init__(self, model_path, encoder_path, metadata_path, on_swap, current=None,
+                 interval=RELOAD_INTERVAL, available_features=None):
+        """
+        Args:
+            on_swap: Called with the validated new engine; must install it
+                     (a single reference assignment)
+            current: The engine already serving, if any (its files are not reloaded)
+            interval: Watcher poll interval in seconds
+            available_features: See validate_engine()
+        """
+        self.model_path = Path(model_path)
+        self.encoder_path = Path(encoder_path)
+        self.metadata_path = Path(metadata_path) if metadata_path else None
+        self.on_swap = on_swap
+        self.interval = interval
+        self.available_features = available_features
+
+        self.version = getattr(current, "version", None)
+        self.loaded_at = getattr(current, "loaded_at", None)
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Files as of the last load attempt (successful or not), and a change seen by the last check
+        self._attempted = self._stamps()
+        self._pending = None
+
+    def _stamps(self):
+        paths = (self.model_path, self.model_path.with_suffix(".npz"), self.encoder_path, self.metadata_path)
+        return tuple(_stat(p) if p else None for p in paths)
+
+    def reload(self):
+        """
+        Load, validate and swap in the model files now (one reload at a time).
+
+        Returns:
+            (ok, message): the new version, or why the old model was kept
+        """
+        with self._lock:
+            self._attempted = self._stamps()
+            try:
+                engine = InferenceEngine.load(self.model_path, self.encoder_path, self.metadata_path)
+                validate_engine(engine, self.available_features)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️  Model reload failed, keeping version {self.version}: {self.last_error}")
+                return False, self.last_error
+
+            previous = self.version
+            self.on_swap(engine)
+            self.version, self.loaded_at = engine.version, engine.loaded_at
+            self.reloads += 1
+            self.last_error = None
+            print(f"✅ Model reloaded: version {previous} -> {engine.version} from {engine.source}")
+            return True, engine.version
+
+    def check(self):
+        """Reload if the files changed since the last attempt and have not changed since the previous check"""
+        stamps = self._stamps()
+        if stamps == self._attempted:
+            return None
+        if stamps != self._pending:
+            # Still being written, or just changed: wait one more interval
+            self._pending = stamps
+            return None
+        self._pending = None
+        return self.reload()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️  Model watcher error: {e}")
+
+    def start(self):
+        """Watch the model files in a daemon thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "watching": self._thread is not None,
+            "interval": self.interval,
+        }
@@ -0,0 +1,187 @@
+# backend/models/prediction_cache.py
+
+"""
+LRU cache of class probabilities keyed by a quantized feature vector.
+
+Flood traffic (SYN floods, brute-force retries, DoS) ends thousands of
+near-identical flows, and each one would be scored by the full tree
+ensemble. A tree only compares each feature against its split thresholds,
+so two rows that fall between the same pair of thresholds on every feature
+walk exactly the same paths and get the same probabilities. FeatureQuantizer
+maps each feature to the index of its interval between the model's split
+thresholds; the tuple of indices is the cache key.
+
+With max_proba_error=0 every threshold is kept and a cached verdict is
+identical to exact inference. A positive max_proba_error drops the
+thresholds that matter least (coarser bins, more hits) while keeping a
+guaranteed bound: rows in one bin differ only at dropped splits, each of
+which moves its class's raw score by at most the spread of the leaf values
+below it, and softmax/sigmoid probabilities move by at most half the largest
+raw-score change.
+
+    engine.enable_cache(max_entries=50_000, max_proba_error=0.01)
+    engine.cache.stats()   # hits, misses, hit_rate, evictions, entries, bytes
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from models.compiled_histgb import compile_histgb
+except ImportError:
+    from backend.models.compiled_histgb import compile_histgb
+
+# Default number of cached feature vectors
+PREDICTION_CACHE_SIZE = 50_000
+
+# Bookkeeping per OrderedDict entry (hash slot + linked-list node), on top of key and value
+_ENTRY_OVERHEAD = 100
+
+
+class FeatureQuantizer:
+    """Feature vector -> bytes key of per-feature split-threshold intervals"""
+
+    def __init__(self, model, max_proba_error=0.0):
+        """
+        Args:
+            model: Fitted HistGradientBoostingClassifier or CompiledHistGB
+            max_proba_error: Most any cached class probability may differ from
+                             exact inference (0 = exact)
+        """
+        if max_proba_error < 0:
+            raise ValueError("max_proba_error must be >= 0")
+        compiled = compile_histgb(model)
+        feature, threshold, klass, spread = compiled.splits()
+        self.n_features = compiled.n_features_in_
+        self.max_proba_error = max_proba_error
+
+        # Raw-score cost per class of merging across each distinct (feature, threshold)
+        pairs, inverse = np.unique(np.column_stack((feature, threshold)), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        n_classes = compiled.n_trees_per_iteration_
+        cost = np.zeros((len(pairs), n_classes))
+        np.add.at(cost, (inverse, klass), spread)
+
+        # Drop the cheapest thresholds while every class stays within the raw-score budget
+        # (at 0 only thresholds whose splits cannot change any leaf value go)
+        budget = 2.0 * max_proba_error
+        used = np.zeros(n_classes)
+        keep = np.ones(len(pairs), dtype=bool)
+        for i in np.argsort(cost.max(axis=1), kind="stable"):
+            if np.all(used + cost[i] <= budget):
+                used += cost[i]
+                keep[i] = False
+        self.error_bound = float(used.max()) / 2.0 if n_classes else 0.0
+        self.thresholds_total = len(pairs)
+        self.thresholds_kept = int(keep.sum())
+
+        kept = pairs[keep]
+        self._thresholds = [np.sort(kept[kept[:, 0] == f, 1]) for f in range(self.n_features)]
+        widest = max((len(t) for t in self._thresholds), default=0)
+        self._dtype = np.uint16 if widest + 2 <= np.iinfo(np.uint16).max else np.uint32
+
+    def bins(self, X):
+        """(rows, features) interval index; NaN gets its own index past the last interval"""
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty(X.shape, dtype=self._dtype)
+        for f, thresholds in enumerate(self._thresholds):
+            column = X[:, f]
+            # x <= threshold goes left, so x lands in (thresholds[i - 1], thresholds[i]]
+            out[:, f] = np.searchsorted(thresholds, column, side="left")
+            out[np.isnan(column), f] = len(thresholds) + 1
+        return out
+
+    def keys(self, X):
+        bins = np.ascontiguousarray(self.bins(X))
+        width = bins.shape[1] * bins.itemsize
+        raw = bins.tobytes()
+        return [raw[i:i + width] for i in range(0, len(raw), width)]
+
+
+class PredictionCache:
+    """Thread-safe LRU of quantized feature vector -> predict_proba row"""
+
+    def __init__(self, model, max_entries=PREDICTION_CACHE_SIZE, max_proba_error=0.0):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.quantizer = FeatureQuantizer(model, max_proba_error)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def _entry_size(self, key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+    def predict_proba(self, X, score):
+        """
+        Probabilities for X: cached rows are looked up, the rest are scored
+        with score(rows) (once per distinct key) and cached.
+        """
+        keys = self.quantizer.keys(X)
+        cached = [None] * len(keys)
+        missing = {}
+        entries = self._entries
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = entries.get(key)
+                if value is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    entries.move_to_end(key)
+                    cached[i] = value
+            # Repeats of a missing key within the batch are scored once, so they count as hits
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            scored = np.asarray(score(X[first]), dtype=np.float64)
+            with self._lock:
+                for (key, rows), value in zip(missing.items(), scored):
+                    for i in rows:
+                        cached[i] = value
+                    if key not in entries:
+                        value = value.copy()
+                        entries[key] = value
+                        self.bytes += self._entry_size(key, value)
+                while len(entries) > self.max_entries:
+                    key, value = entries.popitem(last=False)
+                    self.bytes -= self._entry_size(key, value)
+                    self.evictions += 1
+        return np.vstack(cached)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+                "max_proba_error": self.quantizer.max_proba_error,
+                "error_bound": self.quantizer.error_bound,
+                "thresholds_kept": self.quantizer.thresholds_kept,
+                "thresholds_total": self.quantizer.thresholds_total,
+            }
+
+    def print_report(self):
+        s = self.stats()
+        print(f"🗃️  Prediction cache: {s['hits']}/{s['hits'] + s['misses']} hits ({s['hit_rate']:.1%}), "
+              f"{s['entries']}/{s['max_entries']} entries (~{s['bytes'] / 1024:.0f} KiB), "
+              f"{s['evictions']} evicted; {s['thresholds_kept']}/{s['thresholds_total']} split thresholds, "
+              f"probabilities within {s['error_bound']:.4g} of exact")
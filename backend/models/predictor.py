@@ -1,10 +1,15 @@
 # backend/models/predictor.py
 
-import joblib
-import pandas as pd
-import numpy as np
 from pathlib import Path
-import json
+
+try:
+    from models.inference_engine import InferenceEngine
+    from models.model_reloader import ModelReloader, RELOAD_INTERVAL
+    from models.startup import STARTUP
+except ImportError:
+    from backend.models.inference_engine import InferenceEngine
+    from backend.models.model_reloader import ModelReloader, RELOAD_INTERVAL
+    from backend.models.startup import STARTUP
 
 # Get absolute paths
 _app_file = Path(__file__).resolve()
@@ -23,46 +28,50 @@ if not ENCODER_PATH.exists():
 if not METADATA_PATH.exists():
     METADATA_PATH = BASE_DIR / "artifacts" / "model_metadata.json"
 
+# Optional prediction cache (see prediction_cache.py); 0 entries = off
+PREDICTION_CACHE_SIZE = 0
+PREDICTION_CACHE_MAX_ERROR = 0.0
+
 # Load model and encoder
+engine = None
 model = None
 le = None
 feature_names = []
 
-def load_model():
-    """Load the ML model and label encoder"""
-    global model, le, feature_names
+# Hot reload watcher (see start_model_watcher)
+reloader = None
+
+def install_engine(new_engine):
+    """
+    Make new_engine the one get_engine() returns. Callers that already hold
+    the previous engine finish their batch on it.
+    """
+    global engine, model, le, feature_names
+    if PREDICTION_CACHE_SIZE:
+        new_engine.enable_cache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_MAX_ERROR)
+    engine = new_engine
+    model, le, feature_names = new_engine.model, new_engine.label_encoder, new_engine.feature_names
+
+
+def load_model(reload=False):
+    """
+    Load the ML model and label encoder into the shared InferenceEngine.
+
+    The model is loaded once per process (on import); later calls return
+    True straight away unless reload=True.
+    """
+    if engine is not None and not reload:
+        return True
     try:
         if MODEL_PATH.exists() and ENCODER_PATH.exists():
-            # Try loading with different joblib protocols for compatibility
             try:
-                model = joblib.load(MODEL_PATH)
-            except Exception as e1:
-                # Try with explicit protocol
-                try:
-                    import pickle
-                    with open(MODEL_PATH, 'rb') as f:
-                        model = pickle.load(f)
-                except Exception as e2:
-                    print(f"Error loading model: {e1}, fallback also failed: {e2}")
-                    return False
-            
-            try:
-                le = joblib.load(ENCODER_PATH)
-            except Exception as e1:
-                try:
-                    import pickle
-                    with open(ENCODER_PATH, 'rb') as f:
-                        le = pickle.load(f)
-                except Exception as e2:
-                    print(f"Error loading encoder: {e1}, fallback also failed: {e2}")
-                    return False
-            
-            # Load feature names from metadata
-            if METADATA_PATH.exists():
-                with open(METADATA_PATH, 'r') as f:
-                    metadata = json.load(f)
-                    feature_names = metadata.get('feature_names', [])
+                with STARTUP.phase("model load"):
+                    loaded = InferenceEngine.load(MODEL_PATH, ENCODER_PATH, METADATA_PATH)
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                return False
             
+            install_engine(loaded)
             return True
         else:
             print(f"Model files not found. Model: {MODEL_PATH.exists()}, Encoder: {ENCODER_PATH.exists()}")
@@ -76,51 +85,62 @@ def load_model():
 # Load on import
 load_model()
 
+
+def start_model_watcher(interval=RELOAD_INTERVAL, available_features=None):
+    """
+    Reload the model in the background whenever its files change.
+
+    Args:
+        interval: Seconds between checks of the model, encoder and metadata files
+        available_features: Feature names this process can extract; a new
+                            model needing others is rejected
+
+    Returns:
+        The running ModelReloader
+    """
+    global reloader
+    if reloader is None:
+        reloader = ModelReloader(MODEL_PATH, ENCODER_PATH, METADATA_PATH, on_swap=install_engine,
+                                 current=engine, interval=interval, available_features=available_features)
+    return reloader.start()
+
+
+def get_engine():
+    """The loaded InferenceEngine (raises if the model could not be loaded)"""
+    if engine is None:
+        raise ValueError("Model or label encoder not loaded")
+    return engine
+
+
+def configure_prediction_cache(max_entries, max_proba_error=0.0):
+    """
+    Cache predictions of the loaded engine and of every later load_model().
+
+    Args:
+        max_entries: LRU capacity in feature vectors (0 = no cache)
+        max_proba_error: Most a cached probability may differ from exact inference
+    """
+    global PREDICTION_CACHE_SIZE, PREDICTION_CACHE_MAX_ERROR
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_MAX_ERROR = max_entries, max_proba_error
+    if engine is not None:
+        if max_entries:
+            engine.enable_cache(max_entries, max_proba_error)
+        else:
+            engine.cache = None
+    return engine.cache if engine is not None else None
+
+
 def predict_flows(df):
     """
     Predict labels and probabilities for flow features.
     
     Args:
-        df: DataFrame with flow features
+        df: DataFrame with flow features (missing training features count as 0)
         
     Returns:
-        DataFrame with added 'predicted_label' and 'prediction_confidence' columns
+        Copy of df with added 'predicted_label' and 'prediction_confidence' columns
     """
-    if model is None or le is None:
-        raise ValueError("Model or label encoder not loaded")
-    
-    # Ensure all required features are present
-    if feature_names:
-        # Add missing features with zeros
-        missing = set(feature_names) - set(df.columns)
-        for col in missing:
-            df[col] = 0
-        
-        # Reorder to match training order
-        df = df[feature_names]
-    
-    # Make predictions
-    preds = model.predict(df)
-    
-    # Get probabilities
-    if hasattr(model, 'predict_proba'):
-        probs = model.predict_proba(df)
-        # Get confidence for the predicted label (max probability)
-        confidence = np.max(probs, axis=1)
-    else:
-        confidence = np.array([1.0] * len(preds))  # Default to 1 if no proba
-    
-    # Check if predictions are already labels (strings) or indices (integers)
-    if isinstance(preds[0], str) or (hasattr(preds, 'dtype') and preds.dtype == object):
-        # Predictions are already labels, use them directly
-        labels = preds
-    else:
-        # Predictions are indices, transform them to labels
-        labels = le.inverse_transform(preds)
-    
-    df_out = df.copy()
-    df_out["predicted_label"] = labels
-    df_out["prediction_confidence"] = confidence
-    
-    return df_out
-
+    engine = get_engine()
+    # Only the features go to the model; other columns (IPs, labels, ...) are passed through
+    labels, confidence = engine.predict_labels(df[[name for name in engine.feature_names if name in df.columns]])
+    return df.assign(predicted_label=labels, prediction_confidence=confidence)
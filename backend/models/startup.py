@@ -0,0 +1,187 @@
+# backend/models/startup.py
+
+"""
+Cold start helpers shared by the Flask API and the sniffer.
+
+STARTUP times the phases of process start (imports, model load, warm-up)
+and prints a one-line report. The startup cache (a small JSON file in the
+user cache directory) remembers model file discovery per directory listing and the
+label encoder's classes per encoder file, so a restart neither globs the
+model directories again nor unpickles the LabelEncoder (which imports
+sklearn, over a second on its own). Entries are keyed by directory and file
+mtime/size and go stale automatically.
+"""
+
+import time
+
+# Before any other import, so the import phase includes them
+_IMPORTED_AT = time.perf_counter()
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+# Discovery results and label classes, rebuilt whenever a keyed file changes.
+# Kept outside the model directories so writing it does not change their listing.
+STARTUP_CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "live_ids" / "startup_cache.json"
+
+# Modules a fast start avoids importing; the report lists those that were loaded anyway
+HEAVY_MODULES = ("sklearn", "pandas", "scapy.all", "joblib")
+
+
+class StartupTimer:
+    """Wall-clock seconds per startup phase, from the first import of this module"""
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = {}
+        self._imports_done = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def imports_done(self):
+        """Mark the end of the entry point's imports (model loads during import are excluded)"""
+        if self._imports_done is None:
+            elapsed = time.perf_counter() - self.started
+            self._imports_done = elapsed - sum(self.phases.values())
+            self.phases = {"imports": self._imports_done, **self.phases}
+
+    def summary(self):
+        total = time.perf_counter() - self.started
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        return (f"Startup: {phases} (total {total * 1000:.0f} ms); "
+                f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+    def report(self):
+        print(f"⏱️  {self.summary()}")
+
+
+STARTUP = StartupTimer(_IMPORTED_AT)
+
+
+class LabelClasses:
+    """The part of a fitted LabelEncoder that inference uses, without sklearn"""
+
+    def __init__(self, classes):
+        classes = np.asarray(classes)
+        # LabelEncoder fitted on strings keeps them in an object array
+        self.classes_ = classes.astype(object) if classes.dtype.kind == "U" else classes
+        self._index = {label: i for i, label in enumerate(self.classes_.tolist())}
+
+    def transform(self, y):
+        try:
+            return np.array([self._index[label] for label in list(y)], dtype=np.intp)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e.args[0]!r}") from None
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+
+_cache = None
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(STARTUP_CACHE_PATH, "r") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    # Per-process temp name: shard processes may save at the same time
+    tmp = STARTUP_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        STARTUP_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(_cache, f, indent=1)
+        os.replace(tmp, STARTUP_CACHE_PATH)
+    except OSError:
+        pass  # Read-only install: start without the cache
+
+
+def _stamp(path):
+    """(size, mtime_ns) of a file or directory, None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def discover_model_files(model_dir, artifacts_dir, model_name):
+    """
+    Find the model, label encoder and metadata files: model_name in model_dir,
+    else any ids_*/model*.joblib there, else the same in artifacts_dir.
+    Cached until either directory's listing changes.
+
+    Returns:
+        {"model": Path|None, "encoder": Path|None, "metadata": Path|None, "cached": bool}
+    """
+    model_dir, artifacts_dir = Path(model_dir), Path(artifacts_dir)
+    key = f"{model_dir}|{artifacts_dir}|{model_name}"
+    stamps = [_stamp(model_dir), _stamp(artifacts_dir)]
+    entry = _load_cache().get("discovery", {}).get(key)
+    if entry is not None and entry["stamps"] == stamps:
+        found = {name: Path(p) if p else None for name, p in entry["files"].items()}
+        if all(p is None or p.exists() for p in found.values()):
+            return {**found, "cached": True}
+
+    model_path = model_dir / model_name if (model_dir / model_name).exists() else None
+    encoder_path = None
+    for f in sorted(model_dir.glob("*.joblib")) if model_dir.exists() else []:
+        if "label_encoder" in f.name:
+            encoder_path = f
+        elif model_path is None and ("ids_" in f.name or "model" in f.name.lower()):
+            model_path = f
+    if (model_path is None or encoder_path is None) and artifacts_dir.exists():
+        if model_path is None and (artifacts_dir / model_name).exists():
+            model_path = artifacts_dir / model_name
+        for f in sorted(artifacts_dir.glob("*.joblib")):
+            if "label_encoder" in f.name:
+                encoder_path = f
+            elif model_path is None and "ids_" in f.name:
+                model_path = f
+    metadata_path = model_dir / "model_metadata.json"
+    if not metadata_path.exists():
+        metadata_path = artifacts_dir / "model_metadata.json"
+
+    found = {"model": model_path, "encoder": encoder_path,
+             "metadata": metadata_path if metadata_path.exists() else None}
+    _load_cache().setdefault("discovery", {})[key] = {
+        "stamps": stamps, "files": {name: str(p) if p else None for name, p in found.items()}}
+    _save_cache()
+    return {**found, "cached": False}
+
+
+def cached_label_classes(encoder_path):
+    """LabelClasses for a label encoder file seen before (same size and mtime), else None"""
+    entry = _load_cache().get("label_classes", {}).get(str(Path(encoder_path).resolve()))
+    if entry is None or entry["stamp"] != _stamp(encoder_path):
+        return None
+    return LabelClasses(entry["classes"])
+
+
+def remember_label_classes(encoder_path, label_encoder):
+    """Record a loaded encoder's classes for the next cold start"""
+    classes = getattr(label_encoder, "classes_", None)
+    if classes is None:
+        return
+    _load_cache().setdefault("label_classes", {})[str(Path(encoder_path).resolve())] = {
+        "stamp": _stamp(encoder_path), "classes": np.asarray(classes).tolist()}
+    _save_cache()
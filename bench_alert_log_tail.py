@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+read_latest_alerts(100) against log size: the old whole-file readlines()
+against the backward-seeking tail read, on a single active log and right
+after a rotation (when the newest alerts are split between a small active
+log and the last compressed segment).
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.log_segments import compress_segment, rotate, tail_lines
+
+SIZES_MB = (1, 64, 512)
+N = 100
+REPEATS = 20
+
+
+def fill(path, megabytes):
+    line = json.dumps({"timestamp": 1700000000.0, "flow": "('10.0.0.1', '10.7.19.211', 51234, 80, 6)",
+                       "label": "DDoS", "confidence": 0.9987,
+                       "features": {f"feature {i}": i * 1.5 for i in range(30)}}) + "\n"
+    block = line.encode() * max(1, (1 << 20) // len(line))
+    with open(path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(block)
+
+
+def readlines_tail(path, n):
+    with open(path, "r") as f:
+        lines = f.readlines()
+    return [json.loads(line) for line in lines[-n:]]
+
+
+def seek_tail(path, n):
+    return [json.loads(line) for line in tail_lines(path, n)]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    print("=" * 70)
+    print(f"Latest {N} alerts: average of {REPEATS} reads")
+    print("=" * 70)
+    print(f"{'log size':>9} {'readlines ms':>13} {'tail ms':>9} {'rotated tail ms':>16} {'speedup':>8}")
+    for megabytes in SIZES_MB:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ids_alerts.log"
+            fill(path, megabytes)
+            old = timed(readlines_tail, path, N)
+            new = timed(seek_tail, path, N)
+            # Just after rotation: 10 alerts in the active log, the rest in a compressed segment
+            compress_segment(rotate(path))
+            with open(path, "w") as f:
+                f.writelines(line.decode() + "\n" for line in tail_lines(path, 10))
+            rotated = timed(seek_tail, path, N)
+            print(f"{megabytes:>6} MB {old:>13.2f} {new:>9.2f} {rotated:>16.2f} {old / new:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
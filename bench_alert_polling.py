@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Cost of one idle dashboard poll of /api/latest-alerts?n=100 (no new
+alerts): the full response, a ?since= cursor request, and a conditional
+request answered 304. Server time per request through the Flask test
+client, and response body bytes.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import logger
+from live_ids.flow_key import pack_flow_key
+
+N = 100
+ALERTS = 10000
+REPEAT = 500
+
+KEY = pack_flow_key(("10.0.0.1", "10.0.0.2", 1234, 80, 6))
+
+
+def timed(client, url, headers=None):
+    response = client.get(url, headers=headers)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        client.get(url, headers=headers)
+    return (time.perf_counter() - start) / REPEAT * 1000, len(response.data), response.status_code
+
+
+def main():
+    import app as api
+
+    client = api.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = logger.LOG_FILE, logger.ALERT_RING_NAME
+        logger.LOG_FILE, logger.ALERT_RING_NAME = Path(tmp) / "ids_alerts.log", f"live_ids_bench_{os.getpid()}"
+        try:
+            logger.start_alert_writer()
+            features = {f"Feature {i}": float(i) for i in range(20)}
+            for _ in range(ALERTS):
+                logger.log_alert(KEY, "DDoS", 0.99, features)
+            logger.stop_alert_writer(report=False)
+
+            full = client.get(f'/api/latest-alerts?n={N}')
+            last_id, etag = full.get_json()['last_id'], full.headers['ETag']
+            rows = [
+                ("full response", timed(client, f'/api/latest-alerts?n={N}')),
+                ("?since=<last id>", timed(client, f'/api/latest-alerts?n={N}&since={last_id}')),
+                ("If-None-Match (304)", timed(client, f'/api/latest-alerts?n={N}', {'If-None-Match': etag})),
+            ]
+        finally:
+            logger.LOG_FILE, logger.ALERT_RING_NAME = saved
+
+    print("=" * 70)
+    print(f"Idle poll of the latest {N} alerts, {ALERTS} alerts in the log")
+    print("=" * 70)
+    print(f"{'request':<24} {'status':>6} {'ms':>8} {'bytes':>8} {'speedup':>8}")
+    for name, (ms, size, status) in rows:
+        print(f"{name:<24} {status:>6} {ms:>8.3f} {size:>8} {rows[0][1][0] / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
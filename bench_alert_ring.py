@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+/api/latest-alerts?n=100 sources: the old whole-file readlines(), the
+backward tail read of the log, and the sniffer's shared-memory ring: the
+raw copy, read_latest_alert_lines() as the API calls it, and
+read_latest_alerts() with JSON parsing.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from bench_alert_log_tail import fill, readlines_tail, seek_tail, timed
+from live_ids import logger
+from live_ids.alert_ring import AlertRing
+
+N = 100
+LOG_MB = 64
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ids_alerts.log"
+        fill(path, LOG_MB)
+        name = f"live_ids_bench_{os.getpid()}"
+        saved = logger.LOG_FILE, logger.ALERT_RING_NAME
+        logger.LOG_FILE, logger.ALERT_RING_NAME = path, name
+        ring = logger.open_alert_ring(name)
+        # A separate attachment, as an API worker process has
+        reader = AlertRing.attach(name)
+        sniffer_ring, logger.alert_ring = logger.alert_ring, None
+        try:
+            rows = [
+                ("file readlines()", timed(readlines_tail, path, N)),
+                ("file tail read", timed(seek_tail, path, N)),
+                ("ring copy (bytes)", timed(reader.latest, N)),
+                ("API lines (ring)", timed(logger.read_latest_alert_lines, N)),
+                ("read_latest_alerts (ring)", timed(logger.read_latest_alerts, N)),
+            ]
+        finally:
+            logger.alert_ring = sniffer_ring
+            reader.close()
+            logger.close_alert_ring()
+            logger._reader_ring = None
+            logger.LOG_FILE, logger.ALERT_RING_NAME = saved
+
+    print("=" * 70)
+    print(f"Latest {N} alerts from a {LOG_MB} MB log, ring of {ring.slots} alerts")
+    print("=" * 70)
+    print(f"{'source':<28} {'ms':>8} {'speedup':>8}")
+    for name, ms in rows:
+        print(f"{name:<28} {ms:>8.3f} {rows[0][1] / ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
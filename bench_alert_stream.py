@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load test for /api/alerts/stream: 500 SSE clients connected to the API
+(werkzeug, one thread per client) while the sniffer's ring receives alerts.
+Every client must receive every alert exactly once and in order; reports
+the delivery latency from publish to client and the API process's CPU time.
+"""
+
+import json
+import os
+import resource
+import selectors
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from werkzeug.serving import make_server
+
+from live_ids import alert_stream, logger
+from live_ids.alert_ring import AlertRing
+
+CLIENTS = 500
+ALERTS = 500
+RATE = 100  # alerts per second, published in batches of BATCH
+BATCH = 5
+
+
+def connect(port):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(b"GET /api/alerts/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    sock.setblocking(False)
+    return sock
+
+
+def main():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, 4 * CLIENTS)), hard))
+
+    import app as api
+
+    name = f"live_ids_bench_{os.getpid()}"
+    saved = logger.ALERT_RING_NAME, alert_stream._broadcaster
+    logger.ALERT_RING_NAME, alert_stream._broadcaster = name, None
+    ring = AlertRing.create(name, slots=4096)
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    selector = selectors.DefaultSelector()
+    received = {}  # socket -> [alert number, ...]
+    buffers = {}
+    latencies = []
+    try:
+        for _ in range(CLIENTS):
+            sock = connect(server.port)
+            selector.register(sock, selectors.EVENT_READ)
+            received[sock], buffers[sock] = [], b""
+        broadcaster = alert_stream.get_broadcaster()
+        deadline = time.time() + 30
+        while broadcaster.stats()["clients"] < CLIENTS and time.time() < deadline:
+            time.sleep(0.05)
+        connected = broadcaster.stats()["clients"]
+
+        published = {}
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        next_batch, sent = wall_start, 0
+        expected = CLIENTS * ALERTS
+        got = 0
+        deadline = time.time() + ALERTS / RATE + 30
+        while got < expected and time.time() < deadline:
+            now = time.perf_counter()
+            if sent < ALERTS and now >= next_batch:
+                batch = range(sent, min(sent + BATCH, ALERTS))
+                for i in batch:
+                    published[i] = now
+                ring.publish([json.dumps({"n": i, "label": "DDoS"}).encode() for i in batch])
+                sent += len(batch)
+                next_batch += BATCH / RATE
+            for key, _ in selector.select(timeout=0.005):
+                sock = key.fileobj
+                data = sock.recv(65536)
+                arrived = time.perf_counter()
+                if not data:
+                    selector.unregister(sock)
+                    continue
+                *events, buffers[sock] = (buffers[sock] + data).split(b"\n\n")
+                for event in events:
+                    for field in event.split(b"\n"):
+                        if field.startswith(b"data: "):
+                            n = json.loads(field[6:])["n"]
+                            received[sock].append(n)
+                            latencies.append(arrived - published[n])
+                            got += 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        stats = broadcaster.stats()
+    finally:
+        for sock in received:
+            sock.close()
+        server.shutdown()
+        if alert_stream._broadcaster is not None:
+            alert_stream._broadcaster.close()
+        ring.close()
+        logger.ALERT_RING_NAME, alert_stream._broadcaster = saved
+
+    complete = sum(1 for numbers in received.values() if numbers == list(range(ALERTS)))
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print("=" * 70)
+    print(f"SSE load test: {CLIENTS} clients, {ALERTS} alerts at {RATE}/s")
+    print("=" * 70)
+    print(f"{'clients connected':<36} {connected:>10}")
+    print(f"{'clients with every alert, in order':<36} {complete:>10}")
+    print(f"{'alerts delivered':<36} {got:>10} / {expected}")
+    print(f"{'overflow disconnects':<36} {stats['overflows']:>10}")
+    print(f"{'latency p50 (ms)':<36} {pct(50):>10.1f}")
+    print(f"{'latency p99 (ms)':<36} {pct(99):>10.1f}")
+    print(f"{'latency max (ms)':<36} {latencies[-1] * 1000:>10.1f}")
+    print(f"{'CPU (API + clients) / wall':<36} {cpu / wall:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Alert logging during a burst: synchronous log_alert() (open, append, close
+per alert) against the background AlertWriter with a few flush policies.
+
+Reports alerts/s as seen by the caller (the inference thread), alerts/s
+until everything is on disk, and the number of write() calls.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import logger
+from live_ids.feature_extractor import FEATURE_COLUMNS
+from live_ids.flow_key import pack_flow_key
+from live_ids.logger import AlertWriter
+
+ALERTS = 20_000
+
+
+def burst(seed=0):
+    """(key, features) per alert, features as the sniffer builds them"""
+    rng = np.random.default_rng(seed)
+    rows = rng.random((ALERTS, len(FEATURE_COLUMNS))) * 1e3
+    return [(pack_flow_key((f"10.0.{i % 250}.{i % 200 + 1}", "10.7.19.211", 1024 + i % 60000, 80, 6)),
+             dict(zip(FEATURE_COLUMNS, row.tolist()))) for i, row in enumerate(rows)]
+
+
+def run_sync(alerts, path):
+    saved, logger.LOG_FILE = logger.LOG_FILE, path
+    try:
+        start = time.perf_counter()
+        for key, features in alerts:
+            logger.log_alert(key, "DDoS", 0.99, features)
+        elapsed = time.perf_counter() - start
+    finally:
+        logger.LOG_FILE = saved
+    return elapsed, elapsed, len(alerts)
+
+
+def run_async(alerts, path, **policy):
+    writer = AlertWriter(path, maxsize=len(alerts), **policy).start()
+    start = time.perf_counter()
+    for key, features in alerts:
+        writer.submit(key, "DDoS", 0.99, features)
+    submitted = time.perf_counter() - start
+    writer.stop()
+    return submitted, time.perf_counter() - start, writer.stats()["writes"]
+
+
+def main():
+    alerts = burst()
+    print("=" * 70)
+    print(f"Alert log: burst of {ALERTS:,} alerts with {len(FEATURE_COLUMNS)} features each")
+    print("=" * 70)
+    print(f"{'writer':<28} {'caller/s':>10} {'on disk/s':>10} {'writes':>8} {'speedup':>8}")
+    runs = (
+        ("sync (open/close each)", run_sync, {}),
+        ("async, 256 / 100 ms", run_async, {}),
+        ("async, 16 / 10 ms", run_async, {"flush_every": 16, "flush_interval": 0.01}),
+        ("async, 256 / 100 ms, fsync", run_async, {"fsync": True}),
+    )
+    baseline = None
+    for name, run, policy in runs:
+        with tempfile.TemporaryDirectory() as tmp:
+            caller, total, writes = run(alerts, Path(tmp) / "alerts.log", **policy)
+        baseline = baseline or caller
+        print(f"{name:<28} {ALERTS / caller:>10,.0f} {ALERTS / total:>10,.0f} {writes:>8,} "
+              f"{baseline / caller:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Cold start of the sniffer and the Flask API, in fresh interpreters.
+
+"eager" is the previous startup: scapy.all, pandas and both pickles
+(sklearn estimator and LabelEncoder) loaded up front. The sniffer and API
+rows import the real entry points with an empty startup cache (first run)
+and a warm one (every later run). Times include interpreter startup.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+RUNS = 3
+
+EAGER = ("import sys; sys.path.insert(0, 'backend'); import scapy.all, pandas, joblib; "
+         "joblib.load('backend/models/ids_7class_histgb_safe.joblib'); "
+         "joblib.load('backend/models/label_encoder.joblib')")
+SNIFFER = ("import sys; sys.path.insert(0, 'backend'); import live_ids.packet_sniffer as s; "
+           "s.get_engine().warm_up(); s.STARTUP.report()")
+API = "import sys; sys.path.insert(0, 'backend'); import app"
+
+
+def run(code, cache_home):
+    env = {**os.environ, "XDG_CACHE_HOME": cache_home, "LOG_LEVEL": "WARNING"}
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=BASE_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return time.perf_counter() - start, out.strip().splitlines()[-1] if out.strip() else ""
+
+
+def main():
+    print("=" * 70)
+    print(f"Cold start (best of {RUNS}, fresh interpreter each)")
+    print("=" * 70)
+    print(f"{'':<28} {'seconds':>9}")
+    with tempfile.TemporaryDirectory() as empty:
+        print(f"{'eager (scapy.all + pickles)':<28} {min(run(EAGER, empty)[0] for _ in range(RUNS)):>9.2f}")
+    for name, code in (("sniffer", SNIFFER), ("api", API)):
+        firsts, warm = [], []
+        for _ in range(RUNS):
+            with tempfile.TemporaryDirectory() as cache_home:
+                firsts.append(run(code, cache_home)[0])
+                warm.append(run(code, cache_home))
+        print(f"{name + ', empty cache':<28} {min(firsts):>9.2f}")
+        best = min(warm)
+        print(f"{name + ', warm cache':<28} {best[0]:>9.2f}   {best[1]}")
+
+
+if __name__ == "__main__":
+    main()
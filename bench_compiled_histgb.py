@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Pickled sklearn HistGradientBoostingClassifier vs the array-compiled export.
+
+Load time is measured in a fresh interpreter (imports included), as a
+process pays it at startup. Latency is the median predict_proba() time at
+batch sizes 1, 64 and 10,000 on random rows.
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.compiled_histgb import load_compiled
+
+REPEATS = {1: 200, 64: 50, 10_000: 3}
+
+LOAD_SKLEARN = "import joblib; joblib.load({path!r})"
+LOAD_COMPILED = ("import sys; sys.path.insert(0, {backend!r}); "
+                 "from models.compiled_histgb import load_compiled; load_compiled({path!r})")
+
+
+def cold_load(code):
+    """Seconds to run `code` in a new interpreter, minus the bare interpreter startup"""
+    def run(source):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", source], check=True)
+        return time.perf_counter() - start
+    baseline = min(run("pass") for _ in range(3))
+    return min(run(code) for _ in range(3)) - baseline
+
+
+def median_latency(fn, X, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    model_path = predictor.MODEL_PATH
+    compiled_path = model_path.with_suffix(".npz")
+    model = joblib.load(model_path)
+    compiled = load_compiled(compiled_path)
+
+    sklearn_load = cold_load(LOAD_SKLEARN.format(path=str(model_path)))
+    compiled_load = cold_load(LOAD_COMPILED.format(backend=str(BASE_DIR / "backend"), path=str(compiled_path)))
+
+    rng = np.random.default_rng(0)
+    n_features = model.n_features_in_
+    X = rng.random((max(REPEATS), n_features)) * rng.choice([1.0, 1e3, 1e6], size=n_features)
+
+    print("=" * 70)
+    print(f"HistGB inference: {model.n_iter_} iterations x {model.n_trees_per_iteration_} classes")
+    print("=" * 70)
+    print(f"{'':<20} {'sklearn':>12} {'compiled':>12} {'speedup':>9}")
+    print(f"{'cold load (ms)':<20} {sklearn_load * 1e3:>12.1f} {compiled_load * 1e3:>12.1f} "
+          f"{sklearn_load / compiled_load:>8.1f}x")
+    for size, repeats in REPEATS.items():
+        batch = X[:size]
+        frame = pd.DataFrame(batch, columns=model.feature_names_in_)
+        slow = median_latency(model.predict_proba, frame, repeats)
+        fast = median_latency(compiled.predict_proba, batch, repeats)
+        print(f"{f'batch {size:,} (ms)':<20} {slow * 1e3:>12.2f} {fast * 1e3:>12.2f} {slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
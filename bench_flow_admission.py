@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Flow-table memory and CPU with and without first-packet flow admission.
+
+Runs the host traffic mix from bench_bpf_filter.py, with a narrow ephemeral
+port range so connections carry several packets (every packet reaching
+userspace, as with scapy or without libpcap) through the userspace path:
+header decode, flow table update, inline expiry and the expiry-time filter.
+Without admission every flow is stored until it expires and is then thrown
+away by should_process_flow(); with admission refused keys are never stored.
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from bench_bpf_filter import make_frames, TARGET
+from live_ids import packet_sniffer
+from live_ids.fast_decoder import decode_frame
+from live_ids.flow_manager import FlowManager
+
+
+def run(frames, admit, trace=False):
+    """Returns (seconds, peak traced bytes, peak open flows, flows passed to the model)"""
+    manager = FlowManager(admit=admit)
+    should_process = packet_sniffer.should_process_flow
+    now = 1_000_000.0
+    peak_flows = passed = 0
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        now += 0.0001
+        key, _ = decode_frame(frame)
+        if key is None:
+            continue
+        manager.update_flow(key, len(frame), now)
+        for f_key, flow in manager.end_expired_flows(now=now):
+            passed += should_process(f_key, flow)[0]
+        if i % 1000 == 0:
+            peak_flows = max(peak_flows, len(manager.flows))
+    for f_key, flow in manager.end_expired_flows(now=float("inf")):
+        passed += should_process(f_key, flow)[0]
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak, peak_flows, passed
+
+
+def main():
+    packet_sniffer.TARGET_IP = TARGET
+    frames = make_frames(ephemeral=(40000, 40064))
+
+    print("=" * 70)
+    print(f"Flow admission: {len(frames):,} packets of mixed host traffic")
+    print("=" * 70)
+    print(f"{'mode':<20} {'CPU s':>8} {'peak MiB':>10} {'peak flows':>12} {'to model':>10}")
+    for name, admit in (("filter at expiry", None), ("admission", packet_sniffer.admit_flow)):
+        elapsed, _, peak_flows, passed = run(frames, admit)
+        _, peak, _, _ = run(frames, admit, trace=True)
+        print(f"{name:<20} {elapsed:>8.2f} {peak / 2**20:>10.1f} {peak_flows:>12,} {passed:>10,}")
+
+
+if __name__ == "__main__":
+    main()
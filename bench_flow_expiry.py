@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark FlowManager per-packet cost as the flow table grows.
+
+Each packet does what packet_sniffer.process_packet does: update_flow() followed
+by end_expired_flows(). With the expiry heap the per-packet cost should stay
+flat from 1k to 1M live flows; the old full-table scan is shown for reference
+on the small tables only.
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.flow_manager import FlowManager, FLOW_TIMEOUT
+
+TABLE_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+SCAN_MAX_SIZE = 10_000  # the old O(flows) scan is too slow beyond this
+PACKETS = 100_000
+
+
+def make_key(i):
+    return (f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}", "10.7.19.211", 1024 + i % 60000, 80, 6)
+
+
+def scan_expired(manager, now):
+    """The previous implementation: walk the whole table on every call."""
+    ended = []
+    for key, flow in list(manager.flows.items()):
+        if now - flow["timestamps"][-1] > FLOW_TIMEOUT:
+            ended.append((key, flow))
+            del manager.flows[key]
+    return ended
+
+
+def run(table_size, use_scan=False, packets=PACKETS):
+    manager = FlowManager()
+    keys = [make_key(i) for i in range(table_size)]
+    now = 1_000_000.0
+    for key in keys:
+        manager.update_flow(key, 100, now)
+
+    # Packets hit random live flows while the clock advances slowly, so a
+    # small, steady fraction of new flows expires along the way.
+    rng = random.Random(0)
+    picks = [keys[rng.randrange(table_size)] for _ in range(packets)]
+    new_keys = [make_key(table_size + i) for i in range(packets // 100)]
+    step = 0.5 * FLOW_TIMEOUT / packets
+    expired = 0
+
+    start = time.perf_counter()
+    for i, key in enumerate(picks):
+        now += step
+        if i % 100 == 0:
+            key = new_keys[i // 100]
+        manager.update_flow(key, 100, now)
+        if use_scan:
+            expired += len(scan_expired(manager, now))
+        else:
+            expired += len(manager.end_expired_flows(now=now))
+    elapsed = time.perf_counter() - start
+    return elapsed / packets * 1e6, expired
+
+
+def main():
+    print("=" * 60)
+    print("FlowManager per-packet cost (update_flow + end_expired_flows)")
+    print("=" * 60)
+    print(f"{'flows':>10} {'heap us/pkt':>14} {'scan us/pkt':>14}")
+    for size in TABLE_SIZES:
+        heap_us, _ = run(size)
+        if size <= SCAN_MAX_SIZE:
+            scan_us, _ = run(size, use_scan=True, packets=PACKETS // 100)
+            scan_col = f"{scan_us:14.2f}"
+        else:
+            scan_col = f"{'-':>14}"
+        print(f"{size:>10} {heap_us:14.2f} {scan_col}")
+
+
+if __name__ == "__main__":
+    main()
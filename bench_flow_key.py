@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tuple-of-strings flow keys vs packed integer keys.
+
+Times the three per-packet / per-flow steps the key touches: building the key
+from the raw IPv4 header bytes, looking the flow up in the table, and running
+the sniffer's whitelist/target filters on the key.
+"""
+
+import socket
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.flow_key import pack_flow_key, unpack_fields
+
+FLOWS = 100_000
+PACKETS = 1_000_000
+
+# The string prefixes the whitelist used before benign_networks.txt
+IP_PREFIXES = ['8.8.8.', '8.8.4.', '142.250.', '142.251.', '142.252.', '172.217.',
+               '216.58.', '17.248.', '35.186.', '34.160.', '100.24.']
+
+_ports = struct.Struct("!HH")
+_addrs = struct.Struct("!Q")
+
+
+def make_headers(n=FLOWS):
+    """IPv4 address bytes + port bytes for n flows to the monitored host"""
+    headers = []
+    for i in range(n):
+        addrs = bytes([203, (i >> 16) & 255, (i >> 8) & 255, i & 255]) + socket.inet_aton("10.7.19.211")
+        headers.append((addrs, _ports.pack(1024 + i % 60000, 80)))
+    return headers
+
+
+def tuple_key(addrs, ports):
+    sport, dport = _ports.unpack(ports)
+    return (socket.inet_ntoa(addrs[:4]), socket.inet_ntoa(addrs[4:]), sport, dport, 6)
+
+
+def packed_key(addrs, ports):
+    sport, dport = _ports.unpack(ports)
+    return (_addrs.unpack(addrs)[0] << 40) | (sport << 24) | (dport << 8) | 6
+
+
+def tuple_filter(flow_key):
+    """The original string filters (is_whitelisted + target IP + 10.x checks)"""
+    src_ip, dst_ip, src_port, dst_port, protocol = flow_key
+    if packet_sniffer.TARGET_IP not in [src_ip, dst_ip]:
+        return False
+    wl = packet_sniffer.BENIGN_WHITELIST
+    if protocol == 17 and dst_port == 443:
+        return False
+    if src_port in wl['ports'] or dst_port in wl['ports']:
+        return False
+    for prefix in wl['multicast_prefixes']:
+        if dst_ip.startswith(prefix):
+            return False
+    for prefix in IP_PREFIXES:
+        if src_ip.startswith(prefix) or dst_ip.startswith(prefix):
+            return False
+    if src_ip.startswith("10.") and dst_ip.startswith("10."):
+        return False
+    return dst_port in packet_sniffer.SUSPECT_PORTS
+
+
+def packed_filter(flow_key):
+    """The same checks as should_process_flow() runs on packed keys"""
+    src_ip, dst_ip, src_port, dst_port, protocol = unpack_fields(flow_key)
+    target = packet_sniffer._target_matcher(packet_sniffer.TARGET_IP, packet_sniffer.TARGET_NETWORKS)
+    if src_ip not in target and dst_ip not in target:
+        return False
+    if packet_sniffer._whitelisted_fields(src_ip, dst_ip, src_port, dst_port, protocol):
+        return False
+    if (src_ip & packet_sniffer.PRIVATE_LAN_MASK == packet_sniffer.PRIVATE_LAN_NET
+            and dst_ip & packet_sniffer.PRIVATE_LAN_MASK == packet_sniffer.PRIVATE_LAN_NET):
+        return False
+    return dst_port in packet_sniffer.SUSPECT_PORTS
+
+
+def rate(fn, items):
+    start = time.perf_counter()
+    fn(items)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    packet_sniffer.TARGET_IP = "10.7.19.211"
+    headers = make_headers()
+    packets = [headers[i % FLOWS] for i in range(PACKETS)]
+
+    print("=" * 60)
+    print(f"Flow keys: {FLOWS:,} flows, {PACKETS:,} packets")
+    print("=" * 60)
+    print(f"{'step':<26} {'tuple keys':>14} {'packed keys':>14}")
+
+    for name, make in (("tuple", tuple_key), ("packed", packed_key)):
+        keys = [make(a, p) for a, p in headers]
+        table = {k: None for k in keys}
+        packet_keys = [keys[i % FLOWS] for i in range(PACKETS)]
+        filt = tuple_filter if name == "tuple" else packed_filter
+        results = (
+            rate(lambda items: [make(a, p) for a, p in items], packets),
+            rate(lambda items: [table.get(k) for k in items], packet_keys),
+            rate(lambda items: [filt(k) for k in items], keys),
+            sys.getsizeof(keys[0]) + (sum(sys.getsizeof(f) for f in keys[0]) if name == "tuple" else 0),
+        )
+        if name == "tuple":
+            baseline = results
+        else:
+            packed = results
+
+    for i, step in enumerate(("key build (pkts/s)", "table lookup (pkts/s)", "filters (flows/s)")):
+        print(f"{step:<26} {baseline[i]:>14,.0f} {packed[i]:>14,.0f}")
+    print(f"{'key size (bytes)':<26} {baseline[3]:>14,} {packed[3]:>14,}")
+
+    assert all(tuple_filter(tuple_key(a, p)) == packed_filter(packed_key(a, p)) for a, p in headers[:1000])
+    assert packed_key(*headers[0]) == pack_flow_key(tuple_key(*headers[0]))
+
+
+if __name__ == "__main__":
+    main()
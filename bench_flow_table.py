@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Flow table memory and update throughput at 1M concurrent flows.
+
+Compares the original dict-of-lists flow record with FlowRecord (__slots__ +
+typed arrays) and StreamingFlowRecord (O(1) running statistics). Memory is
+the tracemalloc growth of the table divided by the number of flows, excluding
+the pre-built flow keys.
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.flow_manager import FlowManager
+
+FLOWS = 1_000_000
+PACKETS_PER_FLOW = [1, 4]  # 1 = spoofed-source flood, 4 = short connections
+
+
+class DictFlowManager(FlowManager):
+    """The original record layout: a dict holding two lists and an int (no expiry heap)."""
+
+    def update_flow(self, key, packet_size, timestamp):
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = {"packet_sizes": [], "timestamps": [], "total_bytes": 0}
+            self.flows[key] = flow
+        flow["packet_sizes"].append(packet_size)
+        flow["timestamps"].append(timestamp)
+        flow["total_bytes"] += packet_size
+
+
+def make_keys(n=FLOWS):
+    return [(f"203.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}", "10.7.19.211", 1024 + i % 60000, 80, 6)
+            for i in range(n)]
+
+
+def fill(manager, keys, packets):
+    t = 1_000_000.0
+    update = manager.update_flow
+    for p in range(packets):
+        for key in keys:
+            t += 0.000001
+            update(key, 60 + p, t)
+
+
+def measure(name, factory, keys, packets):
+    tracemalloc.start()
+    manager = factory()
+    before = tracemalloc.get_traced_memory()[0]
+    fill(manager, keys, packets)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    bytes_per_flow = (after - before) / len(keys)
+    del manager
+
+    manager = factory()
+    start = time.perf_counter()
+    fill(manager, keys, packets)
+    elapsed = time.perf_counter() - start
+    updates = len(keys) * packets
+    print(f"{name:<22} {bytes_per_flow:>10.0f} {updates / elapsed:>14,.0f}")
+
+
+def main():
+    keys = make_keys()
+    for packets in PACKETS_PER_FLOW:
+        print("=" * 60)
+        print(f"Flow table at {FLOWS:,} flows x {packets} packet(s)")
+        print("=" * 60)
+        print(f"{'record':<22} {'bytes/flow':>10} {'updates/sec':>14}")
+        measure("dict of lists", DictFlowManager, keys, packets)
+        measure("FlowRecord", FlowManager, keys, packets)
+        measure("StreamingFlowRecord", lambda: FlowManager(streaming=True), keys, packets)
+
+
+if __name__ == "__main__":
+    main()
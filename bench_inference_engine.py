@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Old predict_flows() path vs InferenceEngine.score().
+
+The old path reindexed the DataFrame by column name, ran model.predict()
+and then model.predict_proba() on the same rows (two ensemble passes) and
+copied the frame to attach the results. The engine aligns a numpy matrix
+with a cached column plan and runs predict_proba() once.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+
+ROWS = 20_000
+
+
+def old_predict_flows(df, model, le, feature_names):
+    """predict_flows() before the InferenceEngine"""
+    missing = set(feature_names) - set(df.columns)
+    for col in missing:
+        df[col] = 0
+    df = df[feature_names]
+    preds = model.predict(df)
+    probs = model.predict_proba(df)
+    confidence = np.max(probs, axis=1)
+    labels = preds if preds.dtype == object else le.inverse_transform(preds)
+    df_out = df.copy()
+    df_out["predicted_label"] = labels
+    df_out["prediction_confidence"] = confidence
+    return df_out
+
+
+def rate(fn, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        fn(batch)
+    return sum(len(b) for b in batches) / (time.perf_counter() - start)
+
+
+def main():
+    engine = predictor.get_engine()
+    names = engine.feature_names
+    rng = np.random.default_rng(0)
+    X = rng.random((ROWS, len(names))) * rng.choice([1.0, 1e3, 1e6], size=len(names))
+
+    print("=" * 70)
+    print(f"Inference: {ROWS:,} rows, {len(names)} features, {type(engine.model).__name__}")
+    print("=" * 70)
+    print(f"{'batch':>8} {'old rows/s':>14} {'engine rows/s':>15} {'speedup':>9}")
+    for size in (1, 64, 1024):
+        count = min(ROWS // size, 2000)
+        batches = [X[i * size:(i + 1) * size] for i in range(count)]
+        frames = [pd.DataFrame(b, columns=names) for b in batches]
+        old = rate(lambda df: old_predict_flows(df, engine.model, engine.label_encoder, names), frames)
+        new = rate(engine.score, batches)
+        print(f"{size:>8} {old:>14,.0f} {new:>15,.0f} {new / old:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
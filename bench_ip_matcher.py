@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Network whitelist lookups: string prefixes vs the compiled IPMatcher.
+
+Generates 10,000 random CIDR prefixes (/12 - /28) and times a membership test
+for random addresses three ways: the old str.startswith() loop over dotted
+prefixes (only possible for octet-aligned prefixes, so those are rounded to
+/8, /16 or /24), one masked set lookup per distinct prefix length, and the
+sorted-interval bisect in IPMatcher.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.flow_key import int_to_ip
+from live_ids.ip_matcher import IPMatcher, parse_network
+
+PREFIXES = 10_000
+LOOKUPS = 20_000
+
+
+def make_networks(n=PREFIXES, seed=0):
+    rng = random.Random(seed)
+    networks = []
+    for _ in range(n):
+        prefix = rng.randrange(12, 29)
+        network = rng.getrandbits(32) & (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+        networks.append(f"{int_to_ip(network)}/{prefix}")
+    return networks
+
+
+def string_prefixes(networks):
+    """Dotted string prefixes like the old BENIGN_WHITELIST['ip_prefixes']"""
+    prefixes = []
+    for network in networks:
+        address, prefix = network.split("/")
+        octets = max(1, int(prefix) // 8)
+        prefixes.append(".".join(address.split(".")[:octets]) + ".")
+    return prefixes
+
+
+def masked_sets(networks):
+    """{mask: {network, ...}} - one set lookup per distinct prefix length"""
+    table = {}
+    for network in networks:
+        first, last = parse_network(network)
+        mask = ~(first ^ last) & 0xFFFFFFFF
+        table.setdefault(mask, set()).add(first)
+    return list(table.items())
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    hits = fn(items)
+    return len(items) / (time.perf_counter() - start), hits
+
+
+def main():
+    networks = make_networks()
+    rng = random.Random(1)
+    ips = [rng.getrandbits(32) for _ in range(LOOKUPS)]
+    dotted = [int_to_ip(ip) for ip in ips]
+
+    start = time.perf_counter()
+    matcher = IPMatcher(networks)
+    build = time.perf_counter() - start
+    prefixes = string_prefixes(networks)
+    table = masked_sets(networks)
+
+    print("=" * 70)
+    print(f"Whitelist lookups: {PREFIXES:,} prefixes, {LOOKUPS:,} addresses")
+    print(f"IPMatcher build: {build * 1000:.1f} ms, {matcher!r}")
+    print("=" * 70)
+    print(f"{'method':<28} {'lookups/s':>14} {'hits':>8}")
+    for name, fn, items in (
+        ("str.startswith loop", lambda xs: sum(any(x.startswith(p) for p in prefixes) for x in xs), dotted[:1000]),
+        (f"masked sets ({len(table)} masks)", lambda xs: sum(any(x & m in s for m, s in table) for x in xs), ips),
+        ("IPMatcher (bisect)", lambda xs: sum(x in matcher for x in xs), ips),
+    ):
+        rate, hits = timed(fn, items)
+        print(f"{name:<28} {rate:>14,.0f} {hits * LOOKUPS // len(items):>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+InferenceEngine.score() with and without the quantized prediction cache.
+
+Traffic is a flood: jittered copies of a few base flows, scored in batches
+of 64 (the sniffer's batch size), plus a row of uniformly random flows as
+the no-repetition worst case. Reports rows/s, hit rate, cache size and the
+largest probability difference from exact inference.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.inference_engine import InferenceEngine
+
+ROWS = 20_000
+BATCH = 64
+
+
+def traffic(n_features, jitter, seed=0):
+    rng = np.random.default_rng(seed)
+    scale = rng.choice([1.0, 1e3, 1e6], size=n_features)
+    if jitter is None:
+        return rng.random((ROWS, n_features)) * scale
+    bases = rng.random((8, n_features)) * scale
+    X = bases[rng.integers(0, len(bases), size=ROWS)]
+    return X * (1 + jitter * rng.standard_normal(X.shape))
+
+
+def run(engine, X):
+    start = time.perf_counter()
+    proba = [engine.score(X[i:i + BATCH])[2] for i in range(0, len(X), BATCH)]
+    return len(X) / (time.perf_counter() - start), np.vstack(proba)
+
+
+def main():
+    base = predictor.get_engine()
+    n_features = len(base.feature_names)
+
+    print("=" * 70)
+    print(f"Prediction cache: {ROWS:,} flows in batches of {BATCH}, {type(base.model).__name__}")
+    print("=" * 70)
+    print(f"{'traffic':<14} {'max error':>9} {'rows/s':>10} {'cached/s':>10} {'speedup':>8} "
+          f"{'hits':>7} {'KiB':>6} {'diff':>9}")
+    for name, jitter in (("exact repeats", 0.0), ("1% jitter", 0.01), ("5% jitter", 0.05), ("random", None)):
+        X = traffic(n_features, jitter)
+        plain = InferenceEngine(base.model, base.label_encoder, base.feature_names)
+        slow, exact = run(plain, X)
+        for max_error in (0.0, 0.05):
+            cached = InferenceEngine(base.model, base.label_encoder, base.feature_names)
+            cache = cached.enable_cache(max_entries=50_000, max_proba_error=max_error)
+            fast, proba = run(cached, X)
+            s = cache.stats()
+            print(f"{name:<14} {max_error:>9.2f} {slow:>10,.0f} {fast:>10,.0f} {fast / slow:>7.1f}x "
+                  f"{s['hit_rate']:>7.1%} {s['bytes'] / 1024:>6.0f} {np.abs(proba - exact).max():>9.2g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Single-process replay vs sharded multi-process replay.
+
+Writes a classic pcap of many short TCP flows to the monitored host (enough
+packets each to pass the sniffer filters, so every flow is scored by the
+model) and replays it with the fast decoder: once in this process (with a
+micro-batching inference thread), then with 1, 2 and 4 shard processes. Model loading in the shards is not timed.
+Scaling is bounded by the number of cores available.
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.pipeline import ScoringPipeline
+from live_ids.sharded import replay_pcap_sharded
+
+FLOWS = 10_000
+PACKETS_PER_FLOW = 20
+SHARD_COUNTS = [1, 2, 4]
+TARGET = "10.7.19.211"
+
+
+def write_pcap(path):
+    """FLOWS interleaved TCP flows to TARGET:80, PACKETS_PER_FLOW packets each"""
+    dst = bytes(int(o) for o in TARGET.split("."))
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        ts = 1_000_000.0
+        for p in range(PACKETS_PER_FLOW):
+            for i in range(FLOWS):
+                ts += 0.00001
+                src = bytes([203, 0, (i >> 8) & 255, i & 255])
+                ip = (struct.pack("!BBHHHBBH", 0x45, 0, 40 + p, 0, 0, 64, 6, 0) + src + dst)
+                tcp = struct.pack("!HHIIBBHHH", 1024 + i, 80, 0, 0, 0x50, 0x10, 1024, 0, 0)
+                frame = b"\x00" * 12 + b"\x08\x00" + ip + tcp + b"x" * p
+                sec = int(ts)
+                f.write(struct.pack("<IIII", sec, int((ts - sec) * 1e6), len(frame), len(frame)))
+                f.write(frame)
+
+
+def quiet(fn, *args, **kwargs):
+    """Run fn with the per-flow debug prints going to /dev/null"""
+    stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sys.stdout = stdout
+
+
+def main():
+    packets = FLOWS * PACKETS_PER_FLOW
+    print("=" * 60)
+    print(f"Replay of {packets:,} packets / {FLOWS:,} scored flows, {os.cpu_count()} CPU(s)")
+    print("=" * 60)
+    print(f"{'mode':<22} {'packets/sec':>14} {'speedup':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "flows.pcap"
+        write_pcap(path)
+
+        packet_sniffer.TARGET_IP = TARGET
+        pipeline = ScoringPipeline(packet_sniffer.score_flow, workers=1, maxsize=FLOWS,
+                                   batch_handler=packet_sniffer.score_flows, batch_size=512)
+        packet_sniffer.scoring_pipeline = pipeline.start()
+        start = time.perf_counter()
+        quiet(packet_sniffer.replay_pcap, path, fast=True)
+        quiet(pipeline.stop)
+        base = packets / (time.perf_counter() - start)
+        print(f"{'single process':<22} {base:>14,.0f} {1.0:>9.2f}x")
+
+        for shards in SHARD_COUNTS:
+            stats, _ = quiet(replay_pcap_sharded, path, shards=shards, target_ip=TARGET, fast=True)
+            rate = stats["packets_per_sec"]
+            print(f"{f'{shards} shard(s)':<22} {rate:>14,.0f} {rate / base:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
+import useAlertStream from './useAlertStream';
 import './AnimatedDashboard.css';
 
-const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5050';
-
 // Attack type configurations
 const ATTACK_CONFIG = {
   'Bruteforce': {
@@ -38,23 +37,13 @@ const ATTACK_CONFIG = {
 };
 
 function AnimatedDashboard() {
-  const [alerts, setAlerts] = useState([]);
   const [isPolling, setIsPolling] = useState(false);
+  const { alerts } = useAlertStream(isPolling, 10, 2000);
   const [scene, setScene] = useState('calm'); // calm, suspicious, attack, resolved
   const [currentAttack, setCurrentAttack] = useState(null);
   const [previousAlertCount, setPreviousAlertCount] = useState(0);
   const sceneTimeoutRef = useRef(null);
 
-  useEffect(() => {
-    if (isPolling) {
-      const interval = setInterval(() => {
-        fetchAlerts();
-      }, 2000); // Poll every 2 seconds for smoother animations
-
-      return () => clearInterval(interval);
-    }
-  }, [isPolling]);
-
   useEffect(() => {
     // Determine scene based on alerts
     if (alerts.length === 0 && isPolling) {
@@ -93,34 +82,9 @@ function AnimatedDashboard() {
     setPreviousAlertCount(alerts.length);
   }, [alerts, isPolling, previousAlertCount, scene]);
 
-  const fetchAlerts = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/latest-alerts?n=10`, {
-        method: 'GET',
-        mode: 'cors',
-        credentials: 'include',
-        headers: {
-          'Content-Type': 'application/json',
-        }
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
-      if (data.success) {
-        setAlerts(data.alerts || []);
-      }
-    } catch (err) {
-      console.error('Error fetching alerts:', err);
-    }
-  };
-
   const togglePolling = () => {
     setIsPolling(!isPolling);
     if (!isPolling) {
-      fetchAlerts();
       setScene('calm');
       setCurrentAttack(null);
     }
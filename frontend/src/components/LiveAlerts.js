@@ -1,10 +1,9 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import AnimatedDashboard from './AnimatedDashboard';
 import MinimalLiveDashboard from './MinimalLiveDashboard';
+import useAlertStream from './useAlertStream';
 import './LiveAlerts.css';
 
-const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5050';
-
 function LiveAlerts({ onNavigate }) {
   const [viewMode, setViewMode] = useState('minimal'); // 'minimal', 'animated', 'list'
 
@@ -88,51 +87,11 @@ function LiveAlerts({ onNavigate }) {
 }
 
 function LiveAlertsList() {
-  const [alerts, setAlerts] = useState([]);
   const [isPolling, setIsPolling] = useState(false);
-  const [error, setError] = useState(null);
-
-  useEffect(() => {
-    if (isPolling) {
-      const interval = setInterval(() => {
-        fetchAlerts();
-      }, 3000); // Poll every 3 seconds
-
-      return () => clearInterval(interval);
-    }
-  }, [isPolling]);
-
-  const fetchAlerts = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/latest-alerts?n=50`, {
-        method: 'GET',
-        mode: 'cors',
-        credentials: 'include',
-        headers: {
-          'Content-Type': 'application/json',
-        }
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
-      if (data.success) {
-        setAlerts(data.alerts || []);
-        setError(null);
-      }
-    } catch (err) {
-      console.error('Error fetching alerts:', err);
-      setError(err.message);
-    }
-  };
+  const { alerts, error } = useAlertStream(isPolling, 50, 3000);
 
   const togglePolling = () => {
     setIsPolling(!isPolling);
-    if (!isPolling) {
-      fetchAlerts(); // Fetch immediately when starting
-    }
   };
 
   const getLabelColor = (label) => {
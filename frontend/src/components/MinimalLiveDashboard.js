@@ -1,8 +1,7 @@
 import React, { useState, useEffect } from 'react';
+import useAlertStream from './useAlertStream';
 import './MinimalLiveDashboard.css';
 
-const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5050';
-
 // Navigation function passed from parent
 let navigateToTab = null;
 export const setNavigateToTab = (fn) => {
@@ -49,8 +48,8 @@ const ATTACK_CONFIG = {
   }
 };
 
-  const [alerts, setAlerts] = useState([]);
   const [isPolling, setIsPolling] = useState(false);
+  const { alerts } = useAlertStream(isPolling, 100, 2000);
   const [selectedAlert, setSelectedAlert] = useState(null);
   const [showDetails, setShowDetails] = useState(false);
   const [stats, setStats] = useState({
@@ -60,16 +59,6 @@ const ATTACK_CONFIG = {
     lastUpdate: null
   });
 
-  useEffect(() => {
-    if (isPolling) {
-      const interval = setInterval(() => {
-        fetchAlerts();
-      }, 2000); // Poll every 2 seconds
-
-      return () => clearInterval(interval);
-    }
-  }, [isPolling]);
-
   useEffect(() => {
     // Update stats when alerts change
     const benignCount = alerts.filter(a => a.label === 'Benign').length;
@@ -82,35 +71,8 @@ const ATTACK_CONFIG = {
     });
   }, [alerts]);
 
-  const fetchAlerts = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/latest-alerts?n=100`, {
-        method: 'GET',
-        mode: 'cors',
-        credentials: 'include',
-        headers: {
-          'Content-Type': 'application/json',
-        }
-      });
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      const data = await response.json();
-      if (data.success) {
-        setAlerts(data.alerts || []);
-      }
-    } catch (err) {
-      console.error('Error fetching alerts:', err);
-    }
-  };
-
   const togglePolling = () => {
     setIsPolling(!isPolling);
-    if (!isPolling) {
-      fetchAlerts();
-    }
   };
 
   const getAttackConfig = (label) => {
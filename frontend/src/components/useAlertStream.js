@@ -0,0 +1,91 @@
+import { useEffect, useState } from 'react';
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5050';
+
+/**
+ * The newest `limit` alerts while `active`, pushed by /api/alerts/stream.
+ * Falls back to polling /api/latest-alerts when the browser has no
+ * EventSource or the server refuses the stream (too many clients).
+ */
+function useAlertStream(active, limit, pollInterval = 3000) {
+  const [alerts, setAlerts] = useState([]);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    if (!active) {
+      return undefined;
+    }
+    let source = null;
+    let interval = null;
+
+    const fetchAlerts = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/api/latest-alerts?n=${limit}`, {
+          method: 'GET',
+          mode: 'cors',
+          credentials: 'include',
+          headers: {
+            'Content-Type': 'application/json',
+          }
+        });
+
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        if (data.success) {
+          setAlerts(data.alerts || []);
+          setError(null);
+        }
+      } catch (err) {
+        console.error('Error fetching alerts:', err);
+        setError(err.message);
+      }
+    };
+
+    const startPolling = () => {
+      fetchAlerts();
+      interval = setInterval(fetchAlerts, pollInterval);
+    };
+
+    setAlerts([]);
+    if (typeof window.EventSource === 'undefined') {
+      startPolling();
+    } else {
+      // The stream starts with the last `limit` alerts. On reconnect the browser
+      // sends Last-Event-ID and gets only the alerts it missed.
+      source = new EventSource(`${API_BASE_URL}/api/alerts/stream?backlog=${limit}`, {
+        withCredentials: true
+      });
+      source.addEventListener('alert', (event) => {
+        const alert = JSON.parse(event.data);
+        setAlerts((current) => [...current, alert].slice(-limit));
+        setError(null);
+      });
+      // The missed alerts are gone; a fresh backlog follows
+      source.addEventListener('reset', () => setAlerts([]));
+      source.onerror = () => {
+        if (source.readyState === window.EventSource.CLOSED) {
+          source = null;
+          startPolling();
+        } else {
+          setError('Alert stream disconnected, reconnecting...');
+        }
+      };
+    }
+
+    return () => {
+      if (source) {
+        source.close();
+      }
+      if (interval) {
+        clearInterval(interval);
+      }
+    };
+  }, [active, limit, pollInterval]);
+
+  return { alerts, error };
+}
+
+export default useAlertStream;
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for alert ids and the incremental alerts API: ids increase across
+batches, writers, restarts and rotations, ?since= returns only newer
+alerts, and conditional requests get 304 until a new alert is logged.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import logger
+from live_ids.flow_key import pack_flow_key
+from live_ids.log_segments import ids_path, last_alert_id, tail_lines
+from live_ids.logger import AlertWriter
+
+KEY = pack_flow_key(("10.0.0.1", "10.0.0.2", 1234, 80, 6))
+RING = f"live_ids_ids_test_{os.getpid()}"  # never created: the API reads the file
+
+
+def ids(lines):
+    return [json.loads(line)["id"] for line in lines]
+
+
+def write(path, count, **options):
+    writer = AlertWriter(path, **options).start()
+    for _ in range(count):
+        writer.submit(KEY, "DDoS", 0.99)
+    writer.stop()
+
+
+@contextmanager
+def api_log(tmp):
+    """logger reading a temp log, as the API process does (no writer, no ring)"""
+    saved = logger.LOG_FILE, logger.ALERT_RING_NAME
+    logger.LOG_FILE, logger.ALERT_RING_NAME = Path(tmp) / "alerts.log", RING
+    logger._reader_ring = logger._reader_checked = None
+    try:
+        yield
+    finally:
+        logger._reader_ring = logger._reader_checked = None
+        logger.LOG_FILE, logger.ALERT_RING_NAME = saved
+
+
+def test_ids_increase_across_restarts_and_rotation():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        assert last_alert_id(path) == (0, 0)
+        write(path, 3, flush_every=2)
+        assert ids(tail_lines(path, 10)) == [1, 2, 3]
+        last, written_ns = last_alert_id(path)
+        assert last == 3 and abs(written_ns / 1e9 - time.time()) < 60
+
+        write(path, 2)
+        # Counter lost: continue from the newest alert in the log
+        ids_path(path).unlink()
+        write(path, 2)
+        assert ids(tail_lines(path, 10)) == [1, 2, 3, 4, 5, 6, 7]
+
+        # Rotated segments do not restart the count
+        write(path, 20, flush_every=1, segment_bytes=200)
+        assert ids(tail_lines(path, 100)) == list(range(1, 28))
+
+
+def test_concurrent_writers_append_in_id_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        threads = [threading.Thread(target=write, args=(path, 50), kwargs={"flush_every": 3}) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert ids(tail_lines(path, 1000)) == list(range(1, 201))
+        assert last_alert_id(path)[0] == 200
+
+
+def test_since_cursor():
+    with tempfile.TemporaryDirectory() as tmp, api_log(tmp):
+        for label in ("DDoS", "DoS", "Bot", "PortScan", "Infiltration"):
+            logger.log_alert(KEY, label, 0.99)
+        assert logger.latest_alert_id()[0] == 5
+        lines, truncated = logger.read_alert_lines_since(2, 50)
+        assert ids(lines) == [3, 4, 5] and not truncated
+        lines, truncated = logger.read_alert_lines_since(0, 2)
+        assert ids(lines) == [4, 5] and truncated
+        assert logger.read_alert_lines_since(5, 50) == ([], False)
+
+
+def test_latest_alerts_cursor_and_conditional_requests():
+    import app as api
+
+    client = api.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp, api_log(tmp):
+        for label in ("DDoS", "DoS", "Bot"):
+            logger.log_alert(KEY, label, 0.99)
+        first = client.get('/api/latest-alerts?n=5')
+        data = first.get_json()
+        assert first.status_code == 200 and data['last_id'] == 3 and data['count'] == 3
+        assert [a['id'] for a in data['alerts']] == [1, 2, 3]
+        assert first.headers['Cache-Control'] == 'no-cache' and first.headers['ETag']
+
+        # Nothing new: 304, no body
+        again = client.get('/api/latest-alerts?n=5', headers={'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 304 and again.data == b''
+
+        logger.log_alert(KEY, "PortScan", 0.99)
+        changed = client.get('/api/latest-alerts?n=5', headers={'If-None-Match': first.headers['ETag']})
+        assert changed.status_code == 200 and changed.get_json()['last_id'] == 4
+
+        data = client.get('/api/latest-alerts?since=3').get_json()
+        assert [a['label'] for a in data['alerts']] == ["PortScan"]
+        assert data['last_id'] == 4 and not data['truncated'] and not data['reset']
+        assert client.get('/api/latest-alerts?since=4').get_json()['alerts'] == []
+        assert client.get('/api/latest-alerts?since=1&n=2').get_json()['truncated']
+        # A cursor from a log that was replaced: the latest n, flagged
+        data = client.get('/api/latest-alerts?since=99&n=2').get_json()
+        assert data['reset'] and [a['id'] for a in data['alerts']] == [3, 4]
+
+        # Last-Modified is only sent once the second of the last alert is over
+        time.sleep(1.01 - time.time() % 1)
+        response = client.get('/api/latest-alerts')
+        since = response.headers['Last-Modified']
+        assert client.get('/api/latest-alerts', headers={'If-Modified-Since': since}).status_code == 304
+
+
+if __name__ == "__main__":
+    for test in (test_ids_increase_across_restarts_and_rotation, test_concurrent_writers_append_in_id_order,
+                 test_since_cursor, test_latest_alerts_cursor_and_conditional_requests):
+        test()
+        print(f"✅ PASS: {test.__name__}")
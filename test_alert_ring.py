@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory alert ring: lines round-trip and wrap around,
+readers in other processes never see a torn or out-of-order batch while
+the sniffer writes, read_latest_alerts() serves from the ring while the
+sniffer runs and falls back to the file once it stops.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import logger
+from live_ids.alert_ring import AlertRing
+from live_ids.flow_key import pack_flow_key
+
+KEY = pack_flow_key(("10.0.0.1", "10.0.0.2", 1234, 80, 6))
+RING = f"live_ids_test_{os.getpid()}"
+
+
+def line(i):
+    return json.dumps({"timestamp": float(i), "label": "DDoS"}).encode()
+
+
+def test_publish_and_wrap_around():
+    ring = AlertRing.create(RING, slots=16, slot_bytes=128)
+    try:
+        assert ring.latest(5) == []
+        ring.publish([line(i) for i in range(40)])
+        assert ring.head == 40
+        assert ring.latest(5) == [line(i) for i in range(35, 40)]
+        assert ring.latest(16) == [line(i) for i in range(24, 40)]
+        assert ring.latest(17) is None  # more than the ring holds: read the file
+
+        reader = AlertRing.attach(RING)
+        assert reader.latest(3) == ring.latest(3) and reader.alive()
+        # An alert too large for a slot sends readers to the file
+        ring.publish([b"x" * 500])
+        assert reader.latest(1) is None and reader.latest(0) == []
+        assert ring.stats()["oversize"] == 1
+    finally:
+        ring.close()
+    assert not reader.alive()
+    assert AlertRing.attach(RING) is None
+    # Writers lock the segment itself: nothing is left in the temp directory
+    assert not (Path(tempfile.gettempdir()) / f"{RING}.lock").exists()
+
+
+def test_preload():
+    ring = AlertRing.create(RING, slots=8, slot_bytes=128, preload=[line(i) for i in range(20)])
+    try:
+        assert ring.latest(8) == [line(i) for i in range(12, 20)]
+        assert ring.stats()["published"] == 0
+    finally:
+        ring.close()
+
+
+READER = """
+import json, sys
+sys.path.insert(0, 'backend')
+from live_ids.alert_ring import AlertRing
+ring = AlertRing.attach(sys.argv[1])
+print("ready", flush=True)
+good = fallbacks = 0
+while True:
+    finished = ring.head >= int(sys.argv[2])
+    lines = ring.latest(50)
+    if lines is None:
+        fallbacks += 1
+        assert not finished
+        continue
+    seqs = [json.loads(l)["timestamp"] for l in lines]
+    assert seqs == [seqs[0] + i for i in range(len(seqs))], seqs
+    good += 1
+    if finished:
+        assert seqs[-1] == int(sys.argv[2]) - 1
+        break
+print(good, fallbacks)
+"""
+
+
+def test_concurrent_readers_see_consistent_batches():
+    total = 100_000
+    ring = AlertRing.create(RING, slots=256, slot_bytes=128)
+    try:
+        readers = [subprocess.Popen([sys.executable, "-c", READER, RING, str(total)], cwd=BASE_DIR,
+                                    stdout=subprocess.PIPE, text=True) for _ in range(2)]
+        # Both readers attached before the writer starts
+        assert all(r.stdout.readline().strip() == "ready" for r in readers)
+        for i in range(0, total, 10):
+            ring.publish([line(j) for j in range(i, i + 10)])
+        outputs = [r.communicate(timeout=120)[0] for r in readers]
+        assert all(r.returncode == 0 for r in readers), outputs
+    finally:
+        ring.close()
+
+
+@contextmanager
+def sniffer_and_api(tmp):
+    """logger set up as in the sniffer (ring + writer) on a temp log, for a unique ring name"""
+    saved = logger.LOG_FILE, logger.ALERT_RING_NAME
+    logger.LOG_FILE, logger.ALERT_RING_NAME = Path(tmp) / "alerts.log", RING
+    try:
+        yield
+    finally:
+        logger.stop_alert_writer(report=False)
+        logger.close_alert_ring()
+        logger._reader_ring = logger._reader_checked = None
+        logger.LOG_FILE, logger.ALERT_RING_NAME = saved
+
+
+def api_read(n):
+    """read_latest_alerts() as the API process calls it: no writer or ring of its own"""
+    writer, ring = logger.alert_writer, logger.alert_ring
+    logger.alert_writer = logger.alert_ring = None
+    try:
+        return [a["label"] for a in logger.read_latest_alerts(n)]
+    finally:
+        logger.alert_writer, logger.alert_ring = writer, ring
+
+
+def test_api_reads_ring_then_file():
+    with tempfile.TemporaryDirectory() as tmp, sniffer_and_api(tmp):
+        logger.log_alert(KEY, "Bot", 0.99)  # already in the log before the sniffer starts
+        ring = logger.open_alert_ring(RING, slots=64)
+        assert ring.latest(1) is not None and len(ring.latest(5)) == 1
+        logger.start_alert_writer(flush_every=1000, flush_interval=60)
+        for label in ("DDoS", "DoS", "PortScan"):
+            logger.log_alert(KEY, label, 0.99)
+        logger.alert_writer.flush()
+
+        # The file is not read while the ring answers
+        os.rename(logger.LOG_FILE, logger.LOG_FILE.with_suffix(".hidden"))
+        assert api_read(3) == ["DDoS", "DoS", "PortScan"]
+        assert api_read(10) == ["Bot", "DDoS", "DoS", "PortScan"]
+        os.rename(logger.LOG_FILE.with_suffix(".hidden"), logger.LOG_FILE)
+
+        # Sniffer stopped: the API goes back to the file
+        logger.stop_alert_writer(report=False)
+        logger.close_alert_ring()
+        logger.log_alert(KEY, "Infiltration", 0.99)
+        assert api_read(2) == ["PortScan", "Infiltration"]
+
+
+
+def test_latest_alerts_endpoint():
+    import app as api
+
+    client = api.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp, sniffer_and_api(tmp):
+        logger.open_alert_ring(RING, slots=64)
+        logger.start_alert_writer()
+        logger.log_alert(KEY, "DDoS", 0.99, {"Flow Duration": 1.5})
+        logger.log_alert(KEY, "DoS", 0.98)
+        data = client.get('/api/latest-alerts?n=5').get_json()
+        assert data['success'] and data['count'] == 2
+        assert [a['label'] for a in data['alerts']] == ["DDoS", "DoS"]
+        assert data['alerts'][0]['features'] == {"Flow Duration": 1.5}
+        assert client.get('/api/latest-alerts?n=0').get_json() == {'success': True, 'alerts': [], 'count': 0, 'last_id': 2}
+
+if __name__ == "__main__":
+    for test in (test_publish_and_wrap_around, test_preload, test_concurrent_readers_see_consistent_batches,
+                 test_api_reads_ring_then_file, test_latest_alerts_endpoint):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the SSE alert stream: every subscriber gets each new alert once,
+reconnecting clients resume from Last-Event-ID (or get a reset and a
+backlog), slow clients are cut off at their buffer size, idle streams get
+heartbeats, and the log file is followed when no sniffer ring exists.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import alert_stream, logger
+from live_ids.alert_ring import AlertRing
+from live_ids.alert_stream import AlertBroadcaster
+
+RING = f"live_ids_stream_test_{os.getpid()}"
+
+
+def line(i):
+    return json.dumps({"timestamp": float(i), "label": "DDoS"}).encode()
+
+
+def parse(data):
+    """[(id, event, alert timestamp or None)] from SSE bytes; comments and retry lines skipped"""
+    events = []
+    for block in data.split(b"\n\n"):
+        fields = dict(l.split(b": ", 1) for l in block.split(b"\n") if b": " in l and not l.startswith(b":"))
+        if b"event" in fields:
+            payload = json.loads(fields[b"data"])
+            events.append((fields.get(b"id", b"").decode(), fields[b"event"].decode(), payload.get("timestamp")))
+    return events
+
+
+def receive(sub, count, timeout=5.0):
+    events, deadline = [], time.time() + timeout
+    while len(events) < count and time.time() < deadline:
+        events += parse(sub.get(0.1))
+    return events
+
+
+def test_ring_broadcast_backlog_and_resume():
+    ring = AlertRing.create(RING, slots=64, slot_bytes=128, preload=[line(i) for i in range(5)])
+    broadcaster = AlertBroadcaster(Path("/nonexistent/alerts.log"), RING)
+    try:
+        subs = [broadcaster.subscribe(backlog=2) for _ in range(20)]
+        for sub, initial in subs:
+            assert initial.startswith(b"retry: ")
+            assert [t for _, _, t in parse(initial)] == [3.0, 4.0]
+        ring.publish([line(i) for i in range(5, 8)])
+        for sub, _ in subs:
+            events = receive(sub, 3)
+            assert [t for _, _, t in events] == [5.0, 6.0, 7.0]
+            assert [event for _, event, _ in events] == ["alert"] * 3
+        last_seen = events[0][0]  # the client saw alert 5 only
+
+        # Reconnect with Last-Event-ID: exactly the alerts missed
+        _, initial = broadcaster.subscribe(last_event_id=last_seen, backlog=2)
+        assert [t for _, _, t in parse(initial)] == [6.0, 7.0]
+        # An id from an earlier ring: reset, then the backlog
+        _, initial = broadcaster.subscribe(last_event_id="abc-3", backlog=1)
+        assert [(event, t) for _, event, t in parse(initial)] == [("reset", None), ("alert", 7.0)]
+        assert broadcaster.stats()["source"] == "ring"
+    finally:
+        broadcaster.close()
+        ring.close()
+
+
+def test_oversize_alert_taken_from_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        small = [json.dumps({"id": i, "timestamp": float(i), "label": "DDoS"}).encode() for i in (1, 3)]
+        big = json.dumps({"id": 2, "timestamp": 2.0, "label": "DDoS", "pad": "x" * 1000}).encode()
+        decoy = big.replace(b'"id": 2', b'"id": 0')  # same length, older alert
+        ring = AlertRing.create(RING, slots=16, slot_bytes=128)
+        broadcaster = AlertBroadcaster(path, RING)
+        try:
+            sub, _ = broadcaster.subscribe()
+            # As the writer does: the log first, then the ring
+            path.write_bytes(b"\n".join([decoy, small[0], big, small[1]]) + b"\n")
+            ring.publish([small[0], big, small[1]])
+            assert [t for _, _, t in receive(sub, 3)] == [1.0, 2.0, 3.0]
+            assert broadcaster.stats()["oversize"] == 1
+
+            # Later alerts keep flowing, and a new client's backlog includes the big one
+            ring.publish([line(4)])
+            assert [t for _, _, t in receive(sub, 1)] == [4.0]
+            _, initial = broadcaster.subscribe(backlog=4)
+            assert [t for _, _, t in parse(initial)] == [1.0, 2.0, 3.0, 4.0]
+        finally:
+            broadcaster.close()
+            ring.close()
+
+
+def test_slow_client_overflow_and_heartbeat():
+    ring = AlertRing.create(RING, slots=64, slot_bytes=128)
+    broadcaster = AlertBroadcaster(Path("/nonexistent/alerts.log"), RING, client_buffer=5)
+    try:
+        sub, initial = broadcaster.subscribe()
+        stream = broadcaster.stream(sub, initial, heartbeat=0.05)
+        assert next(stream) == initial
+        assert next(stream) == b": heartbeat\n\n"
+
+        ring.publish([line(i) for i in range(10)])
+        deadline = time.time() + 5
+        while not sub.overflowed and time.time() < deadline:
+            time.sleep(0.01)
+        assert next(stream) == b"event: overflow\ndata: {}\n\n"
+        assert list(stream) == []
+        assert broadcaster.stats()["overflows"] == 1 and broadcaster.stats()["clients"] == 0
+    finally:
+        broadcaster.close()
+        ring.close()
+
+
+def test_max_clients():
+    broadcaster = AlertBroadcaster(Path("/nonexistent/alerts.log"), RING, max_clients=2)
+    subs = [broadcaster.subscribe()[0] for _ in range(3)]
+    assert subs[0] is not None and subs[1] is not None and subs[2] is None
+    broadcaster.close()
+
+
+def test_follows_log_file_without_ring():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        path.write_bytes(line(0) + b"\n")
+        broadcaster = AlertBroadcaster(path, RING)
+        try:
+            sub, initial = broadcaster.subscribe(backlog=5)
+            assert [t for _, _, t in parse(initial)] == [0.0]
+            with open(path, "ab") as f:
+                f.write(line(1) + b"\n" + line(2) + b"\n" + line(3)[:10])  # last one half written
+            events = receive(sub, 2)
+            assert [t for _, _, t in events] == [1.0, 2.0]
+            assert broadcaster.stats()["source"] == "file"
+
+            # Resume by file offset
+            _, initial = broadcaster.subscribe(last_event_id=events[0][0])
+            assert [t for _, _, t in parse(initial)] == [2.0]
+
+            # Rotation: the rest of the old file, then the new one from its start
+            with open(path, "ab") as f:
+                f.write(line(3)[10:] + b"\n")
+            os.rename(path, path.with_suffix(".1"))
+            path.write_bytes(line(4) + b"\n")
+            assert [t for _, _, t in receive(sub, 2)] == [3.0, 4.0]
+        finally:
+            broadcaster.close()
+
+
+def test_stream_endpoint():
+    import app as api
+
+    client = api.app.test_client()
+    saved = logger.ALERT_RING_NAME, alert_stream._broadcaster
+    logger.ALERT_RING_NAME, alert_stream._broadcaster = RING, None
+    ring = AlertRing.create(RING, slots=64, slot_bytes=128, preload=[line(i) for i in range(3)])
+    try:
+        response = client.get('/api/alerts/stream?backlog=2', buffered=False)
+        assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        body = iter(response.response)
+        assert [t for _, _, t in parse(next(body))] == [1.0, 2.0]
+        ring.publish([line(3)])
+        assert [t for _, _, t in parse(next(body))] == [3.0]
+        response.close()
+    finally:
+        alert_stream._broadcaster.close()
+        ring.close()
+        logger.ALERT_RING_NAME, alert_stream._broadcaster = saved
+
+
+if __name__ == "__main__":
+    for test in (test_ring_broadcast_backlog_and_resume, test_oversize_alert_taken_from_log,
+                 test_slow_client_overflow_and_heartbeat,
+                 test_max_clients, test_follows_log_file_without_ring, test_stream_endpoint):
+        test()
+        print(f"✅ PASS: {test.__name__}")
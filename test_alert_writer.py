@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the buffered alert writer: alerts are batched into few writes,
+written out after N alerts or T seconds, flushed on stop, counted when the
+queue overflows, and formatted exactly as the synchronous log_alert() does.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import logger
+from live_ids.flow_key import pack_flow_key
+from live_ids.logger import AlertWriter, format_alert
+
+KEY = pack_flow_key(("10.0.0.1", "10.0.0.2", 1234, 80, 6))
+
+
+def read_lines(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def test_batched_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path, flush_every=50, flush_interval=60).start()
+        for i in range(200):
+            assert writer.submit(KEY, "DDoS", 0.99, {"Flow Duration": float(i)}, timestamp=i)
+        writer.stop()
+        alerts = read_lines(path)
+        assert [a["features"]["Flow Duration"] for a in alerts] == list(range(200))
+        s = writer.stats()
+        assert s["written"] == s["submitted"] == 200 and s["dropped"] == 0
+        assert s["writes"] == 4 and s["avg_batch"] == 50
+
+
+def test_flush_interval():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path, flush_every=1000, flush_interval=0.05).start()
+        writer.submit(KEY, "DoS", 0.95)
+        deadline = time.time() + 5
+        while not path.exists() or not path.read_text():
+            assert time.time() < deadline, "alert was not written after the flush interval"
+            time.sleep(0.01)
+        assert read_lines(path)[0]["label"] == "DoS"
+        writer.stop()
+
+
+def test_queue_overflow_is_counted():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path, maxsize=3)
+        # Not started yet: nothing drains the queue
+        accepted = [writer.submit(KEY, "DDoS", 0.99) for _ in range(10)]
+        assert accepted == [True] * 3 + [False] * 7
+        writer.start().stop()
+        s = writer.stats()
+        assert s["dropped"] == 7 and s["written"] == 3 and s["max_depth"] == 3
+        assert len(read_lines(path)) == 3
+
+
+def test_same_format_as_synchronous_log():
+    features = {"Flow Duration": np.float64(1.5), "Protocol": np.int64(6), "Flag": np.bool_(True),
+                "Plain": 2.0, "Missing": None}
+    line = format_alert(KEY, "DDoS", np.float64(0.987654), features, timestamp=100.0, alert_id=1)
+    entry = json.loads(line)
+    assert list(entry)[0] == "id"
+    assert entry == {"id": 1, "timestamp": 100.0, "flow": "('10.0.0.1', '10.0.0.2', 1234, 80, 6)", "label": "DDoS",
+                     "confidence": 0.9877, "features": {"Flow Duration": 1.5, "Protocol": 6, "Flag": True,
+                                                         "Plain": 2.0, "Missing": None}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path).start()
+        writer.submit(KEY, "DDoS", np.float64(0.987654), features, timestamp=100.0)
+        writer.stop()
+        assert path.read_text() == line
+
+
+def test_log_alert_through_module_writer():
+    saved = logger.LOG_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        logger.LOG_FILE = Path(tmp) / "alerts.log"
+        try:
+            writer = logger.start_alert_writer(flush_every=1000, flush_interval=60)
+            assert logger.log_alert(KEY, "PortScan", 0.97)
+            # read_latest_alerts() waits for queued alerts to be written
+            assert logger.read_latest_alerts(1)[0]["label"] == "PortScan"
+            assert logger.stop_alert_writer(report=False) is writer and logger.alert_writer is None
+            logger.log_alert(KEY, "Bot", 0.96)
+            assert [a["label"] for a in logger.read_latest_alerts(5)] == ["PortScan", "Bot"]
+        finally:
+            logger.stop_alert_writer(report=False)
+            logger.LOG_FILE = saved
+
+
+def test_reopens_rotated_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path, flush_every=1).start()
+        writer.submit(KEY, "DDoS", 0.99)
+        assert writer.flush()
+        os.rename(path, path.with_suffix(".log.1"))
+        writer.submit(KEY, "DoS", 0.99)
+        writer.stop()
+        assert [a["label"] for a in read_lines(path.with_suffix(".log.1"))] == ["DDoS"]
+        assert [a["label"] for a in read_lines(path)] == ["DoS"]
+
+
+if __name__ == "__main__":
+    for test in (test_batched_writes, test_flush_interval, test_queue_overflow_is_counted,
+                 test_same_format_as_synchronous_log, test_log_alert_through_module_writer,
+                 test_reopens_rotated_log):
+        test()
+        print(f"✅ PASS: {test.__name__}")
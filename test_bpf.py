@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the kernel BPF capture filter built from the sniffer settings.
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.bpf import build_bpf_filter, check_bpf_filter
+
+
+def test_filter_from_sniffer_settings():
+    original = packet_sniffer.TARGET_IP
+    try:
+        packet_sniffer.TARGET_IP = "10.7.19.211"
+        expression = packet_sniffer.kernel_filter_expression()
+    finally:
+        packet_sniffer.TARGET_IP = original
+
+    assert expression.startswith("ip and (tcp or udp) and host 10.7.19.211 and ")
+    for port in packet_sniffer.SUSPECT_PORTS:
+        assert f"dst port {port} " in expression or f"dst port {port})" in expression
+    assert "not (udp and dst port 443)" in expression
+    assert "not (port 53 or port 67 " in expression
+    assert expression.endswith("not (src net 10.0.0.0/8 and dst net 10.0.0.0/8)")
+
+
+def test_filter_without_target_or_ports():
+    assert build_bpf_filter() == "ip and (tcp or udp) and not (udp and dst port 443) and " \
+                                 "not (src net 10.0.0.0/8 and dst net 10.0.0.0/8)"
+    assert build_bpf_filter(drop_quic=False, drop_private_lan=False) == "ip and (tcp or udp)"
+    try:
+        build_bpf_filter(target_ip="10.7.19.211 or 1=1")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("target_ip must be a plain IPv4 address")
+
+
+def test_filter_compiles_when_libpcap_is_available():
+    ok, error = check_bpf_filter(build_bpf_filter("10.7.19.211", {80, 443}, {53}), "lo")
+    if not ok:
+        # No libpcap in this environment; the sniffer falls back to Python filtering
+        assert "libpcap" in error or "pcap" in error.lower(), error
+
+
+if __name__ == "__main__":
+    for test in (test_filter_from_sniffer_settings, test_filter_without_target_or_ports,
+                 test_filter_compiles_when_libpcap_is_available):
+        test()
+        print(f"✅ PASS: {test.__name__}")
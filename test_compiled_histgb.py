@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the array-compiled HistGradientBoosting evaluator: the .npz export
+must reproduce sklearn's predict_proba, load memory-mapped, be re-exported
+without disturbing a model that has it mapped, and be ignored once it no
+longer matches the model file it was exported from.
+"""
+
+import copy
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.compiled_histgb import (CompiledHistGB, compiled_artifact_for, export_histgb, load_compiled)
+from models.inference_engine import InferenceEngine, LARGE_BATCH_ROWS
+
+MODEL = joblib.load(predictor.MODEL_PATH)
+
+
+def sample_rows(rows=2000, seed=0):
+    """Random rows plus split thresholds themselves and NaNs, to exercise ties and missing values"""
+    rng = np.random.default_rng(seed)
+    n_features = MODEL.n_features_in_
+    X = rng.random((rows, n_features)) * rng.choice([1.0, 1e3, 1e6], size=n_features)
+    nodes = np.concatenate([tree.nodes for iteration in MODEL._predictors for tree in iteration])
+    splits = nodes[nodes["is_leaf"] == 0]
+    picks = rng.integers(0, len(splits), size=rows)
+    X[np.arange(rows), splits["feature_idx"][picks]] = splits["num_threshold"][picks]
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def test_matches_sklearn_predict_proba():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_histgb(MODEL, Path(tmp) / "model.npz")
+        compiled = load_compiled(path)
+        X = sample_rows()
+        frame = pd.DataFrame(X, columns=MODEL.feature_names_in_)
+        expected = MODEL.predict_proba(frame)
+        for batch in (1, 64, len(X)):
+            np.testing.assert_allclose(compiled.predict_proba(X[:batch]), expected[:batch], rtol=0, atol=1e-9)
+        assert np.array_equal(compiled.predict(frame), MODEL.predict(frame))
+        assert list(compiled.classes_) == list(MODEL.classes_)
+        assert list(compiled.feature_names_in_) == list(MODEL.feature_names_in_)
+
+
+def test_memory_mapped_load():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_histgb(MODEL, Path(tmp) / "model.npz")
+        mapped = load_compiled(path)
+        loaded = load_compiled(path, mmap=False)
+        X = sample_rows(rows=200, seed=1)
+        assert np.array_equal(mapped.predict_proba(X), loaded.predict_proba(X))
+        assert mapped.n_iter_ == MODEL.n_iter_
+        assert isinstance(mapped, CompiledHistGB)
+
+        try:
+            mapped.predict_proba(X[:, :-1])
+        except ValueError as e:
+            assert "features" in str(e)
+        else:
+            raise AssertionError("wrong feature count was not rejected")
+
+
+def test_reexport_keeps_mapped_model():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_histgb(MODEL, Path(tmp) / "model.npz")
+        running = load_compiled(path)
+        X = sample_rows(rows=200, seed=3)
+        before = running.predict_proba(X)
+
+        retrained = copy.deepcopy(MODEL)
+        retrained._baseline_prediction = retrained._baseline_prediction.copy()
+        retrained._baseline_prediction.flat[0] += 1.0
+        export_histgb(retrained, path)
+
+        assert np.array_equal(running.predict_proba(X), before)
+        assert not np.allclose(load_compiled(path).predict_proba(X), before)
+        assert [p.name for p in Path(tmp).iterdir()] == ["model.npz"]
+
+
+def test_stale_artifact_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "model.joblib"
+        shutil.copyfile(predictor.MODEL_PATH, source)
+        export_histgb(MODEL, source.with_suffix(".npz"), source_path=source)
+        assert compiled_artifact_for(source) == source.with_suffix(".npz")
+
+        engine = InferenceEngine.load(source, predictor.ENCODER_PATH, predictor.METADATA_PATH)
+        assert isinstance(engine.model, CompiledHistGB)
+        assert engine.source == source.with_suffix(".npz")
+
+        # A retrained (different) model file makes the export stale
+        joblib.dump(MODEL, source, compress=3)
+        assert compiled_artifact_for(source) is None
+        assert not isinstance(InferenceEngine.load(source, predictor.ENCODER_PATH).model, CompiledHistGB)
+
+
+def test_large_batches_use_sklearn():
+    engine = InferenceEngine.load(predictor.MODEL_PATH, predictor.ENCODER_PATH, predictor.METADATA_PATH)
+    assert isinstance(engine.model, CompiledHistGB)
+    X = sample_rows(rows=LARGE_BATCH_ROWS + 10, seed=2)
+    small = np.vstack([engine.score(X[i:i + 10])[2] for i in range(0, len(X), 10)])
+    _, _, large = engine.score(X)
+    assert type(engine._large_batch_model).__name__ == "HistGradientBoostingClassifier"
+    np.testing.assert_allclose(large, small, rtol=0, atol=1e-9)
+
+
+def test_shipped_artifact_is_current():
+    assert compiled_artifact_for(predictor.MODEL_PATH) is not None
+
+
+if __name__ == "__main__":
+    for test in (test_matches_sklearn_predict_proba, test_memory_mapped_load, test_reexport_keeps_mapped_model,
+                 test_stale_artifact_is_ignored, test_large_batches_use_sklearn, test_shipped_artifact_is_current):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the scapy-free header decoder against FlowManager.get_flow_key().
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from scapy.all import Ether, Dot1Q, IP, IPv6, TCP, UDP, ICMP, PcapReader, wrpcap
+
+from live_ids.fast_decoder import decode_frame, iter_pcap_records
+from live_ids.flow_manager import FlowManager
+from live_ids.flow_key import key_protocol
+
+
+def sample_packets():
+    packets = [
+        Ether() / IP(src="203.0.113.5", dst="10.7.19.211") / TCP(sport=40000, dport=80, flags="S"),
+        Ether() / IP(src="10.7.19.211", dst="203.0.113.5", ihl=6, options=b"\x01\x01\x01\x01") / TCP(sport=80, dport=40000, flags="SA"),
+        Ether() / Dot1Q(vlan=7) / IP(src="198.51.100.1", dst="10.7.19.211") / UDP(sport=5000, dport=443) / (b"q" * 30),
+        Ether() / IP(src="203.0.113.5", dst="10.7.19.211") / ICMP(),
+        Ether() / IPv6() / TCP(sport=1, dport=2),
+        Ether() / IP(src="203.0.113.5", dst="10.7.19.211", frag=10, proto=6) / b"fragment",
+    ]
+    for i, pkt in enumerate(packets):
+        pkt.time = 1000.0 + i * 0.25
+    return packets
+
+
+def test_decode_matches_scapy_flow_key():
+    manager = FlowManager()
+    for pkt in sample_packets():
+        key, flags = decode_frame(bytes(pkt))
+        assert key == manager.get_flow_key(pkt), pkt.summary()
+        if key is not None and key_protocol(key) == 6:
+            assert flags == int(pkt["TCP"].flags)
+
+
+def test_pcap_records_match_scapy_reader():
+    manager = FlowManager()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "capture.pcap"
+        wrpcap(str(path), sample_packets())
+
+        fast = [(key, size, ts) for key, size, ts, _ in iter_pcap_records(path)]
+        with PcapReader(str(path)) as reader:
+            slow = [(manager.get_flow_key(p), len(p), float(p.time)) for p in reader]
+
+    assert fast == slow
+
+
+if __name__ == "__main__":
+    for test in (test_decode_matches_scapy_flow_key, test_pcap_records_match_scapy_reader):
+        test()
+        print(f"✅ PASS: {test.__name__}")
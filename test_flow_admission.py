@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for flow admission: key-only filters run when a flow is first seen,
+so refused flows are never stored, while the scored flows stay the same.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.flow_key import pack_flow_key
+from live_ids.flow_manager import FlowManager
+
+
+def random_packets(seed=0, count=5000):
+    rng = random.Random(seed)
+    hosts = ["10.7.19.211", "10.7.19.5", "8.8.8.8", "142.250.1.1", "52.0.0.1", "203.0.113.7"]
+    packets = []
+    t = 1000.0
+    for _ in range(count):
+        src, dst = rng.sample(hosts, 2)
+        key = (src, dst, rng.choice([40000, 40001, 53, 443]), rng.choice([80, 443, 53, 8081]), rng.choice([6, 17]))
+        t += rng.expovariate(200)
+        packets.append((pack_flow_key(key), rng.randint(40, 1500), t))
+    return packets
+
+
+def scored_flows(manager, packets):
+    for key, size, ts in packets:
+        manager.update_flow(key, size, ts)
+    ended = manager.end_expired_flows(now=float("inf"))
+    return sorted((key, len(flow["packet_sizes"])) for key, flow in ended
+                  if packet_sniffer.should_process_flow(key, flow)[0])
+
+
+def test_refused_keys_are_never_stored():
+    original = packet_sniffer.TARGET_IP
+    packet_sniffer.TARGET_IP = "10.7.19.211"
+    try:
+        manager = FlowManager(admit=packet_sniffer.admit_flow)
+        dns = pack_flow_key(("10.7.19.211", "8.8.8.8", 40000, 53, 17))
+        web = pack_flow_key(("203.0.113.7", "10.7.19.211", 40000, 80, 6))
+        for i in range(10):
+            manager.update_flow(dns, 80, 1000.0 + i)
+            manager.update_flow(web, 80, 1000.0 + i)
+    finally:
+        packet_sniffer.TARGET_IP = original
+
+    assert list(manager.flows) == [web]
+    stats = manager.stats()
+    assert stats["admitted"] == 1
+    assert stats["rejected_flows"] == 1
+    assert stats["rejected_packets"] == 10
+
+
+def test_admission_scores_the_same_flows():
+    packets = random_packets()
+    original = packet_sniffer.TARGET_IP
+    try:
+        for target in ("10.7.19.211", None):
+            packet_sniffer.TARGET_IP = target
+            without = scored_flows(FlowManager(), packets)
+            admitted = FlowManager(admit=packet_sniffer.admit_flow)
+            assert without and scored_flows(admitted, packets) == without
+            assert admitted.stats()["rejected_flows"] > 0
+    finally:
+        packet_sniffer.TARGET_IP = original
+
+
+if __name__ == "__main__":
+    for test in (test_refused_keys_are_never_stored, test_admission_scores_the_same_flows):
+        test()
+        print(f"✅ PASS: {test.__name__}")
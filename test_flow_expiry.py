@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for flow expiry: the FlowManager expiry heap and the background
+ExpiryScheduler used by the live IDS.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.flow_manager import FlowManager, FLOW_TIMEOUT
+from live_ids.expiry_scheduler import ExpiryScheduler
+from live_ids.pipeline import ScoringPipeline
+
+
+def test_heap_expires_only_idle_flows():
+    manager = FlowManager()
+    idle = ("10.0.0.1", "10.7.19.211", 40000, 80, 6)
+    busy = ("10.0.0.2", "10.7.19.211", 40001, 80, 6)
+    manager.update_flow(idle, 100, 1000.0)
+    manager.update_flow(busy, 100, 1000.0)
+    manager.update_flow(busy, 100, 1004.0)
+
+    ended = manager.end_expired_flows(now=1000.0 + FLOW_TIMEOUT + 1)
+    assert [key for key, _ in ended] == [idle]
+    assert busy in manager.flows
+
+    ended = manager.end_expired_flows(now=1004.0 + FLOW_TIMEOUT + 1)
+    assert [key for key, _ in ended] == [busy]
+    assert not manager.flows
+
+
+def test_heap_handles_out_of_order_timestamps():
+    manager = FlowManager()
+    key = ("10.0.0.1", "10.7.19.211", 40000, 80, 6)
+    manager.update_flow(key, 100, 1000.0)
+    manager.update_flow(key, 100, 990.0)
+
+    ended = manager.end_expired_flows(now=990.0 + FLOW_TIMEOUT + 1)
+    assert len(ended) == 1
+    assert list(ended[0][1]["packet_sizes"]) == [100, 100]
+
+
+def test_full_table_evicts_least_recently_seen_flow():
+    manager = FlowManager(max_flows=3)
+    keys = [(f"10.0.0.{i}", "10.7.19.211", 40000 + i, 80, 6) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        manager.update_flow(key, 100, 1000.0 + i)
+    manager.update_flow(keys[0], 100, 1003.0)  # keys[1] is now the LRU flow
+    manager.update_flow(keys[3], 100, 1004.0)
+
+    assert len(manager.flows) == 3
+    assert keys[1] not in manager.flows
+    ended = manager.end_expired_flows(now=1004.0)
+    assert [key for key, _ in ended] == [keys[1]]
+    assert manager.stats()["evictions"] == 1
+
+
+def test_spoofed_flood_stays_bounded_and_is_scored():
+    manager = FlowManager(max_flows=100)
+    scored = 0
+    for i in range(10_000):
+        manager.update_flow((f"203.0.{i >> 8}.{i & 255}", "10.7.19.211", 1024 + i, 80, 6), 60, 1000.0 + i * 1e-4)
+        assert len(manager.flows) <= 100
+        if i % 500 == 0:
+            scored += len(manager.end_expired_flows(now=1000.0 + i * 1e-4))
+    scored += len(manager.end_expired_flows(now=float("inf")))
+    assert scored == 10_000
+    assert manager.stats()["evictions"] == 10_000 - 100
+
+
+def test_active_timeout_exports_busy_flows():
+    manager = FlowManager(active_timeout=30)
+    key = ("10.0.0.1", "10.7.19.211", 40000, 80, 6)
+    t = 1000.0
+    while t < 1031.0:
+        manager.update_flow(key, 100, t)
+        t += 1.0
+    ended = manager.end_expired_flows(now=t)
+    assert [k for k, _ in ended] == [key]
+    assert len(ended[0][1]["packet_sizes"]) == 31
+    assert manager.stats()["active_exports"] == 1
+
+    # The next packet starts a new flow with its own active deadline
+    manager.update_flow(key, 100, t)
+    assert manager.end_expired_flows(now=t + 1) == []
+    assert manager.stats()["active_exports"] == 1
+
+
+def test_scheduler_expires_flows_without_new_packets():
+    manager = FlowManager(timeout=0.05)
+    key = ("10.0.0.1", "10.7.19.211", 40000, 80, 6)
+    scored = []
+    manager.update_flow(key, 100, time.time())
+
+    scheduler = ExpiryScheduler(manager, lambda k, f: scored.append(k), interval=0.01)
+    scheduler.start()
+    try:
+        deadline = time.time() + 2
+        while not scored and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+
+    assert scored == [key]
+    report = scheduler.report()
+    assert report["flows_scored"] == 1
+    assert 0 <= report["max_lateness"] < 1.0
+
+
+def test_deferred_lateness_includes_scoring_time():
+    manager = FlowManager(timeout=0.05)
+    key = ("10.0.0.1", "10.7.19.211", 40000, 80, 6)
+    manager.update_flow(key, 100, time.time() - 1.0)  # deadline passed about 0.95 s ago
+
+    pipeline = ScoringPipeline(lambda k, f, now: time.sleep(0.2), workers=1)
+    scheduler = ExpiryScheduler(manager, pipeline.submit, deferred=True)
+    pipeline.on_scored = scheduler.record_scored
+    pipeline.start()
+    assert scheduler.sweep() == 1
+    # Handed off, not scored yet
+    assert scheduler.report()["flows_scored"] == 0
+    pipeline.stop()
+
+    report = scheduler.report()
+    assert report["flows_scored"] == 1
+    assert report["max_lateness"] >= 1.1  # 0.95 s past the deadline + 0.2 s of scoring
+
+
+def test_evicted_flows_are_not_counted_as_on_time():
+    manager = FlowManager(timeout=5, max_flows=1)
+    now = time.time()
+    manager.update_flow(("10.0.0.1", "10.7.19.211", 40000, 80, 6), 100, now)
+    manager.update_flow(("10.0.0.2", "10.7.19.211", 40001, 80, 6), 100, now)  # evicts the first
+
+    scored = []
+    scheduler = ExpiryScheduler(manager, lambda k, f: scored.append(k))
+    assert scheduler.sweep() == 1 and len(scored) == 1
+    report = scheduler.report()
+    assert report["flows_early"] == 1 and report["flows_scored"] == 0 and report["max_lateness"] == 0.0
+
+
+if __name__ == "__main__":
+    for test in (test_heap_expires_only_idle_flows,
+                 test_heap_handles_out_of_order_timestamps,
+                 test_full_table_evicts_least_recently_seen_flow,
+                 test_spoofed_flood_stays_bounded_and_is_scored,
+                 test_active_timeout_exports_busy_flows,
+                 test_scheduler_expires_flows_without_new_packets,
+                 test_deferred_lateness_includes_scoring_time,
+                 test_evicted_flows_are_not_counted_as_on_time):
+        test()
+        print(f"✅ PASS: {test.__name__}")
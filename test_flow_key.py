@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for packed integer flow keys and the sniffer filters that use them.
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.flow_key import (pack_flow_key, unpack_key, unpack_fields, key_protocol,
+                               ip_to_int, ip_prefix_mask)
+from live_ids.flow_manager import FlowManager
+
+KEYS = [
+    ("10.7.19.211", "52.0.10.195", 59337, 443, 6),
+    ("0.0.0.0", "255.255.255.255", 0, 65535, 17),
+    ("203.0.113.5", "10.7.19.211", 40000, 80, 6),
+    ("10.7.19.211", "224.0.0.251", 5353, 5353, 17),
+    ("10.7.19.211", "142.250.182.46", 50000, 443, 6),
+    ("8.8.8.8", "10.7.19.211", 53, 50000, 17),
+    ("10.7.19.211", "10.7.31.255", 50000, 80, 6),
+    ("203.0.113.9", "10.7.19.211", 40001, 8081, 6),
+]
+
+# The string prefixes the whitelist used before benign_networks.txt
+IP_PREFIXES = ['8.8.8.', '8.8.4.', '142.250.', '142.251.', '142.252.', '172.217.',
+               '216.58.', '17.248.', '35.186.', '34.160.', '100.24.']
+
+
+def test_pack_round_trip():
+    for key in KEYS:
+        packed = pack_flow_key(key)
+        assert isinstance(packed, int)
+        assert unpack_key(packed) == key
+        assert unpack_fields(packed) == (ip_to_int(key[0]), ip_to_int(key[1]), key[2], key[3], key[4])
+        assert key_protocol(packed) == key_protocol(key) == key[4]
+    assert len({pack_flow_key(k) for k in KEYS}) == len(KEYS)
+
+
+def test_prefix_masks():
+    assert ip_prefix_mask("142.250.") == ip_prefix_mask("142.250.0.0/16")
+    network, mask = ip_prefix_mask("224.0.0.")
+    assert ip_to_int("224.0.0.251") & mask == network
+    assert ip_to_int("224.0.1.251") & mask != network
+
+
+def reference_filter(flow_key, duration, packet_count):
+    """The string-based filter rules, for comparison with the packed-key filters"""
+    src_ip, dst_ip, src_port, dst_port, protocol = flow_key
+    target = packet_sniffer.TARGET_IP
+    if target and target not in [src_ip, dst_ip]:
+        return False
+    wl = packet_sniffer.BENIGN_WHITELIST
+    if protocol == 17 and dst_port == 443:
+        return False
+    if src_port in wl['ports'] or dst_port in wl['ports']:
+        return False
+    if any(dst_ip.startswith(p) for p in wl['multicast_prefixes']):
+        return False
+    if any(src_ip.startswith(p) or dst_ip.startswith(p) for p in IP_PREFIXES):
+        return False
+    if packet_count < 5 or duration < 0.01:
+        return False
+    if src_ip.startswith("10.") and dst_ip.startswith("10."):
+        return False
+    return dst_port in packet_sniffer.SUSPECT_PORTS
+
+
+def test_filters_match_string_rules():
+    original = packet_sniffer.TARGET_IP
+    try:
+        for target in ("10.7.19.211", None):
+            packet_sniffer.TARGET_IP = target
+            for key in KEYS:
+                manager = FlowManager()
+                for i in range(6):
+                    manager.update_flow(pack_flow_key(key), 100, 1000.0 + i * 0.1)
+                (packed, flow), = manager.flows.items()
+                should_process, _ = packet_sniffer.should_process_flow(packed, flow)
+                assert should_process == reference_filter(key, 0.5, 6), (target, key)
+    finally:
+        packet_sniffer.TARGET_IP = original
+
+
+if __name__ == "__main__":
+    for test in (test_pack_round_trip, test_prefix_masks, test_filters_match_string_rules):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared InferenceEngine: one probability pass gives the same
+labels as model.predict(), column plans match a by-name reindex, and
+concurrent callers get the same answers.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.inference_engine import InferenceEngine
+
+
+def random_features(engine, rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    scale = rng.choice([1.0, 1e3, 1e6], size=len(engine.feature_names))
+    return rng.random((rows, len(engine.feature_names))) * scale
+
+
+def test_score_matches_predict():
+    engine = predictor.get_engine()
+    X = random_features(engine)
+    label_idx, confidence, proba = engine.score(X)
+
+    frame = pd.DataFrame(X, columns=engine.feature_names)
+    expected = engine.label_encoder.transform(engine.model.predict(frame))
+    assert np.array_equal(label_idx, expected)
+    assert np.array_equal(proba, engine.model.predict_proba(frame))
+    assert np.array_equal(confidence, proba.max(axis=1))
+    assert np.array_equal(engine.classes[label_idx], engine.model.predict(frame))
+
+
+def test_column_plan_reorders_and_fills_missing():
+    engine = predictor.get_engine()
+    X = random_features(engine, rows=20, seed=1)
+    frame = pd.DataFrame(X, columns=engine.feature_names)
+
+    shuffled = list(reversed(engine.feature_names[1:])) + ["Unused Column"]
+    partial = frame[shuffled[:-1]].assign(**{"Unused Column": 7.0})
+    take, missing = engine.column_plan(partial.columns)
+    assert missing == [engine.feature_names[0]]
+    assert engine.column_plan(partial.columns)[0] is take
+
+    expected = frame.copy()
+    expected[engine.feature_names[0]] = 0.0
+    assert np.array_equal(engine.align(partial), expected.to_numpy())
+    assert np.array_equal(engine.align(partial.to_numpy(), partial.columns), expected.to_numpy())
+    assert np.array_equal(engine.score(partial)[2], engine.score(expected.to_numpy())[2])
+
+
+def test_string_and_encoded_model_classes():
+    engine = predictor.get_engine()
+
+    class Encoded:
+        """The same model predicting label-encoder indices in reversed column order"""
+        classes_ = np.arange(len(engine.classes))[::-1]
+
+        def predict_proba(self, X):
+            return engine.model.predict_proba(X)[:, ::-1]
+
+    X = random_features(engine, rows=50, seed=2)
+    reference = engine.score(X)[0]
+    encoded = InferenceEngine(Encoded(), engine.label_encoder, engine.feature_names)
+    assert not encoded.classes_match
+    assert np.array_equal(encoded.score(X)[0], reference)
+
+
+def test_concurrent_scoring():
+    engine = predictor.get_engine()
+    batches = [random_features(engine, rows=64, seed=seed) for seed in range(16)]
+    expected = [engine.score(b)[0] for b in batches]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda b: engine.score(b)[0], batches))
+    assert all(np.array_equal(r, e) for r, e in zip(results, expected))
+
+
+def test_predict_flows_frame():
+    engine = predictor.get_engine()
+    frame = pd.DataFrame(random_features(engine, rows=10, seed=3), columns=engine.feature_names)
+    frame.index = range(100, 110)
+    frame["src_ip"] = "10.0.0.1"  # not a feature: kept in the result
+    result = predictor.predict_flows(frame)
+    assert list(result.columns) == list(frame.columns) + ["predicted_label", "prediction_confidence"]
+    assert list(result.index) == list(frame.index)
+    assert "predicted_label" not in frame  # input left unchanged
+    assert (result["src_ip"] == "10.0.0.1").all()
+    labels, confidence = engine.predict_labels(frame[engine.feature_names])
+    assert list(result["predicted_label"]) == list(labels)
+    assert engine.score(np.empty((0, len(engine.feature_names))))[0].shape == (0,)
+
+
+if __name__ == "__main__":
+    for test in (test_score_matches_predict, test_column_plan_reorders_and_fills_missing,
+                 test_string_and_encoded_model_classes, test_concurrent_scoring, test_predict_flows_frame):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled IPv4 network matcher and the target-network filter.
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import packet_sniffer
+from live_ids.bpf import build_bpf_filter
+from live_ids.flow_key import ip_to_int, pack_flow_key
+from live_ids.ip_matcher import IPMatcher, parse_network
+
+
+def test_parse_network():
+    assert parse_network("10.0.0.0/8") == (ip_to_int("10.0.0.0"), ip_to_int("10.255.255.255"))
+    assert parse_network("142.250.") == parse_network("142.250.0.0/16")
+    assert parse_network("8.8.8.8") == (ip_to_int("8.8.8.8"),) * 2
+    assert parse_network("0.0.0.0/0") == (0, 0xFFFFFFFF)
+    for bad in ("10.0.0.1/8", "10.0.0.0/33", "10.0.0", "example.com", "10.7.19.211 or 1=1"):
+        try:
+            parse_network(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} must be rejected")
+
+
+def test_overlapping_and_adjacent_networks_merge():
+    matcher = IPMatcher(["10.0.0.0/25", "10.0.0.128/25", "10.0.0.0/24", "10.0.1.7", "192.168.0.0/16"])
+    assert matcher.networks == 5
+    assert len(matcher) == 3
+    assert ip_to_int("10.0.1.7") in matcher
+    assert ip_to_int("10.0.1.8") not in matcher
+    assert ip_to_int("192.168.255.255") in matcher
+    assert ip_to_int("9.255.255.255") not in matcher
+    assert not IPMatcher() and 0 not in IPMatcher()
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    networks = []
+    for _ in range(2000):
+        prefix = rng.randrange(8, 33)
+        mask = (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+        networks.append((rng.getrandbits(32) & mask, mask, prefix))
+    matcher = IPMatcher(f"{(n >> 24) & 255}.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}/{p}"
+                        for n, _, p in networks)
+
+    probes = [rng.getrandbits(32) for _ in range(2000)]
+    probes += [n | (rng.getrandbits(32) & ~m & 0xFFFFFFFF) for n, m, _ in networks]
+    for ip in probes:
+        assert (ip in matcher) == any(ip & m == n for n, m, _ in networks)
+
+
+def test_from_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "networks.txt"
+        path.write_text("# cloud ranges\n\n52.0.0.0/11   # AWS\n8.8.8.8\n")
+        matcher = IPMatcher.from_file(path, extra=["224.0.0.0/4"])
+        assert matcher.networks == 3
+        assert ip_to_int("52.31.0.1") in matcher and ip_to_int("52.32.0.1") not in matcher
+        assert ip_to_int("239.1.1.1") in matcher
+
+        path.write_text("52.0.0.0/11\n52.0.0.1/11\n")
+        try:
+            IPMatcher.from_file(path)
+        except ValueError as e:
+            assert "networks.txt:2" in str(e)
+        else:
+            raise AssertionError("bad network line was not rejected")
+
+
+def test_bundled_benign_networks():
+    matcher = IPMatcher.from_file(packet_sniffer.BENIGN_NETWORKS_FILE)
+    for ip in ("8.8.8.8", "142.250.182.46", "172.217.1.1", "100.24.5.5"):
+        assert ip_to_int(ip) in matcher
+    assert ip_to_int("52.0.10.195") not in matcher
+
+
+def test_target_networks():
+    original = packet_sniffer.TARGET_IP, packet_sniffer.TARGET_NETWORKS
+    packet_sniffer.TARGET_NETWORKS = ("10.7.19.0/24", "192.168.1.10")
+    try:
+        def admitted(src, dst):
+            return packet_sniffer.check_flow_key(pack_flow_key((src, dst, 40000, 80, 6)))[0]
+
+        assert admitted("203.0.113.5", "10.7.19.42")
+        assert admitted("192.168.1.10", "203.0.113.5")
+        assert not admitted("203.0.113.5", "10.7.20.42")
+        assert not admitted("192.168.1.11", "203.0.113.5")
+        assert packet_sniffer.target_networks() == ["10.7.19.0/24", "192.168.1.10"]
+
+        expression = packet_sniffer.kernel_filter_expression()
+        assert " and (net 10.7.19.0/24 or host 192.168.1.10) and " in expression
+    finally:
+        packet_sniffer.TARGET_IP, packet_sniffer.TARGET_NETWORKS = original
+
+    try:
+        build_bpf_filter(target_networks=["10.7.19.0/24 or 1=1"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("target_networks must be plain networks")
+
+
+if __name__ == "__main__":
+    for test in (test_parse_network, test_overlapping_and_adjacent_networks_merge, test_matches_brute_force,
+                 test_from_file, test_bundled_benign_networks, test_target_networks):
+        test()
+        print(f"✅ PASS: {test.__name__}")
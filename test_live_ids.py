@@ -306,9 +306,8 @@ def test_integration():
         ended = manager.end_expired_flows()
         
         if not ended:
-            # Force end by making it old
-            manager.flows[flow_key]["timestamps"][-1] = time.time() - 10
-            ended = manager.end_expired_flows()
+            # Force end by advancing the expiry clock past the timeout
+            ended = manager.end_expired_flows(now=time.time() + 10)
         
         test_result("Integration flow creation", len(ended) > 0)
         
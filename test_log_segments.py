@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the segmented alert log: the writer rotates at the size limit,
+sealed segments are compressed into indexed gzip members, and the newest
+alerts are read backwards across the active log and the segments.
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids import log_segments, logger
+from live_ids.flow_key import pack_flow_key
+from live_ids.log_segments import compress_segment, list_segments, read_index, rotate, tail_lines
+from live_ids.logger import AlertWriter
+
+KEY = pack_flow_key(("10.0.0.1", "10.0.0.2", 1234, 80, 6))
+
+
+def write_lines(path, count, start=0):
+    with open(path, "a") as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({"timestamp": float(i), "label": "DDoS", "pad": "x" * (i % 37)}) + "\n")
+
+
+def timestamps(lines):
+    return [json.loads(line)["timestamp"] for line in lines]
+
+
+def test_tail_reads_backwards():
+    saved = log_segments.READ_CHUNK
+    log_segments.READ_CHUNK = 100  # many chunk boundaries inside lines
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "alerts.log"
+            write_lines(path, 500)
+            for n in (0, 1, 7, 100, 499, 500, 800):
+                assert timestamps(tail_lines(path, n)) == [float(i) for i in range(max(0, 500 - n), 500)]
+            # A line still being written is not returned
+            with open(path, "a") as f:
+                f.write('{"timestamp": 500.0, "lab')
+            assert timestamps(tail_lines(path, 2)) == [498.0, 499.0]
+    finally:
+        log_segments.READ_CHUNK = saved
+
+
+def test_compressed_segment_and_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        write_lines(path, 3000)
+        original = path.read_bytes()
+        segment = rotate(path)
+        assert segment.name == "alerts.000001.log" and not path.exists()
+
+        index = compress_segment(segment, block_bytes=8192)
+        gz = segment.with_name("alerts.000001.log.gz")
+        assert not segment.exists() and read_index(gz) == index
+        assert index["alerts"] == 3000 and index["first_ts"] == 0.0 and index["last_ts"] == 2999.0
+        assert len(index["blocks"]) > 10
+        # Still one ordinary gzip file
+        with gzip.open(gz, "rb") as f:
+            assert f.read() == original
+        assert list_segments(path) == [(1, gz)]
+        assert timestamps(tail_lines(path, 5)) == [2995.0, 2996.0, 2997.0, 2998.0, 2999.0]
+
+
+def test_tail_spans_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        write_lines(path, 100)
+        compress_segment(rotate(path), block_bytes=1024)
+        write_lines(path, 100, start=100)
+        rotate(path)  # left uncompressed
+        write_lines(path, 10, start=200)
+        assert [seq for seq, _ in list_segments(path)] == [2, 1]
+        assert timestamps(tail_lines(path, 150)) == [float(i) for i in range(60, 210)]
+        assert timestamps(tail_lines(path, 1000)) == [float(i) for i in range(210)]
+
+
+def test_rotate_skips_log_rotated_elsewhere():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        write_lines(path, 5)
+        inode = os.stat(path).st_ino
+        assert rotate(path, inode=inode) is not None
+        write_lines(path, 5)
+        # A second writer still holding the old inode does not rotate the new log
+        assert rotate(path, inode=inode) is None
+        assert rotate(path) is not None and rotate(path) is None  # empty after rotation
+
+
+def test_writer_rotates_and_compresses():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "alerts.log"
+        writer = AlertWriter(path, flush_every=10, flush_interval=60, segment_bytes=4096).start()
+        for i in range(300):
+            writer.submit(KEY, "DDoS", 0.99, {"Flow Duration": float(i)}, timestamp=float(i))
+        writer.stop()
+        segments = list_segments(path)
+        assert writer.stats()["rotations"] == len(segments) > 3
+        assert all(segment.suffix == ".gz" for _, segment in segments)
+        assert timestamps(tail_lines(path, 300)) == [float(i) for i in range(300)]
+
+
+def test_read_latest_alerts_after_rotation():
+    saved = logger.LOG_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        logger.LOG_FILE = Path(tmp) / "alerts.log"
+        try:
+            for label in ("DDoS", "DoS", "Bot"):
+                logger.log_alert(KEY, label, 0.99)
+            rotate(logger.LOG_FILE)
+            assert [a["label"] for a in logger.read_latest_alerts(2)] == ["DoS", "Bot"]
+            logger.log_alert(KEY, "PortScan", 0.99)
+            assert [a["label"] for a in logger.read_latest_alerts(2)] == ["Bot", "PortScan"]
+        finally:
+            logger.LOG_FILE = saved
+
+
+if __name__ == "__main__":
+    for test in (test_tail_reads_backwards, test_compressed_segment_and_index, test_tail_spans_segments,
+                 test_rotate_skips_log_rotated_elsewhere, test_writer_rotates_and_compresses,
+                 test_read_latest_alerts_after_rotation):
+        test()
+        print(f"✅ PASS: {test.__name__}")
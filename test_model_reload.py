@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for hot model reload: a new model is validated before it is swapped
+in, a bad one leaves the old model serving, the watcher waits for files to
+settle, scoring carries on across swaps, and the API exposes the version
+and an admin reload endpoint.
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.compiled_histgb import export_histgb
+from models.inference_engine import InferenceEngine
+from models.model_reloader import ModelReloader, validate_engine, warm_up_batch
+
+
+def copy_model_files(tmp):
+    """The shipped model, compiled export, encoder and metadata in a temp directory"""
+    paths = []
+    for source in (predictor.MODEL_PATH, predictor.MODEL_PATH.with_suffix(".npz"),
+                   predictor.ENCODER_PATH, predictor.METADATA_PATH):
+        target = Path(tmp) / source.name
+        shutil.copyfile(source, target)
+        paths.append(target)
+    model, _, encoder, metadata = paths
+    return model, encoder, metadata
+
+
+class Holder:
+    """Stands in for a module holding the live engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.swaps = 0
+
+    def install(self, engine):
+        self.engine = engine
+        self.swaps += 1
+
+
+def retrain(model_path):
+    """Write the same model with different bytes (a new version) and re-export it"""
+    joblib.dump(joblib.load(model_path), model_path, compress=3)
+    export_histgb(joblib.load(model_path), model_path.with_suffix(".npz"), source_path=model_path)
+
+
+def test_reload_swaps_in_new_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        model, encoder, metadata = copy_model_files(tmp)
+        holder = Holder(InferenceEngine.load(model, encoder, metadata))
+        old = holder.engine
+        reloader = ModelReloader(model, encoder, metadata, on_swap=holder.install, current=old)
+        assert reloader.version == old.version and old.version
+
+        retrain(model)
+        ok, version = reloader.reload()
+        assert ok and version != old.version
+        assert holder.swaps == 1 and holder.engine is not old
+        assert holder.engine.version == version == reloader.status()["version"]
+
+        # The old engine still answers for whoever holds it, identically
+        X = warm_up_batch(len(old.feature_names))
+        assert np.array_equal(old.score(X)[2], holder.engine.score(X)[2])
+
+
+def test_invalid_model_keeps_old_one():
+    with tempfile.TemporaryDirectory() as tmp:
+        model, encoder, metadata = copy_model_files(tmp)
+        holder = Holder(InferenceEngine.load(model, encoder, metadata))
+        old = holder.engine
+        reloader = ModelReloader(model, encoder, metadata, on_swap=holder.install, current=old)
+
+        # Metadata listing the wrong features for the model
+        data = json.loads(metadata.read_text())
+        data["feature_names"] = data["feature_names"][:-1] if isinstance(data["feature_names"], list) \
+            else ["Protocol", "Flow Duration"]
+        metadata.write_text(json.dumps(data))
+        ok, error = reloader.reload()
+        assert not ok and "features" in error
+        assert holder.engine is old and holder.swaps == 0
+        assert reloader.status()["failures"] == 1 and reloader.status()["last_error"] == error
+
+        # A corrupt model file
+        model.write_bytes(b"not a model")
+        assert not reloader.reload()[0]
+        assert holder.engine is old
+
+
+def test_validation_rejects_unextractable_features():
+    engine = predictor.get_engine()
+    validate_engine(engine, available_features=engine.feature_names)
+    try:
+        validate_engine(engine, available_features=engine.feature_names[1:])
+    except ValueError as e:
+        assert engine.feature_names[0] in str(e)
+    else:
+        raise AssertionError("missing feature was not rejected")
+
+
+def test_watcher_waits_for_files_to_settle():
+    with tempfile.TemporaryDirectory() as tmp:
+        model, encoder, metadata = copy_model_files(tmp)
+        holder = Holder(InferenceEngine.load(model, encoder, metadata))
+        reloader = ModelReloader(model, encoder, metadata, on_swap=holder.install, current=holder.engine)
+        assert reloader.check() is None
+
+        retrain(model)
+        assert reloader.check() is None  # changed: wait one interval
+        ok, _ = reloader.check()         # unchanged since: reload
+        assert ok and holder.swaps == 1
+        assert reloader.check() is None
+
+
+def test_scoring_across_swaps():
+    with tempfile.TemporaryDirectory() as tmp:
+        model, encoder, metadata = copy_model_files(tmp)
+        holder = Holder(InferenceEngine.load(model, encoder, metadata))
+        reloader = ModelReloader(model, encoder, metadata, on_swap=holder.install, current=holder.engine)
+        X = warm_up_batch(len(holder.engine.feature_names))
+        expected = holder.engine.score(X)[0]
+        errors, results = [], []
+        stop = threading.Event()
+
+        def score_loop():
+            while not stop.is_set():
+                try:
+                    results.append(np.array_equal(holder.engine.score(X)[0], expected))
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=score_loop) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for _ in range(3):
+            assert reloader.reload()[0]
+        stop.set()
+        for t in threads:
+            t.join()
+        assert not errors and results and all(results)
+        assert holder.swaps == 3
+
+
+def test_api_health_and_admin_reload():
+    import app as api
+
+    client = api.app.test_client()
+    health = client.get('/api/health').get_json()
+    assert health['model_loaded'] and health['model_version'] == api.engine.version
+
+    before = api.engine
+    response = client.post('/api/admin/reload')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['model_version'] == before.version
+    assert api.engine is not before
+    assert client.get('/api/health').get_json()['model_reload']['reloads'] >= 1
+
+    remote = client.post('/api/admin/reload', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+    assert remote.status_code == 403
+
+
+if __name__ == "__main__":
+    for test in (test_reload_swaps_in_new_version, test_invalid_model_keeps_old_one,
+                 test_validation_rejects_unextractable_features, test_watcher_waits_for_files_to_settle,
+                 test_scoring_across_swaps, test_api_health_and_admin_reload):
+        test()
+        print(f"✅ PASS: {test.__name__}")
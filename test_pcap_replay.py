@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test offline pcap replay through the live IDS pipeline.
+Flows must end on the capture clock, so two replays score the same flows.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from scapy.all import Ether, IP, TCP, wrpcap
+
+from live_ids import packet_sniffer
+from live_ids.flow_manager import FLOW_TIMEOUT
+from live_ids.flow_key import unpack_key
+
+
+def write_capture(path):
+    """Two TCP flows to port 80; the first goes idle long before the second ends."""
+    packets = []
+    for i in range(10):
+        pkt = Ether() / IP(src="203.0.113.5", dst="10.7.19.211") / TCP(sport=40000, dport=80) / (b"x" * (60 + i))
+        pkt.time = 1000.0 + i * 0.2
+        packets.append(pkt)
+    for i in range(10):
+        pkt = Ether() / IP(src="203.0.113.6", dst="10.7.19.211") / TCP(sport=40001, dport=80) / (b"y" * 40)
+        pkt.time = 1000.0 + FLOW_TIMEOUT + 5 + i * 0.1
+        packets.append(pkt)
+    wrpcap(str(path), packets)
+
+
+def replay(path, runs, fast=False):
+    scored = []
+    original = packet_sniffer.score_flow
+    packet_sniffer.score_flow = lambda key, flow, now=None: scored.append((key, len(flow["packet_sizes"]), now))
+    try:
+        stats = packet_sniffer.replay_pcap(path, fast=fast)
+    finally:
+        packet_sniffer.score_flow = original
+    runs.append(scored)
+    return stats
+
+
+def test_replay_uses_packet_clock():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "capture.pcap"
+        write_capture(path)
+
+        runs = []
+        stats = replay(path, runs)
+        replay(path, runs)
+        fast_stats = replay(path, runs, fast=True)
+
+    assert stats["packets"] == fast_stats["packets"] == 20
+    assert stats["packets_per_sec"] > 0
+
+    first, second, fast = runs
+    assert first == second == fast
+    assert [(unpack_key(key)[0], count) for key, count, _ in first] == [("203.0.113.5", 10), ("203.0.113.6", 10)]
+    # The first flow is ended by the second flow's first packet, at capture time
+    assert first[0][2] == 1000.0 + FLOW_TIMEOUT + 5
+
+
+if __name__ == "__main__":
+    test_replay_uses_packet_clock()
+    print("✅ PASS: test_replay_uses_packet_clock")
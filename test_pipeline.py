@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the bounded capture -> inference pipeline: submit() must never block on a
+slow model, overflow is counted as drops, and stop() drains queued flows.
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from live_ids.pipeline import ScoringPipeline
+
+
+def test_submit_never_blocks_and_counts_drops():
+    release = threading.Event()
+    scored = []
+
+    def slow_model(key, flow, now):
+        release.wait()
+        scored.append(key)
+
+    pipeline = ScoringPipeline(slow_model, workers=1, maxsize=2).start()
+    start = time.perf_counter()
+    accepted = [pipeline.submit(i, {}) for i in range(10)]
+    assert time.perf_counter() - start < 0.5
+
+    stats = pipeline.stats()
+    assert stats["dropped"] == accepted.count(False) > 0
+    assert stats["submitted"] == accepted.count(True)
+    assert stats["max_depth"] <= 2
+
+    release.set()
+    pipeline.stop()
+    assert sorted(scored) == [i for i, ok in enumerate(accepted) if ok]
+    assert pipeline.stats()["scored"] == accepted.count(True)
+
+
+def test_worker_errors_are_counted():
+    def broken_model(key, flow, now):
+        raise RuntimeError("boom")
+
+    pipeline = ScoringPipeline(broken_model, workers=2).start()
+    for i in range(4):
+        pipeline.submit(i, {})
+    pipeline.stop()
+    stats = pipeline.stats()
+    assert stats["errors"] == 4
+    assert stats["scored"] == 4
+
+
+def test_micro_batches_respect_size_and_deadline():
+    batches = []
+    pipeline = ScoringPipeline(None, workers=1, batch_handler=batches.append,
+                               batch_size=4, batch_deadline=0.05)
+    for i in range(10):
+        pipeline.submit(i, {})
+    pipeline.start()
+    time.sleep(0.2)
+    pipeline.submit(10, {})
+    pipeline.stop()
+
+    assert [len(b) for b in batches] == [4, 4, 2, 1]
+    assert [key for b in batches for key, _, _ in b] == list(range(11))
+    stats = pipeline.stats()
+    assert stats["batches"] == 4
+    assert stats["scored"] == 11
+
+
+if __name__ == "__main__":
+    for test in (test_submit_never_blocks_and_counts_drops, test_worker_errors_are_counted,
+                 test_micro_batches_respect_size_and_deadline):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the quantized prediction cache: exact mode returns exactly what
+the model returns, the approximate mode stays within its error bound, and
+the LRU bookkeeping (hits, evictions, memory) adds up.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor
+from models.inference_engine import InferenceEngine
+from models.prediction_cache import FeatureQuantizer, PredictionCache
+
+ENGINE = predictor.get_engine()
+
+
+def flood_rows(rows=2000, jitter=0.01, seed=0):
+    """Jittered copies of a few base flows, with some NaNs, like a flood of near-identical flows"""
+    rng = np.random.default_rng(seed)
+    n_features = len(ENGINE.feature_names)
+    bases = rng.random((5, n_features)) * rng.choice([1.0, 1e3, 1e6], size=n_features)
+    X = bases[rng.integers(0, len(bases), size=rows)]
+    X = X * (1 + jitter * rng.standard_normal(X.shape))
+    X[rng.random(X.shape) < 0.02] = np.nan
+    return X
+
+
+def test_exact_mode_matches_model():
+    cache = PredictionCache(ENGINE.model, max_entries=10_000)
+    X = flood_rows()
+    exact = ENGINE.model.predict_proba(X)
+    for start in range(0, len(X), 64):
+        batch = X[start:start + 64]
+        assert np.array_equal(cache.predict_proba(batch, ENGINE.model.predict_proba), exact[start:start + 64])
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == len(X)
+    assert stats["hit_rate"] > 0.5
+    assert stats["error_bound"] == 0.0
+    assert stats["entries"] == stats["misses"]
+
+
+def test_rows_in_one_bin_score_alike():
+    quantizer = FeatureQuantizer(ENGINE.model)
+    X = flood_rows(rows=500, jitter=0.05, seed=1)
+    bins = quantizer.bins(X)
+    _, first, inverse = np.unique(bins, axis=0, return_index=True, return_inverse=True)
+    proba = ENGINE.model.predict_proba(X)
+    assert np.array_equal(proba, proba[first][inverse.ravel()])
+
+
+def test_error_bound():
+    X = flood_rows(rows=3000, jitter=0.05, seed=2)
+    exact = ENGINE.model.predict_proba(X)
+    for max_error in (0.01, 0.05):
+        cache = PredictionCache(ENGINE.model, max_entries=10_000, max_proba_error=max_error)
+        assert 0 < cache.quantizer.error_bound <= max_error
+        assert cache.quantizer.thresholds_kept < cache.quantizer.thresholds_total
+        cached = cache.predict_proba(X, ENGINE.model.predict_proba)
+        assert np.abs(cached - exact).max() <= cache.quantizer.error_bound
+
+    try:
+        PredictionCache(ENGINE.model, max_proba_error=-1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("negative error bound was not rejected")
+
+
+def test_lru_eviction_and_memory():
+    cache = PredictionCache(ENGINE.model, max_entries=10)
+    rng = np.random.default_rng(3)
+    X = rng.random((40, len(ENGINE.feature_names))) * 1e6
+    cache.predict_proba(X, ENGINE.model.predict_proba)
+    stats = cache.stats()
+    assert stats["entries"] <= 10
+    assert stats["evictions"] == stats["misses"] - stats["entries"]
+    assert stats["bytes"] > 0
+
+    # The most recent rows are still cached, the oldest are gone
+    scored = []
+    cache.predict_proba(X[-1:], lambda rows: scored.append(len(rows)) or ENGINE.model.predict_proba(rows))
+    assert scored == []
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
+
+
+def test_engine_cache():
+    engine = InferenceEngine(ENGINE.model, ENGINE.label_encoder, ENGINE.feature_names)
+    X = flood_rows(rows=300, seed=4)
+    expected = engine.score(X)
+    assert engine.enable_cache(max_entries=1000) is engine.cache
+    for _ in range(2):
+        label_idx, confidence, proba = engine.score(X)
+        assert np.array_equal(label_idx, expected[0])
+        assert np.array_equal(proba, expected[2])
+    assert engine.cache.stats()["hits"] >= len(X)
+
+
+if __name__ == "__main__":
+    for test in (test_exact_mode_matches_model, test_rows_in_one_bin_score_alike, test_error_bound,
+                 test_lru_eviction_and_memory, test_engine_cache):
+        test()
+        print(f"✅ PASS: {test.__name__}")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the fast cold start: cached label classes and model discovery go
+stale when files change, uncompressed pickles load memory-mapped only on
+request, and importing the sniffer with a warm startup cache pulls in none
+of sklearn, pandas or scapy.all.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add backend to path
+BASE_DIR = Path(__file__).parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from models import predictor, startup
+from models.inference_engine import _load_pickle
+
+
+@contextmanager
+def isolated_cache():
+    """A temporary directory with the startup cache pointed into it"""
+    saved = startup.STARTUP_CACHE_PATH, startup._cache
+    with tempfile.TemporaryDirectory() as tmp:
+        startup.STARTUP_CACHE_PATH, startup._cache = Path(tmp) / "cache" / "startup_cache.json", None
+        try:
+            yield Path(tmp)
+        finally:
+            startup.STARTUP_CACHE_PATH, startup._cache = saved
+
+
+def test_label_classes_match_label_encoder():
+    encoder = joblib.load(predictor.ENCODER_PATH)
+    with isolated_cache():
+        assert startup.cached_label_classes(predictor.ENCODER_PATH) is None
+        startup.remember_label_classes(predictor.ENCODER_PATH, encoder)
+        assert startup.STARTUP_CACHE_PATH.exists()
+
+        # A fresh process reads the saved file
+        startup._cache = None
+        classes = startup.cached_label_classes(predictor.ENCODER_PATH)
+    assert list(classes.classes_) == list(encoder.classes_)
+    labels = np.array(list(encoder.classes_) * 2)
+    assert np.array_equal(classes.transform(labels), encoder.transform(labels))
+    assert np.array_equal(classes.inverse_transform([0, 3]), encoder.inverse_transform([0, 3]))
+    try:
+        classes.transform(["Not A Class"])
+    except ValueError as e:
+        assert "unseen" in str(e)
+    else:
+        raise AssertionError("unknown label was not rejected")
+
+
+def test_label_classes_go_stale():
+    with isolated_cache() as tmp:
+        path = tmp / "label_encoder.joblib"
+        joblib.dump(joblib.load(predictor.ENCODER_PATH), path)
+        startup.remember_label_classes(path, joblib.load(path))
+        assert startup.cached_label_classes(path) is not None
+
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert startup.cached_label_classes(path) is None
+
+
+def test_discovery_cache():
+    with isolated_cache() as tmp:
+        models, artifacts = tmp / "models", tmp / "artifacts"
+        models.mkdir()
+        artifacts.mkdir()
+        (models / "label_encoder.joblib").write_bytes(b"x")
+        (artifacts / "ids_other.joblib").write_bytes(b"x")
+
+        found = startup.discover_model_files(models, artifacts, "ids_7class.joblib")
+        assert not found["cached"]
+        assert found["model"] == artifacts / "ids_other.joblib"
+        assert found["encoder"] == models / "label_encoder.joblib"
+        assert found["metadata"] is None
+        assert startup.discover_model_files(models, artifacts, "ids_7class.joblib")["cached"]
+
+        # Adding the preferred model changes the directory listing
+        time.sleep(0.01)
+        (models / "ids_7class.joblib").write_bytes(b"x")
+        found = startup.discover_model_files(models, artifacts, "ids_7class.joblib")
+        assert not found["cached"]
+        assert found["model"] == models / "ids_7class.joblib"
+
+
+def test_uncompressed_pickles_are_memory_mapped_on_request():
+    array = np.arange(100_000, dtype=np.float64)
+    with tempfile.TemporaryDirectory() as tmp:
+        joblib.dump({"a": array}, Path(tmp) / "plain.joblib")
+        joblib.dump({"a": array}, Path(tmp) / "packed.joblib", compress=3)
+        # In-place dumps would truncate a mapped file, so mapping is opt-in
+        assert not isinstance(_load_pickle(Path(tmp) / "plain.joblib")["a"], np.memmap)
+        assert isinstance(_load_pickle(Path(tmp) / "plain.joblib", mmap=True)["a"], np.memmap)
+        packed = _load_pickle(Path(tmp) / "packed.joblib", mmap=True)["a"]
+        assert not isinstance(packed, np.memmap) and np.array_equal(packed, array)
+
+
+def test_startup_timer():
+    timer = startup.StartupTimer()
+    with timer.phase("model load"):
+        time.sleep(0.01)
+    timer.imports_done()
+    assert list(timer.phases) == ["imports", "model load"]
+    assert timer.phases["model load"] >= 0.01
+    assert "model load" in timer.summary()
+
+
+def test_sniffer_import_is_light():
+    code = ("import sys; sys.path.insert(0, 'backend'); import live_ids.packet_sniffer as s; "
+            "s.get_engine().warm_up(); "
+            "print(sorted(m for m in ('sklearn', 'pandas', 'scapy.all', 'joblib') if m in sys.modules))")
+    with tempfile.TemporaryDirectory() as cache_home:
+        env = {**os.environ, "XDG_CACHE_HOME": cache_home}
+        runs = [subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=BASE_DIR, env=env,
+                               capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+                for _ in range(2)]
+    # First start unpickles the label encoder, later starts use the cached classes
+    assert "sklearn" in runs[0]
+    assert runs[1] == "[]"
+
+
+if __name__ == "__main__":
+    for test in (test_label_classes_match_label_encoder, test_label_classes_go_stale, test_discovery_cache,
+                 test_uncompressed_pickles_are_memory_mapped_on_request, test_startup_timer,
+                 test_sniffer_import_is_light):
+        test()
+        print(f"✅ PASS: {test.__name__}")